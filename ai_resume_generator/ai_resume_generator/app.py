@@ -1,7 +1,15 @@
-from flask import Flask, render_template, request, send_file, jsonify
+from flask import Flask, render_template, request, send_file, jsonify, Response, stream_with_context, g, has_request_context
 import requests
+from requests.adapters import HTTPAdapter
 import json
+import copy
+from concurrent.futures import ThreadPoolExecutor
+import random
+import asyncio
+import threading
+import time
 from datetime import datetime
+from urllib.parse import urlencode
 import os
 from pathlib import Path
 from docx import Document
@@ -12,15 +20,33 @@ from docx.oxml.shared import OxmlElement, qn
 from docx.oxml.ns import nsdecls
 from docx.oxml import parse_xml
 import io
+from config import Config
+from llm_cache import LLMCache, generation_extra
+from llm_router import LLMRouter
+from resume_schema import JSON_INSTRUCTIONS, RESUME_SCHEMA, parse_resume_json, sections_to_text
+from content_store import ContentStore
+from ats_score import KeywordScorer
+from job_queue import JobQueue, QueueFullError
+from batch import BatchRun, check_records, parse_records, run_batch
+from artifact_store import ArtifactStore
+from storage import StorageManager
+from health import OllamaMonitor, model_available
+from warmup import ModelWarmer, parse_hours, parse_keep_alive
+from metrics import MetricsRegistry, attach_trace, begin_trace, end_trace, current_trace, request_trace, timed
+import docx_optimize
+import page_fit
+import pdf_templates
 
 app = Flask(__name__)
 
+# Read once from the environment and .env; see config.py for every setting
+config = Config.from_env()
+
 def ensure_directories():
-    """Ensure all required directories exist"""
+    """Ensure the output directories exist"""
     directories = [
-        'generated_documents',
-        'templates',
-        'static'
+        config.output_dir,
+        config.content_dir
     ]
     
     for directory in directories:
@@ -28,40 +54,473 @@ def ensure_directories():
         dir_path.mkdir(parents=True, exist_ok=True)
         print(f"✅ Directory ensured: {dir_path.absolute()}")
 
-ensure_directories()
+metrics = MetricsRegistry()
+stage_seconds = metrics.histogram(
+    'resume_generator_stage_seconds',
+    'Time spent in each generation stage',
+    ['stage']
+)
+request_seconds = metrics.histogram(
+    'resume_generator_request_seconds',
+    'HTTP request latency by endpoint',
+    ['endpoint', 'method', 'status']
+)
+llm_tokens = metrics.counter(
+    'resume_generator_llm_tokens_total',
+    'Tokens processed by Ollama',
+    ['kind']
+)
+llm_tokens_per_second = metrics.histogram(
+    'resume_generator_llm_tokens_per_second',
+    'Ollama generation speed (eval_count / eval_duration)',
+    buckets=(1, 2, 5, 10, 15, 20, 30, 40, 50, 75, 100, 150, 200, 500)
+)
+
+# Time spent evaluating the prompt before the first token; low when Ollama reuses a cached prefix
+llm_prompt_eval_seconds = metrics.histogram(
+    'resume_generator_llm_prompt_eval_seconds',
+    'Time Ollama spent evaluating the prompt (prompt_eval_duration), per request',
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+)
+
+llm_load_seconds = metrics.histogram(
+    'resume_generator_llm_load_seconds',
+    'Time Ollama spent loading the model (load_duration), per request',
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+)
+llm_cold_loads = metrics.counter(
+    'resume_generator_llm_cold_loads_total',
+    'Requests that had to load the model from disk first'
+)
+# load_duration above this means the model wasn't resident
+COLD_LOAD_SECONDS = 1.0
+
+def stage(name):
+    """Time a pipeline stage; works as a context manager or a decorator"""
+    return timed(stage_seconds, name)
+
+def record_llm_stats(result):
+    """Record token counts and speed from the final Ollama response object"""
+    eval_count = result.get('eval_count') or 0
+    eval_duration = result.get('eval_duration') or 0
+    prompt_eval_count = result.get('prompt_eval_count') or 0
+    prompt_eval_seconds = (result.get('prompt_eval_duration') or 0) / 1e9
+    load_seconds = (result.get('load_duration') or 0) / 1e9
+    
+    llm_tokens.inc(eval_count, kind='generated')
+    llm_tokens.inc(prompt_eval_count, kind='prompt')
+    
+    stats = {'tokens': eval_count, 'prompt_tokens': prompt_eval_count}
+    if prompt_eval_seconds:
+        llm_prompt_eval_seconds.observe(prompt_eval_seconds)
+        stats['prompt_ms'] = round(prompt_eval_seconds * 1000, 2)
+    if load_seconds:
+        llm_load_seconds.observe(load_seconds)
+        stats['load_ms'] = round(load_seconds * 1000, 2)
+        if load_seconds >= COLD_LOAD_SECONDS:
+            llm_cold_loads.inc()
+            stats['cold_load'] = True
+    if eval_count and eval_duration:
+        stats['tokens_per_second'] = round(eval_count / (eval_duration / 1e9), 2)
+        llm_tokens_per_second.observe(stats['tokens_per_second'])
+    
+    trace = current_trace()
+    if trace is not None:
+        trace.add_llm(stats)
 
 class LocalLLM:
-    def __init__(self, model_name="llama2:7b"):
+    def __init__(self, model_name="llama2:7b", base_url="http://localhost:11434", cache=None,
+                 pool_size=10, connect_timeout=5, read_timeout=120, max_retries=2, retry_backoff=0.5,
+                 on_stats=None, keep_alive=None):
         self.model_name = model_name
-        self.base_url = "http://localhost:11434/api/generate"
+        self.base_url = base_url.rstrip('/')
+        self.temperature = 0.7
+        self.cache = cache
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        # Called with the final response object (eval_count, eval_duration, ...) of each generation
+        self.on_stats = on_stats
+        # How long Ollama keeps the model loaded after each request, e.g. "30m" or -1 for forever
+        self.keep_alive = keep_alive
+        self.last_used = 0.0
+        self.pool_size = pool_size
+        self._session = None
+        self._session_lock = threading.Lock()
+        # httpx.AsyncClient for the asyncio serving mode, bound to the loop that created it
+        self._async_client = None
+        self._async_client_loop = None
     
-    def generate_text(self, prompt, max_tokens=1000):
-        """Generate text using local Ollama model"""
-        try:
-            payload = {
-                "model": self.model_name,
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "num_predict": max_tokens,
-                    "temperature": 0.7
-                }
-            }
-            
-            response = requests.post(self.base_url, json=payload, timeout=120)
+    @property
+    def session(self):
+        """One pooled keep-alive session shared by every call to Ollama, created on first use"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                    session.mount('http://', adapter)
+                    session.mount('https://', adapter)
+                    self._session = session
+        return self._session
+    
+    def _request(self, method, path, read_timeout=None, **kwargs):
+        """Send a request through the shared session, retrying 5xx and dropped connections.
+        
+        Retries back off exponentially with jitter so that callers hitting a
+        restarting Ollama don't all come back at the same moment.
+        """
+        timeout = (self.connect_timeout, read_timeout or self.read_timeout)
+        
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", timeout=timeout, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if last_attempt:
+                    raise
+            else:
+                if response.status_code < 500 or last_attempt:
+                    return response
+                response.close()
             
-            if response.status_code == 200:
-                result = response.json()
-                return result.get('response', 'No response generated')
+            time.sleep(self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+    
+    @property
+    def async_client(self):
+        """The httpx.AsyncClient for the running event loop, created on first use"""
+        loop = asyncio.get_running_loop()
+        if self._async_client is None or self._async_client_loop is not loop:
+            import httpx
+            self._async_client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                # Waiting requests are cheap here; Ollama's own queue is the real limit
+                limits=httpx.Limits(max_connections=None, max_keepalive_connections=self.pool_size)
+            )
+            self._async_client_loop = loop
+        return self._async_client
+    
+    async def _arequest(self, method, path, **kwargs):
+        """Async version of _request: same retries, and requests' exception types so callers can share error handling"""
+        import httpx
+        
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                request = self.async_client.build_request(method, path, **kwargs)
+                response = await self.async_client.send(request, stream=True)
+            except (httpx.ConnectError, httpx.RemoteProtocolError) as e:
+                if last_attempt:
+                    raise requests.exceptions.ConnectionError(str(e))
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(str(e))
             else:
-                return f"HTTP {response.status_code}: {response.text}"
-                
+                if response.status_code < 500 or last_attempt:
+                    return response
+                await response.aclose()
+            
+            await asyncio.sleep(self.retry_backoff * (2 ** attempt) * random.uniform(0.5, 1.5))
+    
+    @staticmethod
+    async def _araise_for_status(response):
+        if response.status_code != 200:
+            text = (await response.aread()).decode('utf-8', 'replace')
+            await response.aclose()
+            raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: {text}", response=response)
+    
+    async def acomplete(self, prompt, max_tokens=1000, response_format=None, model=None, system=None, regenerate=False):
+        """Async complete(): waits on Ollama without holding a thread"""
+        cache_key = self._cache_key(prompt, max_tokens, response_format, model, system)
+        if cache_key and not regenerate:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        payload = self._build_payload(prompt, max_tokens, stream=False, response_format=response_format, model=model,
+                                      system=system)
+        response = await self._arequest('POST', '/api/generate', json=payload)
+        await self._araise_for_status(response)
+        result = json.loads(await response.aread())
+        await response.aclose()
+        
+        if 'response' not in result:
+            return 'No response generated'
+        if self.on_stats:
+            self.on_stats(result)
+        if cache_key:
+            self.cache.set(cache_key, result['response'])
+        return result['response']
+    
+    async def astream_text(self, prompt, max_tokens=1000, model=None, system=None, regenerate=False):
+        """Async stream_text(): yields text chunks as Ollama produces them"""
+        cache_key = self._cache_key(prompt, max_tokens, model=model, system=system)
+        if cache_key and not regenerate:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        payload = self._build_payload(prompt, max_tokens, stream=True, model=model, system=system)
+        chunks = []
+        
+        response = await self._arequest('POST', '/api/generate', json=payload)
+        await self._araise_for_status(response)
+        try:
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise RuntimeError(chunk['error'])
+                if chunk.get('response'):
+                    chunks.append(chunk['response'])
+                    yield chunk['response']
+                if chunk.get('done'):
+                    if self.on_stats:
+                        self.on_stats(chunk)
+                    if cache_key:
+                        self.cache.set(cache_key, ''.join(chunks))
+                    break
+        finally:
+            await response.aclose()
+    
+    def list_models(self):
+        """Return the names of the models pulled into Ollama"""
+        response = self._request('GET', '/api/tags', read_timeout=5)
+        response.raise_for_status()
+        return [model['name'] for model in response.json().get('models', [])]
+    
+    def _build_payload(self, prompt, max_tokens, stream, response_format=None, model=None, system=None):
+        """Build the Ollama /api/generate request body; model overrides model_name.
+        
+        The system prompt goes first in the model's input, so a static one is
+        a shared prefix Ollama can reuse from its cache instead of evaluating
+        it again on every request.
+        """
+        self.last_used = time.time()
+        payload = {
+            "model": model or self.model_name,
+            "prompt": prompt,
+            "stream": stream,
+            "options": {
+                "num_predict": max_tokens,
+                "temperature": self.temperature
+            }
+        }
+        if system:
+            payload["system"] = system
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        if response_format is not None:
+            # "json" or a JSON schema the output must follow
+            payload["format"] = response_format
+        return payload
+    
+    def warm_up(self):
+        """Load the model into memory without generating; returns the load time in seconds.
+        
+        Ollama treats a generate request with an empty prompt as a load request.
+        """
+        self.last_used = time.time()
+        payload = {"model": self.model_name, "prompt": "", "stream": False}
+        if self.keep_alive is not None:
+            payload["keep_alive"] = self.keep_alive
+        
+        start = time.perf_counter()
+        response = self._request('POST', '/api/generate', json=payload)
+        response.raise_for_status()
+        result = response.json()
+        if self.on_stats:
+            self.on_stats(result)
+        
+        if result.get('load_duration'):
+            return result['load_duration'] / 1e9
+        return time.perf_counter() - start
+    
+    def _cache_key(self, prompt, max_tokens, response_format=None, model=None, system=None):
+        if self.cache is None:
+            return None
+        return self.cache.make_key(prompt, model or self.model_name, max_tokens, self.temperature,
+                                   generation_extra(response_format, system))
+    
+    def complete(self, prompt, max_tokens=1000, response_format=None, model=None, system=None, regenerate=False):
+        """Generate text, raising on connection and HTTP errors"""
+        cache_key = self._cache_key(prompt, max_tokens, response_format, model, system)
+        if cache_key and not regenerate:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+        
+        payload = self._build_payload(prompt, max_tokens, stream=False, response_format=response_format, model=model,
+                                      system=system)
+        
+        response = self._request('POST', '/api/generate', json=payload)
+        
+        if response.status_code != 200:
+            raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: {response.text}", response=response)
+        
+        result = response.json()
+        if 'response' not in result:
+            return 'No response generated'
+        if self.on_stats:
+            self.on_stats(result)
+        if cache_key:
+            self.cache.set(cache_key, result['response'])
+        return result['response']
+    
+    def generate_text(self, prompt, max_tokens=1000, model=None, system=None, regenerate=False):
+        """Generate text using local Ollama model"""
+        try:
+            return self.complete(prompt, max_tokens, model=model, system=system, regenerate=regenerate)
         except requests.exceptions.ConnectionError:
             return "Connection failed: Is Ollama running? Start it with 'ollama serve'"
+        except requests.exceptions.HTTPError as e:
+            return str(e)
         except Exception as e:
             return f"Unexpected error: {str(e)}"
+    
+    def loaded_models(self):
+        """Return the names of the models Ollama currently holds in memory (/api/ps)"""
+        response = self._request('GET', '/api/ps', read_timeout=5)
+        response.raise_for_status()
+        return [model['name'] for model in response.json().get('models', [])]
+    
+    def stream_text(self, prompt, max_tokens=1000, model=None, system=None, regenerate=False):
+        """Yield text chunks as Ollama produces them.
+        
+        Ollama streams NDJSON objects, one per line, each carrying a piece of
+        the response. Failures raise instead of being returned as text so the
+        caller can report them separately from the generated content.
+        A cached response is yielded as a single chunk.
+        """
+        cache_key = self._cache_key(prompt, max_tokens, model=model, system=system)
+        if cache_key and not regenerate:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+        
+        payload = self._build_payload(prompt, max_tokens, stream=True, model=model, system=system)
+        chunks = []
+        
+        with self._request('POST', '/api/generate', json=payload, stream=True) as response:
+            if response.status_code != 200:
+                raise requests.exceptions.HTTPError(f"HTTP {response.status_code}: {response.text}", response=response)
+            
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get('error'):
+                    raise RuntimeError(chunk['error'])
+                if chunk.get('response'):
+                    chunks.append(chunk['response'])
+                    yield chunk['response']
+                if chunk.get('done'):
+                    if self.on_stats:
+                        self.on_stats(chunk)
+                    if cache_key:
+                        self.cache.set(cache_key, ''.join(chunks))
+                    break
+
+# Nothing below touches the network or the disk until first use; create_app() does the startup work
+llm = LLMRouter(
+    [LocalLLM(
+        model_name=config.model_name,
+        base_url=url,
+        pool_size=config.ollama_pool_size,
+        # With several backends, fail over right away instead of retrying the same one
+        max_retries=2 if len(config.ollama_urls) == 1 else 0,
+        on_stats=record_llm_stats,
+        keep_alive=parse_keep_alive(config.ollama_keep_alive)
+    ) for url in config.ollama_urls],
+    cache=LLMCache(Path(config.llm_cache_dir)),
+    failure_threshold=config.ollama_failure_threshold,
+    cooldown=config.ollama_cooldown,
+    probe_interval=config.ollama_probe_interval
+)
+model_warmer = ModelWarmer(
+    llm,
+    warm_up=config.ollama_warmup,
+    heartbeat_interval=config.ollama_heartbeat_interval,
+    hours=parse_hours(config.ollama_heartbeat_hours),
+    weekdays_only=config.ollama_heartbeat_weekdays_only
+)
+ollama_monitor = OllamaMonitor(
+    llm.list_models,
+    llm.model_name,
+    interval=config.ollama_poll_interval
+)
+content_store = ContentStore(
+    Path(config.content_dir),
+    max_age_seconds=int(config.content_max_age_days * 24 * 3600),
+    max_total_bytes=config.content_max_bytes,
+    sweep_interval=config.storage_sweep_interval
+)
+artifact_store = ArtifactStore(
+    max_bytes=config.artifact_max_bytes,
+    ttl_seconds=config.artifact_ttl
+)
+storage = StorageManager(
+    Path(config.output_dir),
+    max_age_seconds=int(config.storage_max_age_days * 24 * 3600),
+    max_total_bytes=config.storage_max_bytes,
+    sweep_interval=config.storage_sweep_interval
+)
+# Set PERSIST_DOCUMENTS=false to keep rendered documents in memory only
+PERSIST_DOCUMENTS = config.persist_documents
+# Set DOCX_OPTIMIZE=false to keep python-docx's full default template in every file
+DOCX_OPTIMIZE = config.docx_optimize
+DOCX_COMPRESSION = config.docx_compression
+# Bundled skills taxonomy, indexed once on the first /score call; /score matches
+# against it without the LLM
+_ats_scorer = None
+_ats_scorer_lock = threading.Lock()
 
-llm = LocalLLM()
+def get_ats_scorer():
+    """The keyword scorer, reading the taxonomy on first use rather than at import"""
+    global _ats_scorer
+    if _ats_scorer is None:
+        with _ats_scorer_lock:
+            if _ats_scorer is None:
+                _ats_scorer = KeywordScorer.load()
+    return _ats_scorer
+
+# Form fields /score reads when the request has no "content"
+SCORED_FIELDS = ('job_title', 'professional_summary', 'experience', 'skills', 'education',
+                 'certifications', 'languages', 'interest')
+# Longest text /score looks at; a pasted job posting is far shorter
+MAX_SCORE_CHARS = 50000
+
+def resolve_model(data):
+    """Validate an optional per-request "model" field; return an error message or None"""
+    model = data.get('model')
+    if not model or model == config.model_name:
+        data.pop('model', None)
+        return None
+    if not isinstance(model, str):
+        return 'model must be a string'
+    if config.allowed_models:
+        if model not in config.allowed_models:
+            return f"Model {model} is not allowed (allowed: {', '.join(config.allowed_models)})"
+        return None
+    if not model_available(model, ollama_monitor.snapshot()['available_models']):
+        return f"Model {model} is not pulled into Ollama (run: ollama pull {model})"
+    return None
+
+PAGE_LIMITS = (1, 2)
+
+def resolve_page_limit(data):
+    """Coerce page_limit to an int (the form posts it as a string); return an error message or None"""
+    try:
+        data['page_limit'] = int(data.get('page_limit') or 1)
+    except (TypeError, ValueError):
+        return 'page_limit must be a whole number'
+    if data['page_limit'] not in PAGE_LIMITS:
+        return f"page_limit must be one of {', '.join(str(limit) for limit in PAGE_LIMITS)}"
+    return None
 
 def add_hyperlink(paragraph, text, url, style_name=None):
     """Add a hyperlink to a paragraph"""
@@ -95,9 +554,54 @@ def add_hyperlink(paragraph, text, url, style_name=None):
         paragraph.add_run(text)
         return None
 
+def add_social_links(paragraph, data, separator, labels=None, prefix=''):
+    """Append clickable LinkedIn / GitHub / Portfolio links to a paragraph"""
+    labels = labels or {}
+    links = [(labels.get(field, label), data.get(field))
+             for field, label in (('linkedin', 'LinkedIn'), ('github', 'GitHub'), ('portfolio', 'Portfolio'))
+             if data.get(field)]
+    
+    if links and prefix:
+        paragraph.add_run(prefix)
+    
+    for i, (label, url) in enumerate(links):
+        if i:
+            paragraph.add_run(separator)
+        add_hyperlink(paragraph, label, url)
+    
+    return bool(links)
+
 class ResumeTemplates:
+    """Resume header layouts.
+    
+    Each create_*_template method lays out a template with placeholder runs
+    (see PLACEHOLDERS) instead of user data. TemplateSkeletons compiles each
+    layout once and fill_template() swaps the placeholders for a request's data.
+    """
+    
+    # Placeholder text -> how fill_template() resolves it
+    PLACEHOLDERS = {
+        '{{name}}': 'text',
+        '{{job_title}}': 'text',
+        '{{contact}}': 'contact',
+        '{{email}}': 'optional',
+        '{{phone}}': 'optional',
+        '{{links}}': 'links',
+        '{{links_header}}': 'links_header',
+        '{{sidebar_links}}': 'sidebar_links',
+    }
+    
+    # Per-template separators and labels used when filling placeholders
+    STYLES = {
+        'modern': {'contact_separator': ' | ', 'link_separator': ' | '},
+        'classic': {'contact_separator': ' • ', 'link_separator': ' • ', 'link_prefix': '\n',
+                    'link_labels': {'linkedin': 'LinkedIn Profile', 'github': 'GitHub Profile'}},
+        'creative': {'contact_separator': ' • ', 'link_separator': ''},
+        'minimal': {'contact_separator': ' • ', 'link_separator': ' • '},
+    }
+    
     @staticmethod
-    def create_modern_template(doc, data, page_limit):
+    def create_modern_template(doc):
         """Modern Professional Template"""
         # Header with name and contact
         header_table = doc.add_table(rows=2, cols=2)
@@ -106,7 +610,7 @@ class ResumeTemplates:
         # Name cell
         name_cell = header_table.cell(0, 0)
         name_para = name_cell.paragraphs[0]
-        name_run = name_para.add_run(data.get('name', ''))
+        name_run = name_para.add_run('{{name}}')
         name_run.font.size = Pt(20)
         name_run.font.bold = True
         name_run.font.color.rgb = RGBColor(0x2E, 0x86, 0xAB)
@@ -115,39 +619,19 @@ class ResumeTemplates:
         title_cell = header_table.cell(0, 1)
         title_para = title_cell.paragraphs[0]
         title_para.alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-        title_run = title_para.add_run(data.get('job_title', ''))
+        title_run = title_para.add_run('{{job_title}}')
         title_run.font.size = Pt(14)
         title_run.font.italic = True
         
         # Contact info
         contact_cell = header_table.cell(1, 0)
-        contact_para = contact_cell.paragraphs[0]
-        contact_info = []
-        if data.get('email'):
-            contact_info.append(data.get('email'))
-        if data.get('phone'):
-            contact_info.append(data.get('phone'))
-        if data.get('location'):
-            contact_info.append(data.get('location'))
-        contact_para.add_run(' | '.join(contact_info))
+        contact_cell.paragraphs[0].add_run('{{contact}}')
         
         # Social links
         social_cell = header_table.cell(1, 1)
         social_para = social_cell.paragraphs[0]
         social_para.alignment = WD_PARAGRAPH_ALIGNMENT.RIGHT
-        
-        if data.get('linkedin'):
-            add_hyperlink(social_para, "LinkedIn", data.get('linkedin'))
-            if data.get('github') or data.get('portfolio'):
-                social_para.add_run(" | ")
-        
-        if data.get('github'):
-            add_hyperlink(social_para, "GitHub", data.get('github'))
-            if data.get('portfolio'):
-                social_para.add_run(" | ")
-        
-        if data.get('portfolio'):
-            add_hyperlink(social_para, "Portfolio", data.get('portfolio'))
+        social_para.add_run('{{links}}')
         
         # Remove table borders
         ResumeTemplates._remove_table_borders(header_table)
@@ -158,14 +642,14 @@ class ResumeTemplates:
         return doc
     
     @staticmethod
-    def create_classic_template(doc, data, page_limit):
+    def create_classic_template(doc):
         """Classic Professional Template"""
         # Centered header
         header = doc.add_paragraph()
         header.alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
         
         # Name
-        name_run = header.add_run(data.get('name', ''))
+        name_run = header.add_run('{{name}}')
         name_run.font.size = Pt(18)
         name_run.font.bold = True
         name_run.font.name = 'Times New Roman'
@@ -173,34 +657,11 @@ class ResumeTemplates:
         header.add_run('\n')
         
         # Contact info
-        contact_info = []
-        if data.get('email'):
-            contact_info.append(data.get('email'))
-        if data.get('phone'):
-            contact_info.append(data.get('phone'))
-        if data.get('location'):
-            contact_info.append(data.get('location'))
-        
-        if contact_info:
-            contact_run = header.add_run(' • '.join(contact_info))
-            contact_run.font.size = Pt(11)
+        contact_run = header.add_run('{{contact}}')
+        contact_run.font.size = Pt(11)
         
         # Social links on new line
-        if data.get('linkedin') or data.get('github') or data.get('portfolio'):
-            header.add_run('\n')
-            
-            if data.get('linkedin'):
-                add_hyperlink(header, "LinkedIn Profile", data.get('linkedin'))
-                if data.get('github') or data.get('portfolio'):
-                    header.add_run(" • ")
-            
-            if data.get('github'):
-                add_hyperlink(header, "GitHub Profile", data.get('github'))
-                if data.get('portfolio'):
-                    header.add_run(" • ")
-            
-            if data.get('portfolio'):
-                add_hyperlink(header, "Portfolio", data.get('portfolio'))
+        header.add_run('{{links}}')
         
         # Horizontal line
         doc.add_paragraph("═" * 60).alignment = WD_PARAGRAPH_ALIGNMENT.CENTER
@@ -208,7 +669,7 @@ class ResumeTemplates:
         return doc
     
     @staticmethod
-    def create_creative_template(doc, data, page_limit):
+    def create_creative_template(doc):
         """Creative Modern Template"""
         # Create a table for layout
         main_table = doc.add_table(rows=1, cols=2)
@@ -222,7 +683,7 @@ class ResumeTemplates:
         
         # Name in sidebar
         name_para = left_cell.add_paragraph()
-        name_run = name_para.add_run(data.get('name', ''))
+        name_run = name_para.add_run('{{name}}')
         name_run.font.size = Pt(16)
         name_run.font.bold = True
         name_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
@@ -237,45 +698,20 @@ class ResumeTemplates:
         contact_run.font.bold = True
         contact_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
         
-        if data.get('email'):
-            email_para = left_cell.add_paragraph()
-            email_run = email_para.add_run(data.get('email'))
-            email_run.font.size = Pt(9)
-            email_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
-        
-        if data.get('phone'):
-            phone_para = left_cell.add_paragraph()
-            phone_run = phone_para.add_run(data.get('phone'))
-            phone_run.font.size = Pt(9)
-            phone_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
+        for placeholder in ('{{email}}', '{{phone}}'):
+            item_run = left_cell.add_paragraph().add_run(placeholder)
+            item_run.font.size = Pt(9)
+            item_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
         
         # Social links in sidebar
-        if data.get('linkedin') or data.get('github') or data.get('portfolio'):
-            social_header = left_cell.add_paragraph()
-            social_header_run = social_header.add_run("\nLINKS\n")
-            social_header_run.font.bold = True
-            social_header_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
-            
-            if data.get('linkedin'):
-                linkedin_para = left_cell.add_paragraph()
-                linkedin_run = linkedin_para.add_run("LinkedIn")
-                linkedin_run.font.size = Pt(9)
-                linkedin_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
-                linkedin_run.font.underline = True
-            
-            if data.get('github'):
-                github_para = left_cell.add_paragraph()
-                github_run = github_para.add_run("GitHub")
-                github_run.font.size = Pt(9)
-                github_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
-                github_run.font.underline = True
-            
-            if data.get('portfolio'):
-                portfolio_para = left_cell.add_paragraph()
-                portfolio_run = portfolio_para.add_run("Portfolio")
-                portfolio_run.font.size = Pt(9)
-                portfolio_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
-                portfolio_run.font.underline = True
+        social_header_run = left_cell.add_paragraph().add_run('{{links_header}}')
+        social_header_run.font.bold = True
+        social_header_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
+        
+        link_run = left_cell.add_paragraph().add_run('{{sidebar_links}}')
+        link_run.font.size = Pt(9)
+        link_run.font.color.rgb = RGBColor(0xFF, 0xFF, 0xFF)
+        link_run.font.underline = True
         
         # Right column (main content)
         right_cell = main_table.cell(0, 1)
@@ -283,7 +719,7 @@ class ResumeTemplates:
         
         # Job title
         title_para = right_cell.add_paragraph()
-        title_run = title_para.add_run(data.get('job_title', ''))
+        title_run = title_para.add_run('{{job_title}}')
         title_run.font.size = Pt(14)
         title_run.font.bold = True
         title_run.font.color.rgb = RGBColor(0x2E, 0x86, 0xAB)
@@ -293,11 +729,11 @@ class ResumeTemplates:
         return doc
     
     @staticmethod
-    def create_minimal_template(doc, data, page_limit):
+    def create_minimal_template(doc):
         """Minimal Clean Template"""
         # Name
         name_para = doc.add_paragraph()
-        name_run = name_para.add_run(data.get('name', ''))
+        name_run = name_para.add_run('{{name}}')
         name_run.font.size = Pt(24)
         name_run.font.bold = True
         name_run.font.name = 'Calibri'
@@ -305,40 +741,16 @@ class ResumeTemplates:
         
         # Job title
         title_para = doc.add_paragraph()
-        title_run = title_para.add_run(data.get('job_title', ''))
+        title_run = title_para.add_run('{{job_title}}')
         title_run.font.size = Pt(12)
         title_run.font.color.rgb = RGBColor(0x60, 0x60, 0x60)
         title_para.space_after = Pt(12)
         
         # Contact info in one line
-        contact_para = doc.add_paragraph()
-        contact_items = []
-        
-        if data.get('email'):
-            contact_items.append(data.get('email'))
-        if data.get('phone'):
-            contact_items.append(data.get('phone'))
-        if data.get('location'):
-            contact_items.append(data.get('location'))
-        
-        contact_para.add_run(' • '.join(contact_items))
+        doc.add_paragraph().add_run('{{contact}}')
         
         # Social links
-        if data.get('linkedin') or data.get('github') or data.get('portfolio'):
-            social_para = doc.add_paragraph()
-            
-            if data.get('linkedin'):
-                add_hyperlink(social_para, "LinkedIn", data.get('linkedin'))
-                if data.get('github') or data.get('portfolio'):
-                    social_para.add_run(" • ")
-            
-            if data.get('github'):
-                add_hyperlink(social_para, "GitHub", data.get('github'))
-                if data.get('portfolio'):
-                    social_para.add_run(" • ")
-            
-            if data.get('portfolio'):
-                add_hyperlink(social_para, "Portfolio", data.get('portfolio'))
+        doc.add_paragraph().add_run('{{links}}')
         
         # Simple line separator
         separator = doc.add_paragraph()
@@ -365,6 +777,130 @@ class ResumeTemplates:
                     if border is not None:
                         tcBorders.remove(border)
 
+def _remove_paragraph(paragraph):
+    paragraph._p.getparent().remove(paragraph._p)
+
+def fill_template(doc, data, template_choice):
+    """Replace a compiled skeleton's placeholder runs with the request's data"""
+    style = ResumeTemplates.STYLES[template_choice]
+    contact = style['contact_separator'].join(
+        data.get(field) for field in ('email', 'phone', 'location') if data.get(field)
+    )
+    has_links = any(data.get(field) for field in ('linkedin', 'github', 'portfolio'))
+    
+    # Header placeholders live in body paragraphs and in header table cells
+    paragraphs = list(doc.paragraphs)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                paragraphs.extend(cell.paragraphs)
+    
+    for paragraph in paragraphs:
+        for run in paragraph.runs:
+            kind = ResumeTemplates.PLACEHOLDERS.get(run.text)
+            if kind is None:
+                continue
+            
+            if kind == 'text':
+                run.text = data.get(run.text[2:-2], '')
+            elif kind == 'contact':
+                if contact:
+                    run.text = contact
+                else:
+                    run._r.getparent().remove(run._r)
+            elif kind == 'optional':
+                value = data.get(run.text[2:-2])
+                if value:
+                    run.text = value
+                else:
+                    _remove_paragraph(paragraph)
+                    break
+            elif kind == 'links':
+                run._r.getparent().remove(run._r)
+                added = add_social_links(paragraph, data, style['link_separator'],
+                                         style.get('link_labels'), style.get('link_prefix', ''))
+                # A links-only body paragraph disappears when there is nothing to link
+                if not added and not paragraph.runs and paragraph._p.getparent() is doc.element.body:
+                    _remove_paragraph(paragraph)
+                    break
+            elif kind == 'links_header':
+                if has_links:
+                    run.text = "\nLINKS\n"
+                else:
+                    _remove_paragraph(paragraph)
+                    break
+            elif kind == 'sidebar_links':
+                # Clone the formatted placeholder paragraph once per link
+                for field, label in (('linkedin', 'LinkedIn'), ('github', 'GitHub'), ('portfolio', 'Portfolio')):
+                    if data.get(field):
+                        link_p = copy.deepcopy(paragraph._p)
+                        paragraph._p.addprevious(link_p)
+                        link_p.xpath('.//w:t')[0].text = label
+                _remove_paragraph(paragraph)
+                break
+    
+    return doc
+
+# Styles build_resume_document adds content in after cloning a skeleton
+SECTION_STYLES = ('Heading 2', 'List Bullet')
+
+class TemplateSkeletons:
+    """Compile each resume template once and hand out filled copies per request.
+    
+    A skeleton is a Document laid out with placeholders, page margins
+    included. Deep-copying it skips reading and parsing python-docx's default
+    template as well as the table building, shading, border removal and
+    per-run formatting of the layout itself.
+    """
+    
+    def __init__(self, templates):
+        self.templates = templates
+        self._compiled = {}
+        self._lock = threading.Lock()
+    
+    def compile(self, template_choice):
+        doc = Document()
+        self.templates[template_choice](doc)
+        
+        # Set page margins for better space utilization
+        for section in doc.sections:
+            section.top_margin = Inches(0.5)
+            section.bottom_margin = Inches(0.5)
+            section.left_margin = Inches(0.7)
+            section.right_margin = Inches(0.7)
+        
+        # Reload from bytes so the skeleton holds no cached views into its XML
+        # (e.g. the body proxy); deep copies of it then stay self-consistent.
+        # Compacting here also makes each deep copy cheaper
+        return Document(io.BytesIO(document_bytes(doc, keep_styles=SECTION_STYLES)))
+    
+    def compile_all(self):
+        for template_choice in self.templates:
+            self.skeleton(template_choice)
+    
+    def skeleton(self, template_choice):
+        skeleton = self._compiled.get(template_choice)
+        if skeleton is None:
+            with self._lock:
+                skeleton = self._compiled.get(template_choice)
+                if skeleton is None:
+                    skeleton = self._compiled[template_choice] = self.compile(template_choice)
+        return skeleton
+    
+    def new_document(self, template_choice, data):
+        """Return a new Document for template_choice filled with data"""
+        doc = copy.deepcopy(self.skeleton(template_choice))
+        return fill_template(doc, data, template_choice)
+
+RESUME_TEMPLATES = {
+    'modern': ResumeTemplates.create_modern_template,
+    'classic': ResumeTemplates.create_classic_template,
+    'creative': ResumeTemplates.create_creative_template,
+    'minimal': ResumeTemplates.create_minimal_template
+}
+
+template_skeletons = TemplateSkeletons(RESUME_TEMPLATES)
+
 def add_section_heading(doc, title, template_style="modern"):
     """Add a formatted section heading based on template style"""
     if template_style == "modern":
@@ -395,52 +931,76 @@ def add_section_heading(doc, title, template_style="modern"):
         para.space_after = Pt(6)
         return para
 
-def create_safe_filename(name, document_type, template):
-    """Create a safe filename from user input"""
+def safe_filename_prefix(name, document_type, template):
+    """The part of a create_safe_filename() name that comes before the timestamp"""
     safe_name = "".join(c for c in name if c.isalnum() or c in (' ', '-', '_')).rstrip()
     safe_name = safe_name.replace(' ', '_')
     if not safe_name:
         safe_name = "document"
     
+    return f"{document_type}_{safe_name}_{template}_"
+
+def create_safe_filename(name, document_type, template, extension='docx'):
+    """Create a safe filename from user input"""
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    return f"{document_type}_{safe_name}_{template}_{timestamp}.docx"
+    return f"{safe_filename_prefix(name, document_type, template)}{timestamp}.{extension}"
 
-@app.route('/')
-def index():
-    return render_template('index.html')
+def format_social_links(data):
+    """Format social links as a single line for the prompt"""
+    social_links = []
+    if data.get('linkedin'):
+        social_links.append(f"LinkedIn: {data.get('linkedin')}")
+    if data.get('github'):
+        social_links.append(f"GitHub: {data.get('github')}")
+    if data.get('portfolio'):
+        social_links.append(f"Portfolio: {data.get('portfolio')}")
+    
+    return " | ".join(social_links) if social_links else ""
 
-@app.route('/resume')
-def resume_form():
-    return render_template('resume_form.html')
+# System prompts: the instructions that are the same for every request. Ollama puts
+# the system prompt first in the model's input, so keeping it byte-for-byte static
+# lets the server reuse the already evaluated prefix and only evaluate the applicant's
+# details, which go in the (user) prompt. Anything per-request belongs in the prompt.
+RESUME_SYSTEM_PROMPT = """You are an expert resume writer. Create a professional, ATS-friendly resume from the applicant's information.
 
-@app.route('/cover-letter')
-def cover_letter_form():
-    return render_template('cover_letter_form.html')
+Requirements:
+1. Create well-structured sections appropriate for the content length
+2. Use professional language and action verbs
+3. Include quantifiable achievements
+4. Make it ATS-friendly
+5. Organize content logically
+6. Respect the page guidance given with the applicant's information
 
-@app.route('/generate-resume', methods=['POST'])
-def generate_resume():
-    try:
-        data = request.json
-        template_choice = data.get('template', 'modern')
-        page_limit = data.get('page_limit', 1)
-        
-        # Create social links text for prompt
-        social_links = []
-        if data.get('linkedin'):
-            social_links.append(f"LinkedIn: {data.get('linkedin')}")
-        if data.get('github'):
-            social_links.append(f"GitHub: {data.get('github')}")
-        if data.get('portfolio'):
-            social_links.append(f"Portfolio: {data.get('portfolio')}")
-        
-        social_links_text = " | ".join(social_links) if social_links else ""
-        
-        # Enhanced prompt with page limit consideration
-        page_instruction = f"Keep content concise for a {page_limit}-page resume." if page_limit == 1 else f"You can use up to {page_limit} pages for detailed content."
-        
-        prompt = f"""
-        Create a professional, ATS-friendly resume based on the following information. {page_instruction}
-        
+Structure with these sections:
+- Professional Summary (2-3 lines)
+- Core Skills (bullet points)
+- Professional Experience (reverse chronological)
+- Education
+- Additional sections if relevant (Certifications, Languages)"""
+
+RESUME_JSON_SYSTEM_PROMPT = f"{RESUME_SYSTEM_PROMPT}\n\n{JSON_INSTRUCTIONS}"
+
+SECTION_SYSTEM_PROMPT = """You are an expert resume writer. You write one section of a professional, ATS-friendly resume at a time.
+Write only the section you are asked for. Do not repeat the section heading, add other sections, or add any commentary."""
+
+COVER_LETTER_SYSTEM_PROMPT = """You are an expert career writer. Create a compelling, professional cover letter from the applicant and job information.
+Make it personalized and engaging, and highlight the experience most relevant to the position."""
+
+def page_instruction(page_limit, max_tokens=None):
+    if page_limit == 1:
+        instruction = f"Keep content concise for a {page_limit}-page resume."
+    else:
+        instruction = f"You can use up to {page_limit} pages for detailed content."
+    if max_tokens and config.page_fit:
+        instruction += f" Use at most about {page_fit.word_target(max_tokens)} words."
+    return instruction
+
+@stage('prompt')
+def build_resume_prompt(data, page_limit):
+    """Build the per-request part of the resume prompt (see RESUME_SYSTEM_PROMPT)"""
+    social_links_text = format_social_links(data)
+    
+    return f"""
         Personal Information:
         - Name: {data.get('name', '')}
         - Email: {data.get('email', '')}
@@ -460,119 +1020,252 @@ def generate_resume():
         Languages: {data.get('languages', '')}
         Career Objectives: {data.get('career_goals', '')}
         
-        Requirements:
-        1. Create well-structured sections appropriate for the content length
-        2. Use professional language and action verbs
-        3. Include quantifiable achievements
-        4. Make it ATS-friendly
-        5. Organize content logically
-        6. {page_instruction}
-        
-        Structure with these sections:
-        - Professional Summary (2-3 lines)
-        - Core Skills (bullet points)
-        - Professional Experience (reverse chronological)
-        - Education
-        - Additional sections if relevant (Certifications, Languages)
+        {page_instruction(page_limit, resume_max_tokens(data, page_limit))}
         """
-        
-        # Generate resume content
-        resume_content = llm.generate_text(prompt, max_tokens=1500 if page_limit == 1 else 2500)
-        
-        # Create document with selected template
-        doc = Document()
-        
-        # Apply template
-        template_functions = {
-            'modern': ResumeTemplates.create_modern_template,
-            'classic': ResumeTemplates.create_classic_template,
-            'creative': ResumeTemplates.create_creative_template,
-            'minimal': ResumeTemplates.create_minimal_template
-        }
-        
-        doc = template_functions[template_choice](doc, data, page_limit)
-        
-        # Add generated content with proper sections
-        sections = resume_content.split('\n\n')
-        current_template = template_choice
-        
-        for section in sections:
-            if section.strip():
-                # Check if it's a heading (contains common section words)
-                section_keywords = ['SUMMARY', 'EXPERIENCE', 'SKILLS', 'EDUCATION', 'CERTIFICATIONS', 'LANGUAGES']
-                is_heading = any(keyword in section.upper()[:30] for keyword in section_keywords)
-                
-                if is_heading:
-                    # Extract heading and content
-                    lines = section.split('\n')
-                    heading = lines[0].strip()
-                    content = '\n'.join(lines[1:]) if len(lines) > 1 else ""
-                    
-                    add_section_heading(doc, heading, current_template)
-                    
-                    if content:
-                        para = doc.add_paragraph()
-                        para.add_run(content)
-                else:
-                    para = doc.add_paragraph()
-                    para.add_run(section)
-        
-        # Set page margins for better space utilization
-        sections = doc.sections
-        for section in sections:
-            section.top_margin = Inches(0.5)
-            section.bottom_margin = Inches(0.5)
-            section.left_margin = Inches(0.7)
-            section.right_margin = Inches(0.7)
-        
-        # Save document
-        filename = create_safe_filename(data.get('name', 'user'), 'resume', template_choice)
-        output_dir = Path('generated_documents')
-        output_dir.mkdir(parents=True, exist_ok=True)
-        filepath = output_dir / filename
-        
-        doc.save(str(filepath))
-        
-        if not filepath.exists():
-            raise FileNotFoundError(f"Failed to create file: {filepath}")
-        
-        print(f"✅ Resume saved: {filepath.absolute()}")
-        
-        return jsonify({
-            'success': True,
-            'content': resume_content,
-            'download_url': f'/download/{filename}',
-            'filename': filename,
-            'template': template_choice,
-            'pages': page_limit
-        })
-        
-    except Exception as e:
-        print(f"❌ Error generating resume: {str(e)}")
-        return jsonify({
-            'success': False,
-            'error': f'Failed to generate resume: {str(e)}'
-        }), 500
 
-@app.route('/generate-cover-letter', methods=['POST'])
-def generate_cover_letter():
-    try:
-        data = request.json
-        
-        # Include social links in prompt
-        social_links = []
-        if data.get('linkedin'):
-            social_links.append(f"LinkedIn: {data.get('linkedin')}")
-        if data.get('github'):
-            social_links.append(f"GitHub: {data.get('github')}")
-        if data.get('portfolio'):
-            social_links.append(f"Portfolio: {data.get('portfolio')}")
-        
-        social_links_text = " | ".join(social_links) if social_links else ""
-        
+# Sections of a resume: heading, the field that must be filled in for the section
+# to be written (None = always), the form fields the section is written from,
+# instructions, and the most tokens it may use on 1 and 2 pages. With PAGE_FIT the
+# 1-page figures also weight how the page area is shared between sections.
+# In 'sections' mode each section is generated separately and only sees its own
+# fields, so editing one field only changes (and re-generates) the sections that
+# use it; the rest come from the LLM cache.
+RESUME_SECTIONS = [
+    ('PROFESSIONAL SUMMARY', None, ('job_title', 'experience_years', 'industry', 'professional_summary', 'career_goals'),
+     'Write a 2-3 line professional summary.', (150, 250)),
+    ('CORE SKILLS', 'skills', ('job_title', 'skills'),
+     'List the core skills as bullet points, one per line, each starting with "- ".', (200, 300)),
+    ('PROFESSIONAL EXPERIENCE', 'experience', ('job_title', 'industry', 'experience'),
+     'Describe the experience in reverse chronological order with action verbs and quantifiable achievements as "- " bullet points.', (700, 1200)),
+    ('EDUCATION', 'education', ('education',),
+     'List the education entries, one per line.', (150, 250)),
+    ('CERTIFICATIONS', 'certifications', ('certifications',),
+     'List the certifications, one per line.', (100, 200)),
+    ('LANGUAGES', 'languages', ('languages',),
+     'List the languages with proficiency levels, one per line.', (60, 100)),
+]
+
+def resume_section_budgets(data, page_limit, all_sections=False):
+    """num_predict for each section that will be written, from the page area of the tightest template.
+    
+    all_sections budgets every section, filled in or not, the way
+    RESUME_SYSTEM_PROMPT asks for them all.
+    """
+    sections = [(heading, budgets[0], budgets[0] if page_limit == 1 else budgets[1])
+                for heading, required, _, _, budgets in RESUME_SECTIONS
+                if all_sections or not required or data.get(required)]
+    if not config.page_fit:
+        return {heading: cap for heading, _, cap in sections}
+    # Not the chosen template's area: the prompt and num_predict must not depend on
+    # the template, or switching templates would miss the LLM cache. fit_to_page
+    # trims for the template afterwards
+    return page_fit.section_budgets(None, page_limit, sections)
+
+def resume_max_tokens(data, page_limit):
+    """Token budget for the whole resume, capped at MAX_TOKENS / MAX_TOKENS_TWO_PAGE"""
+    cap = config.resume_max_tokens(page_limit)
+    if not config.page_fit:
+        return cap
+    # The single prompt asks for every section whether or not its field was filled in,
+    # so size the budget and the prompt's word target for all of them; budgeting only
+    # the filled ones let the extra sections push real content off the page
+    budgets = resume_section_budgets(data, page_limit, all_sections=True)
+    return min(cap, sum(budgets.values()) + page_fit.HEADING_TOKENS * len(budgets))
+
+SECTION_FIELD_LABELS = {
+    'job_title': 'Target Position',
+    'experience_years': 'Years of Experience',
+    'industry': 'Industry',
+    'professional_summary': 'Professional Summary',
+    'career_goals': 'Career Objectives',
+    'experience': 'Professional Experience',
+    'skills': 'Skills',
+    'education': 'Education',
+    'certifications': 'Certifications',
+    'languages': 'Languages',
+}
+
+# 'single' sends one prompt for the whole resume; 'sections' generates each section concurrently;
+# 'json' asks for a typed resume object and parses it without guessing headings
+RESUME_GENERATION = config.resume_generation
+SECTION_CONCURRENCY = config.section_concurrency
+# Ollama's format field: the JSON schema, or plain 'json' for Ollama versions without structured outputs
+JSON_FORMAT = RESUME_SCHEMA if config.ollama_json_format == 'schema' else config.ollama_json_format
+
+json_parses = metrics.counter(
+    'resume_generator_json_parses_total', 'JSON-mode resume parses by result', ('result',)
+)
+
+def resume_generation_mode(data):
+    return data.get('generation', RESUME_GENERATION)
+
+def uses_section_generation(data):
+    return resume_generation_mode(data) == 'sections'
+
+def uses_json_generation(data):
+    return resume_generation_mode(data) == 'json'
+
+@stage('prompt')
+def build_section_prompts(data, page_limit):
+    """Build one (heading, prompt, max_tokens) per section that has input to write from (see SECTION_SYSTEM_PROMPT)"""
+    prompts = []
+    section_budgets = resume_section_budgets(data, page_limit)
+    for heading, required, fields, instructions, _ in RESUME_SECTIONS:
+        # Skip sections with nothing to write from rather than let the model invent them
+        if required and not data.get(required):
+            continue
+        
+        max_tokens = section_budgets[heading]
+        details = '\n'.join(f"{SECTION_FIELD_LABELS[field]}: {data.get(field, '')}" for field in fields)
         prompt = f"""
-        Create a compelling, professional cover letter based on the following information:
+        Write the {heading.title()} section. {instructions} {page_instruction(page_limit, max_tokens)}
         
+        {details}
+        """
+        prompts.append((heading, prompt, max_tokens))
+    return prompts
+
+def clean_section_text(heading, text):
+    """Drop the heading if the model repeated it despite being told not to"""
+    text = text.strip()
+    lines = text.split('\n', 1)
+    if lines[0].strip(' #*:').upper() == heading:
+        text = lines[1].strip() if len(lines) > 1 else ''
+    return text
+
+def generate_resume_sections(data, page_limit):
+    """Generate every section concurrently and yield them in resume order as they become ready"""
+    prompts = build_section_prompts(data, page_limit)
+    trace = current_trace()
+    
+    def generate(heading, prompt, max_tokens):
+        with attach_trace(trace):
+            text = llm.complete(prompt, max_tokens=max_tokens, model=data.get('model'), system=SECTION_SYSTEM_PROMPT,
+                                regenerate=data.get('regenerate', False))
+        return clean_section_text(heading, text)
+    
+    with ThreadPoolExecutor(max_workers=max(1, min(SECTION_CONCURRENCY, len(prompts)))) as executor:
+        futures = [(heading, executor.submit(generate, heading, prompt, max_tokens)) for heading, prompt, max_tokens in prompts]
+        try:
+            for heading, future in futures:
+                yield {'heading': heading, 'body': future.result()}
+        finally:
+            # Don't start sections nobody will read (an error, or a cancelled job)
+            for _, future in futures:
+                future.cancel()
+
+def format_resume_sections(sections):
+    """Join sections back into the plain-text resume format"""
+    return '\n\n'.join(f"{section['heading']}\n{section['body']}" for section in sections)
+
+def stream_resume_sections(data, page_limit, collected):
+    """Yield each generated section as one text chunk, in order, appending it to collected"""
+    for section in generate_resume_sections(data, page_limit):
+        separator = '\n\n' if collected else ''
+        collected.append(section)
+        yield f"{separator}{section['heading']}\n{section['body']}"
+
+def build_resume_json_prompt(data, page_limit):
+    """Build the per-request part of the JSON-mode prompt (see RESUME_JSON_SYSTEM_PROMPT)"""
+    return build_resume_prompt(data, page_limit)
+
+def json_max_tokens(data, page_limit):
+    # Keys, quotes and brackets cost tokens on top of the text itself
+    return int(resume_max_tokens(data, page_limit) * 1.2)
+
+@stage('parse')
+def parse_resume_output(text):
+    """Parse JSON-mode output into (content, sections), repairing it locally if needed"""
+    try:
+        sections, status = parse_resume_json(text)
+    except ValueError:
+        json_parses.inc(result='failed')
+        raise
+    if status == 'truncated':
+        print("Warning: Resume JSON was incomplete; dropped its unfinished end to parse it")
+    json_parses.inc(result=status)
+    return sections_to_text(sections), sections
+
+def generate_resume_json(data, page_limit):
+    """Generate the resume as JSON in one call; returns (content, sections)"""
+    prompt = build_resume_json_prompt(data, page_limit)
+    with stage('llm'):
+        text = llm.complete(prompt, max_tokens=json_max_tokens(data, page_limit), response_format=JSON_FORMAT,
+                            model=data.get('model'), system=RESUME_JSON_SYSTEM_PROMPT,
+                            regenerate=data.get('regenerate', False))
+    return parse_resume_output(text)
+
+def generate_resume_content(data, page_limit, raise_errors=False):
+    """Generate the resume text in the requested mode; returns (content, sections or None).
+    
+    Single-prompt mode returns Ollama errors as text, the way the form shows
+    them, unless raise_errors is set.
+    """
+    if uses_section_generation(data):
+        with stage('llm'):
+            sections = list(generate_resume_sections(data, page_limit))
+        return format_resume_sections(sections), sections
+    
+    if uses_json_generation(data):
+        return generate_resume_json(data, page_limit)
+    
+    prompt = build_resume_prompt(data, page_limit)
+    generate = llm.complete if raise_errors else llm.generate_text
+    with stage('llm'):
+        return generate(prompt, max_tokens=resume_max_tokens(data, page_limit), model=data.get('model'),
+                        system=RESUME_SYSTEM_PROMPT, regenerate=data.get('regenerate', False)), None
+
+SECTION_KEYWORDS = ('SUMMARY', 'EXPERIENCE', 'SKILLS', 'EDUCATION', 'CERTIFICATIONS', 'LANGUAGES')
+
+@stage('parse')
+def parse_resume_sections(resume_content):
+    """Split generated resume text into a list of {'heading', 'body'} sections"""
+    parsed = []
+    
+    for section in resume_content.split('\n\n'):
+        if section.strip():
+            # Check if it's a heading (contains common section words)
+            is_heading = any(keyword in section.upper()[:30] for keyword in SECTION_KEYWORDS)
+            
+            if is_heading:
+                # Extract heading and content
+                lines = section.split('\n')
+                parsed.append({
+                    'heading': lines[0].strip(),
+                    'body': '\n'.join(lines[1:]) if len(lines) > 1 else ""
+                })
+            else:
+                parsed.append({'heading': None, 'body': section})
+    
+    return parsed
+
+def build_resume_document(data, sections, template_choice, page_limit):
+    """Build the resume DOCX from parsed sections"""
+    # Clone the compiled template skeleton (styles, layout, margins) and fill it in
+    with stage('template'):
+        doc = template_skeletons.new_document(template_choice, data)
+    
+    # Add generated content with proper sections
+    with stage('sections'):
+        for section in sections:
+            if section['heading']:
+                add_section_heading(doc, section['heading'], template_choice)
+            
+            if section['body']:
+                para = doc.add_paragraph()
+                para.add_run(section['body'])
+            
+            for bullet in section.get('bullets') or []:
+                doc.add_paragraph(bullet, style='List Bullet')
+    
+    return doc
+
+@stage('prompt')
+def build_cover_letter_prompt(data):
+    """Build the cover letter generation prompt from form data"""
+    social_links_text = format_social_links(data)
+    
+    return f"""
         Applicant: {data.get('name', '')}
         Contact: {data.get('email', '')} | {data.get('phone', '')}
         Professional Links: {social_links_text}
@@ -583,89 +1276,568 @@ def generate_cover_letter():
         Experience: {data.get('experience', '')}
         Skills: {data.get('skills', '')}
         Interest: {data.get('interest', '')}
-        
-        Create a personalized, engaging cover letter that highlights relevant experience.
         """
-        
-        # Generate content
-        cover_letter_content = llm.generate_text(prompt, max_tokens=1200)
-        
-        # Create document
-        doc = Document()
-        
-        # Header
-        header = doc.add_paragraph()
-        header.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
-        header_run = header.add_run(f"{data.get('name', '')}\n")
-        header_run.font.bold = True
-        header_run.font.size = Pt(14)
-        
-        # Contact info
-        contact_info = []
-        if data.get('email'):
-            contact_info.append(data.get('email'))
-        if data.get('phone'):
-            contact_info.append(data.get('phone'))
-        
-        if contact_info:
-            header.add_run(" • ".join(contact_info) + "\n")
-        
-        # Social links with clickable hyperlinks
-        if social_links:
-            links_para = doc.add_paragraph()
+
+@stage('template')
+def build_cover_letter_document(data, cover_letter_content):
+    """Build the cover letter DOCX from generated content"""
+    doc = Document()
+    
+    # Header
+    header = doc.add_paragraph()
+    header.alignment = WD_PARAGRAPH_ALIGNMENT.LEFT
+    header_run = header.add_run(f"{data.get('name', '')}\n")
+    header_run.font.bold = True
+    header_run.font.size = Pt(14)
+    
+    # Contact info
+    contact_info = []
+    if data.get('email'):
+        contact_info.append(data.get('email'))
+    if data.get('phone'):
+        contact_info.append(data.get('phone'))
+    
+    if contact_info:
+        header.add_run(" • ".join(contact_info) + "\n")
+    
+    # Social links with clickable hyperlinks
+    if data.get('linkedin') or data.get('github') or data.get('portfolio'):
+        add_social_links(doc.add_paragraph(), data, " | ")
+    
+    # Date and recipient
+    date_para = doc.add_paragraph()
+    date_para.add_run(f"\n{datetime.now().strftime('%B %d, %Y')}\n\n")
+    
+    recipient = doc.add_paragraph()
+    recipient.add_run(f"Hiring Manager\n{data.get('company', '')}\n\n")
+    
+    subject = doc.add_paragraph()
+    subject_run = subject.add_run(f"Re: {data.get('position', '')} Position")
+    subject_run.font.bold = True
+    subject.add_run("\n\nDear Hiring Manager,\n")
+    
+    # Content
+    content_para = doc.add_paragraph()
+    content_para.add_run(cover_letter_content)
+    
+    # Closing
+    closing = doc.add_paragraph()
+    closing.add_run(f"\n\nBest regards,\n{data.get('name', '')}")
+    
+    return doc
+
+@stage('save')
+def store_document(content, filename):
+    """Keep rendered bytes in memory for download and, if enabled, also on disk"""
+    artifact_store.put(filename, content)
+    if PERSIST_DOCUMENTS:
+        storage.save(filename, content)
+
+OUTPUT_FORMATS = ('docx', 'pdf')
+
+def output_format_error(output_format):
+    """Return an error message if output_format can't be produced, else None"""
+    if output_format not in OUTPUT_FORMATS:
+        return f'Unsupported format: {output_format}'
+    if output_format == 'pdf' and not pdf_templates.PDF_AVAILABLE:
+        return 'PDF output requires reportlab (pip install reportlab)'
+    return None
+
+def resolve_output_format(data):
+    """Take the format from the JSON body or the query string; return an error message or None"""
+    data['format'] = data.get('format') or request.args.get('format', 'docx')
+    return output_format_error(data['format'])
+
+def resolve_template(data):
+    """Check the resume template before anything is generated; return an error message or None"""
+    template_choice = data.get('template', 'modern')
+    if template_choice not in RESUME_TEMPLATES:
+        return f"Unknown template: {template_choice}"
+    return None
+
+@stage('serialize')
+def document_bytes(doc, keep_styles=()):
+    """Serialize a document in memory, stripped of unused template parts unless DOCX_OPTIMIZE=false"""
+    if DOCX_OPTIMIZE:
+        docx_optimize.compact(doc, keep_styles)
+    return docx_optimize.write(doc, DOCX_COMPRESSION)
+
+def resume_bytes(data, sections, template_choice, page_limit, output_format='docx'):
+    """Build a resume document in output_format from parsed sections"""
+    if template_choice not in RESUME_TEMPLATES:
+        raise ValueError(f"Unknown template: {template_choice}")
+    
+    if output_format == 'pdf':
+        with stage('pdf'):
+            return pdf_templates.build_resume_pdf(data, sections, template_choice, page_limit)
+    return document_bytes(build_resume_document(data, sections, template_choice, page_limit))
+
+def cover_letter_bytes(data, cover_letter_content, output_format='docx'):
+    """Build a cover letter document in output_format"""
+    if output_format == 'pdf':
+        with stage('pdf'):
+            return pdf_templates.build_cover_letter_pdf(data, cover_letter_content)
+    return document_bytes(build_cover_letter_document(data, cover_letter_content))
+
+def render_resume(data, sections, template_choice, page_limit, output_format='docx'):
+    """Template and save a resume from parsed sections; no LLM involved"""
+    content = resume_bytes(data, sections, template_choice, page_limit, output_format)
+    filename = create_safe_filename(data.get('name', 'user'), 'resume', template_choice, output_format)
+    
+    store_document(content, filename)
+    
+    print(f"✅ Resume ready: {filename}")
+    
+    return filename, content
+
+def render_cover_letter(data, cover_letter_content, output_format='docx'):
+    """Build and save a cover letter from generated content; no LLM involved"""
+    content = cover_letter_bytes(data, cover_letter_content, output_format)
+    filename = create_safe_filename(data.get('name', 'user'), 'cover_letter', 'standard', output_format)
+    
+    store_document(content, filename)
+    
+    print(f"✅ Cover letter ready: {filename}")
+    
+    return filename, content
+
+# Set LAZY_DOCUMENTS=false to build every document as soon as its content is generated
+LAZY_DOCUMENTS = config.lazy_documents
+# Filename -> lock, so concurrent first downloads build a document once
+materializing = {}
+materializing_lock = threading.Lock()
+
+def lazy_filename(data, document_type, template_choice, content_id, output_format):
+    """Filename of a lazily built document; the content ID keeps records with the same name apart"""
+    return f"{safe_filename_prefix(data.get('name', 'user'), document_type, template_choice)}{content_id}.{output_format}"
+
+def lazy_download_url(filename, content_id, template_choice=None):
+    """Download URL for a document that /download builds from the content store on first use"""
+    query = {'content_id': content_id}
+    if template_choice:
+        query['template'] = template_choice
+    return f"/download/{filename}?{urlencode(query)}"
+
+def materialize_document(filename, content_id, template_choice=None):
+    """Build, store and return a lazily generated document; None if filename doesn't belong to content_id"""
+    record = content_store.load(content_id or '')
+    if record is None:
+        return None
+    output_format = filename.rsplit('.', 1)[-1]
+    if output_format_error(output_format):
+        return None
+    
+    data = record['data']
+    if record['type'] == 'resume':
+        template_choice = template_choice or data.get('template', 'modern')
+        if template_choice not in RESUME_TEMPLATES:
+            return None
+    else:
+        template_choice = 'standard'
+    # Only the name generation handed out for this record, so a record can't
+    # be stored under another document's filename
+    if filename != lazy_filename(data, record['type'], template_choice, content_id, output_format):
+        return None
+    
+    with materializing_lock:
+        lock = materializing.setdefault(filename, threading.Lock())
+    try:
+        with lock:
+            # Another request may have built it while this one waited
+            content = artifact_store.get(filename)
+            if content is None:
+                if record['type'] == 'resume':
+                    page_limit = int(record.get('page_limit') or 1)
+                    sections, _ = fit_to_page(record['sections'], template_choice, page_limit)
+                    content = resume_bytes(data, sections, template_choice, page_limit, output_format)
+                else:
+                    content = cover_letter_bytes(data, record['content'], output_format)
+                store_document(content, filename)
+                print(f"✅ Built on download: {filename}")
+            return content
+    finally:
+        with materializing_lock:
+            materializing.pop(filename, None)
+
+def safe_url(url):
+    """Only http(s) links go into preview HTML"""
+    return url if url and url.lower().startswith(('http://', 'https://')) else None
+
+def preview_context(data):
+    return {
+        'name': data.get('name', ''),
+        'contact': [data[field] for field in ('email', 'phone', 'location') if data.get(field)],
+        'linkedin': safe_url(data.get('linkedin')),
+        'github': safe_url(data.get('github')),
+        'portfolio': safe_url(data.get('portfolio')),
+    }
+
+@stage('preview')
+def resume_preview(data, sections, template_choice):
+    """HTML preview of a resume, rendered from templates/resume_template.html"""
+    preview = []
+    for section in sections:
+        lines = [line.strip() for line in (section.get('body') or '').split('\n') if line.strip()]
+        preview.append({
+            'heading': section.get('heading'),
+            'paragraphs': [line for line in lines if not line.startswith(page_fit.BULLET_MARKERS)],
+            'bullets': [line.lstrip('-•* ') for line in lines if line.startswith(page_fit.BULLET_MARKERS)]
+                       + list(section.get('bullets') or []),
+        })
+    template = app.jinja_env.get_template('resume_template.html')
+    return template.render(template_choice=template_choice, job_title=data.get('job_title', ''),
+                           sections=preview, **preview_context(data))
+
+@stage('preview')
+def cover_letter_preview(data, cover_letter_content):
+    """HTML preview of a cover letter, rendered from templates/cover_letter_template.html"""
+    paragraphs = [paragraph.strip() for paragraph in cover_letter_content.split('\n\n') if paragraph.strip()]
+    template = app.jinja_env.get_template('cover_letter_template.html')
+    return template.render(company=data.get('company', ''), position=data.get('position', ''),
+                           date=datetime.now().strftime('%B %d, %Y'), paragraphs=paragraphs,
+                           **preview_context(data))
+
+page_fits = metrics.counter(
+    'resume_generator_page_fit_total', 'Resumes checked against their page limit by result', ('result',)
+)
+
+@stage('fit')
+def fit_to_page(sections, template_choice, page_limit):
+    """Trim sections that would run past page_limit pages of template_choice; returns (sections, trimmed)"""
+    if not config.page_fit:
+        return sections, False
+    sections, trimmed = page_fit.fit_sections(sections, template_choice, page_limit)
+    page_fits.inc(result='trimmed' if trimmed else 'fit')
+    return sections, trimmed
+
+def finish_resume(data, resume_content, template_choice, page_limit, sections=None):
+    """Persist generated resume content, render it, and return the response payload"""
+    if sections is None:
+        sections = parse_resume_sections(resume_content)
+    sections, trimmed = fit_to_page(sections, template_choice, page_limit)
+    if trimmed:
+        # Store and show what the document actually contains
+        resume_content = sections_to_text(sections)
+    content_id = content_store.save('resume', data, resume_content, sections, page_limit=page_limit)
+    
+    output_format = data.get('format', 'docx')
+    if LAZY_DOCUMENTS:
+        if template_choice not in RESUME_TEMPLATES:
+            raise ValueError(f"Unknown template: {template_choice}")
+        # Built by /download the first time it is asked for
+        filename = lazy_filename(data, 'resume', template_choice, content_id, output_format)
+        download_url = lazy_download_url(filename, content_id, template_choice)
+    else:
+        filename, _ = render_resume(data, sections, template_choice, page_limit, output_format)
+        download_url = f'/download/{filename}'
+    
+    return {
+        'success': True,
+        'content': resume_content,
+        'content_id': content_id,
+        'preview_html': resume_preview(data, sections, template_choice),
+        'download_url': download_url,
+        'filename': filename,
+        'template': template_choice,
+        'format': output_format,
+        'pages': page_limit,
+        'trimmed': trimmed
+    }
+
+def finish_cover_letter(data, cover_letter_content):
+    """Persist generated cover letter content, render it, and return the response payload"""
+    content_id = content_store.save('cover_letter', data, cover_letter_content, [{'heading': None, 'body': cover_letter_content}])
+    
+    output_format = data.get('format', 'docx')
+    if LAZY_DOCUMENTS:
+        filename = lazy_filename(data, 'cover_letter', 'standard', content_id, output_format)
+        download_url = lazy_download_url(filename, content_id)
+    else:
+        filename, _ = render_cover_letter(data, cover_letter_content, output_format)
+        download_url = f'/download/{filename}'
+    
+    return {
+        'success': True,
+        'content': cover_letter_content,
+        'content_id': content_id,
+        'preview_html': cover_letter_preview(data, cover_letter_content),
+        'download_url': download_url,
+        'filename': filename,
+        'format': output_format
+    }
+
+def sse_event(event, payload):
+    """Format a Server-Sent Events message"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def with_trace(payload, trace_id=None):
+    """Attach the current trace to a response payload if the caller sent X-Trace-Id"""
+    if trace_id is None and has_request_context():
+        trace_id = request.headers.get('X-Trace-Id')
+    trace = current_trace()
+    if trace_id and trace is not None:
+        payload['trace'] = trace.to_dict()
+    return payload
+
+def stream_generation(text_chunks, finish, label):
+    """Stream LLM tokens as SSE, then build the document once the text is complete.
+    
+    text_chunks is called inside the response generator and returns the text iterator.
+    """
+    trace_id = request.headers.get('X-Trace-Id')
+    
+    def generate():
+        chunks = []
+        # The body is produced after the request hooks have run, so trace it here
+        begin_trace(trace_id)
+        try:
+            # Includes the time the client takes to read each token
+            with stage('llm'):
+                for token in text_chunks():
+                    chunks.append(token)
+                    yield sse_event('token', {'text': token})
             
-            if data.get('linkedin'):
-                add_hyperlink(links_para, "LinkedIn", data.get('linkedin'))
-                if data.get('github') or data.get('portfolio'):
-                    links_para.add_run(" | ")
+            yield sse_event('done', with_trace(finish(''.join(chunks)), trace_id))
+        except requests.exceptions.ConnectionError:
+            yield sse_event('error', {'error': "Connection failed: Is Ollama running? Start it with 'ollama serve'"})
+        except Exception as e:
+            print(f"❌ Error streaming {label}: {str(e)}")
+            yield sse_event('error', {'error': f'Failed to generate {label}: {str(e)}'})
+        finally:
+            end_trace()
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@stage('llm')
+def generate_with_cancellation(job, prompt, max_tokens, model=None, system=None, regenerate=False):
+    """Collect streamed text for a job, stopping Ollama early if the job is cancelled"""
+    chunks = []
+    for token in llm.stream_text(prompt, max_tokens=max_tokens, model=model, system=system, regenerate=regenerate):
+        # Raising here closes the stream, which makes Ollama stop generating
+        job.check_cancelled()
+        chunks.append(token)
+    job.check_cancelled()
+    return ''.join(chunks)
+
+def run_generation_job(job):
+    """Job queue handler: generate and render a resume or cover letter"""
+    data = dict(job.payload)
+    trace_id = data.pop('trace_id', None)
+    
+    with request_trace(trace_id or job.id):
+        if job.kind == 'resume':
+            template_choice = data.get('template', 'modern')
+            page_limit = data.get('page_limit', 1)
+            if uses_section_generation(data):
+                sections = []
+                with stage('llm'):
+                    for _ in stream_resume_sections(data, page_limit, sections):
+                        job.check_cancelled()
+                resume_content = format_resume_sections(sections)
+                return with_trace(finish_resume(data, resume_content, template_choice, page_limit, sections), trace_id)
             
-            if data.get('github'):
-                add_hyperlink(links_para, "GitHub", data.get('github'))
-                if data.get('portfolio'):
-                    links_para.add_run(" | ")
+            if uses_json_generation(data):
+                prompt = build_resume_json_prompt(data, page_limit)
+                with stage('llm'):
+                    text = llm.complete(prompt, max_tokens=json_max_tokens(data, page_limit), response_format=JSON_FORMAT,
+                                        model=data.get('model'), system=RESUME_JSON_SYSTEM_PROMPT,
+                                        regenerate=data.get('regenerate', False))
+                job.check_cancelled()
+                resume_content, sections = parse_resume_output(text)
+                return with_trace(finish_resume(data, resume_content, template_choice, page_limit, sections), trace_id)
             
-            if data.get('portfolio'):
-                add_hyperlink(links_para, "Portfolio", data.get('portfolio'))
+            prompt = build_resume_prompt(data, page_limit)
+            resume_content = generate_with_cancellation(job, prompt, resume_max_tokens(data, page_limit), data.get('model'),
+                                                        RESUME_SYSTEM_PROMPT, data.get('regenerate', False))
+            return with_trace(finish_resume(data, resume_content, template_choice, page_limit), trace_id)
+        
+        prompt = build_cover_letter_prompt(data)
+        cover_letter_content = generate_with_cancellation(job, prompt, config.cover_letter_max_tokens, data.get('model'),
+                                                          COVER_LETTER_SYSTEM_PROMPT, data.get('regenerate', False))
+        return with_trace(finish_cover_letter(data, cover_letter_content), trace_id)
+
+job_queue = JobQueue(
+    run_generation_job,
+    workers=config.job_workers,
+    max_depth=config.job_queue_limit
+)
+
+BATCH_CONCURRENCY = config.batch_concurrency
+# Shared by every batch, so batches running side by side don't multiply the load on Ollama
+batch_slots = threading.BoundedSemaphore(BATCH_CONCURRENCY)
+MAX_TRACKED_BATCHES = 20
+batches = {}
+batches_lock = threading.Lock()
+
+def generate_batch_record(index, record, templates):
+    """Generate one batch record once and render it into every requested template"""
+    data = dict(record)
+    name = data.get('name', 'user')
+    model_error = resolve_model(data) or resolve_page_limit(data)
+    if model_error:
+        raise ValueError(model_error)
+    
+    # Ollama errors raise, so the record lands in errors.txt instead of a document
+    if data.get('type', 'resume') == 'cover_letter':
+        with stage('llm'):
+            cover_letter_content = llm.complete(build_cover_letter_prompt(data), max_tokens=config.cover_letter_max_tokens,
+                                                model=data.get('model'), system=COVER_LETTER_SYSTEM_PROMPT,
+                                                regenerate=data.get('regenerate', False))
+        content_store.save('cover_letter', data, cover_letter_content, [{'heading': None, 'body': cover_letter_content}])
+        doc = build_cover_letter_document(data, cover_letter_content)
+        filename = f"{index:04d}_" + create_safe_filename(name, 'cover_letter', 'standard')
+        return {filename: document_bytes(doc)}
+    
+    page_limit = data['page_limit']
+    resume_content, sections = generate_resume_content(data, page_limit, raise_errors=True)
+    if sections is None:
+        sections = parse_resume_sections(resume_content)
+    content_store.save('resume', data, resume_content, sections, page_limit=page_limit)
+    
+    # The LLM runs once per record; each extra template is only a re-render
+    files = {}
+    for template_choice in templates:
+        fitted, _ = fit_to_page(sections, template_choice, page_limit)
+        doc = build_resume_document(data, fitted, template_choice, page_limit)
+        filename = f"{index:04d}_" + create_safe_filename(name, 'resume', template_choice)
+        files[filename] = document_bytes(doc)
+    return files
+
+metrics.gauge('resume_generator_job_queue_depth', 'Jobs waiting in the queue', job_queue.depth)
+metrics.gauge('resume_generator_ollama_up', 'Whether the last Ollama status poll succeeded',
+              lambda: int(ollama_monitor.snapshot()['ollama_status'] == 'running'))
+metrics.gauge('resume_generator_artifact_bytes', 'Bytes of rendered documents held in memory',
+              lambda: artifact_store.stats()['bytes'])
+
+@app.before_request
+def start_request_trace():
+    g.request_started = time.perf_counter()
+    begin_trace(request.headers.get('X-Trace-Id'))
+
+@app.after_request
+def record_request_metrics(response):
+    trace = end_trace()
+    endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_seconds.observe(time.perf_counter() - g.request_started,
+                            endpoint=endpoint, method=request.method, status=response.status_code)
+    if request.headers.get('X-Trace-Id') and trace is not None:
+        response.headers['X-Trace-Id'] = trace.id
+    return response
+
+@app.route('/')
+def index():
+    return render_template('index.html')
+
+@app.route('/resume')
+def resume_form():
+    return render_template('resume_form.html')
+
+@app.route('/cover-letter')
+def cover_letter_form():
+    return render_template('cover_letter_form.html')
+
+@app.route('/generate-resume', methods=['POST'])
+def generate_resume():
+    try:
+        data = request.json
+        template_choice = data.get('template', 'modern')
         
-        # Date and recipient
-        date_para = doc.add_paragraph()
-        date_para.add_run(f"\n{datetime.now().strftime('%B %d, %Y')}\n\n")
+        format_error = resolve_output_format(data) or resolve_template(data)
+        if format_error:
+            return jsonify({'success': False, 'error': format_error}), 400
         
-        recipient = doc.add_paragraph()
-        recipient.add_run(f"Hiring Manager\n{data.get('company', '')}\n\n")
+        model_error = resolve_model(data) or resolve_page_limit(data)
+        if model_error:
+            return jsonify({'success': False, 'error': model_error}), 400
+        page_limit = data['page_limit']
         
-        subject = doc.add_paragraph()
-        subject_run = subject.add_run(f"Re: {data.get('position', '')} Position")
-        subject_run.font.bold = True
-        subject.add_run("\n\nDear Hiring Manager,\n")
+        # Generate resume content
+        resume_content, sections = generate_resume_content(data, page_limit)
         
-        # Content
-        content_para = doc.add_paragraph()
-        content_para.add_run(cover_letter_content)
+        return jsonify(with_trace(finish_resume(data, resume_content, template_choice, page_limit, sections)))
         
-        # Closing
-        closing = doc.add_paragraph()
-        closing.add_run(f"\n\nBest regards,\n{data.get('name', '')}")
+    except Exception as e:
+        print(f"❌ Error generating resume: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Failed to generate resume: {str(e)}'
+        }), 500
+
+@app.route('/generate-resume/stream', methods=['POST'])
+def generate_resume_stream():
+    """Stream resume tokens as they are generated (Server-Sent Events)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Invalid JSON body'}), 400
+    template_choice = data.get('template', 'modern')
+    
+    format_error = resolve_output_format(data) or resolve_template(data)
+    if format_error:
+        return jsonify({'success': False, 'error': format_error}), 400
+    
+    model_error = resolve_model(data) or resolve_page_limit(data)
+    if model_error:
+        return jsonify({'success': False, 'error': model_error}), 400
+    page_limit = data['page_limit']
+    
+    if uses_section_generation(data):
+        sections = []
+        return stream_generation(
+            lambda: stream_resume_sections(data, page_limit, sections),
+            lambda content: finish_resume(data, content, template_choice, page_limit, sections),
+            'resume'
+        )
+    
+    if uses_json_generation(data):
+        # Half a JSON object is no use to the preview; send the parsed text as one chunk
+        parsed = {}
+        
+        def json_chunks():
+            prompt = build_resume_json_prompt(data, page_limit)
+            text = llm.complete(prompt, max_tokens=json_max_tokens(data, page_limit), response_format=JSON_FORMAT,
+                                model=data.get('model'), system=RESUME_JSON_SYSTEM_PROMPT,
+                                regenerate=data.get('regenerate', False))
+            parsed['content'], parsed['sections'] = parse_resume_output(text)
+            yield parsed['content']
+        
+        return stream_generation(
+            json_chunks,
+            lambda content: finish_resume(data, content, template_choice, page_limit, parsed['sections']),
+            'resume'
+        )
+    
+    prompt = build_resume_prompt(data, page_limit)
+    
+    return stream_generation(
+        lambda: llm.stream_text(prompt, max_tokens=resume_max_tokens(data, page_limit), model=data.get('model'),
+                                system=RESUME_SYSTEM_PROMPT, regenerate=data.get('regenerate', False)),
+        lambda content: finish_resume(data, content, template_choice, page_limit),
+        'resume'
+    )
+
+@app.route('/generate-cover-letter', methods=['POST'])
+def generate_cover_letter():
+    try:
+        data = request.json
         
-        # Save document
-        filename = create_safe_filename(data.get('name', 'user'), 'cover_letter', 'standard')
-        output_dir = Path('generated_documents')
-        output_dir.mkdir(parents=True, exist_ok=True)
-        filepath = output_dir / filename
+        format_error = resolve_output_format(data)
+        if format_error:
+            return jsonify({'success': False, 'error': format_error}), 400
         
-        doc.save(str(filepath))
+        model_error = resolve_model(data)
+        if model_error:
+            return jsonify({'success': False, 'error': model_error}), 400
         
-        if not filepath.exists():
-            raise FileNotFoundError(f"Failed to create file: {filepath}")
+        prompt = build_cover_letter_prompt(data)
         
-        print(f"✅ Cover letter saved: {filepath.absolute()}")
+        # Generate content
+        with stage('llm'):
+            cover_letter_content = llm.generate_text(prompt, max_tokens=config.cover_letter_max_tokens, model=data.get('model'),
+                                                     system=COVER_LETTER_SYSTEM_PROMPT,
+                                                     regenerate=data.get('regenerate', False))
         
-        return jsonify({
-            'success': True,
-            'content': cover_letter_content,
-            'download_url': f'/download/{filename}',
-            'filename': filename
-        })
+        return jsonify(with_trace(finish_cover_letter(data, cover_letter_content)))
         
     except Exception as e:
         print(f"❌ Error generating cover letter: {str(e)}")
@@ -674,39 +1846,359 @@ def generate_cover_letter():
             'error': f'Failed to generate cover letter: {str(e)}'
         }), 500
 
+@app.route('/generate-cover-letter/stream', methods=['POST'])
+def generate_cover_letter_stream():
+    """Stream cover letter tokens as they are generated (Server-Sent Events)"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Invalid JSON body'}), 400
+    
+    format_error = resolve_output_format(data)
+    if format_error:
+        return jsonify({'success': False, 'error': format_error}), 400
+    
+    model_error = resolve_model(data)
+    if model_error:
+        return jsonify({'success': False, 'error': model_error}), 400
+    
+    prompt = build_cover_letter_prompt(data)
+    
+    return stream_generation(
+        lambda: llm.stream_text(prompt, max_tokens=config.cover_letter_max_tokens, model=data.get('model'),
+                                system=COVER_LETTER_SYSTEM_PROMPT, regenerate=data.get('regenerate', False)),
+        lambda content: finish_cover_letter(data, content),
+        'cover letter'
+    )
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queue a generation job and return its ID immediately"""
+    data = request.json or {}
+    job_type = data.pop('type', 'resume')
+    if job_type not in ('resume', 'cover_letter'):
+        return jsonify({'success': False, 'error': f'Unknown job type: {job_type}'}), 400
+    
+    format_error = resolve_output_format(data) or (resolve_template(data) if job_type == 'resume' else None)
+    if format_error:
+        return jsonify({'success': False, 'error': format_error}), 400
+    
+    model_error = resolve_model(data) or (resolve_page_limit(data) if job_type == 'resume' else None)
+    if model_error:
+        return jsonify({'success': False, 'error': model_error}), 400
+    
+    if request.headers.get('X-Trace-Id'):
+        data['trace_id'] = request.headers['X-Trace-Id']
+    
+    try:
+        priority = int(data.pop('priority', 0))
+        job = job_queue.submit(job_type, data, priority=priority)
+    except QueueFullError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e),
+            'queue_depth': e.depth
+        }), 429, {'Retry-After': '30'}
+    except ValueError:
+        return jsonify({'success': False, 'error': 'priority must be an integer'}), 400
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status_url': f'/jobs/{job.id}',
+        'result_url': f'/jobs/{job.id}/result',
+        'queue_depth': job_queue.depth()
+    }), 202
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f'Unknown job: {job_id}'}), 404
+    
+    status = job.to_dict()
+    status['queue_depth'] = job_queue.depth()
+    return jsonify(status)
+
+@app.route('/jobs/<job_id>', methods=['DELETE'])
+def cancel_job(job_id):
+    job = job_queue.cancel(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f'Unknown job: {job_id}'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': f'Unknown job: {job_id}'}), 404
+    
+    if job.status == 'done':
+        return jsonify(job.result)
+    if job.status == 'failed':
+        return jsonify({'success': False, 'error': job.error}), 500
+    if job.status == 'cancelled':
+        return jsonify({'success': False, 'error': 'Job was cancelled'}), 410
+    return jsonify(job.to_dict()), 202
+
+@app.route('/batch', methods=['POST'])
+def submit_batch():
+    """Start a batch from an uploaded JSONL/CSV file or a JSON body of records"""
+    try:
+        if request.files.get('file'):
+            upload = request.files['file']
+            records = parse_records(upload.read().decode('utf-8'), upload.filename or '')
+            templates = request.form.get('templates', 'modern')
+            concurrency = request.form.get('concurrency')
+        else:
+            body = request.get_json(silent=True)
+            if not isinstance(body, dict):
+                raise ValueError('expected a JSON object with "records"')
+            records = check_records(body.get('records', []))
+            templates = body.get('templates', 'modern')
+            concurrency = body.get('concurrency')
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'Invalid batch input: {str(e)}'}), 400
+    
+    if isinstance(templates, str):
+        templates = [t.strip() for t in templates.split(',') if t.strip()]
+    if not isinstance(templates, list) or not all(isinstance(t, str) for t in templates):
+        return jsonify({'success': False, 'error': 'templates must be a list or comma-separated string of names'}), 400
+    unknown = [t for t in templates if t not in RESUME_TEMPLATES]
+    if unknown:
+        return jsonify({'success': False, 'error': f"Unknown template(s): {', '.join(unknown)}"}), 400
+    if not records:
+        return jsonify({'success': False, 'error': 'No records supplied'}), 400
+    
+    try:
+        concurrency = BATCH_CONCURRENCY if concurrency in (None, '') else int(concurrency)
+    except (TypeError, ValueError):
+        concurrency = 0
+    if concurrency < 1:
+        return jsonify({'success': False, 'error': 'concurrency must be a positive integer'}), 400
+    concurrency = min(concurrency, BATCH_CONCURRENCY)
+    batch = BatchRun(len(records), templates)
+    
+    with batches_lock:
+        batches[batch.id] = batch
+        # Forget the oldest finished batches
+        finished = [b for b in batches.values() if b.status != 'running']
+        for old in sorted(finished, key=lambda b: b.created)[:max(0, len(batches) - MAX_TRACKED_BATCHES)]:
+            del batches[old.id]
+    
+    threading.Thread(
+        target=run_batch,
+        args=(batch, records, generate_batch_record, concurrency, batch_slots),
+        name=f"batch-{batch.id[:8]}",
+        daemon=True
+    ).start()
+    
+    return jsonify({
+        'success': True,
+        'batch_id': batch.id,
+        'total': batch.total,
+        'status_url': f'/batch/{batch.id}',
+        'events_url': f'/batch/{batch.id}/events',
+        'download_url': f'/batch/{batch.id}/download'
+    }), 202
+
+@app.route('/batch/<batch_id>')
+def batch_status(batch_id):
+    batch = batches.get(batch_id)
+    if batch is None:
+        return jsonify({'success': False, 'error': f'Unknown batch: {batch_id}'}), 404
+    return jsonify(batch.to_dict())
+
+@app.route('/batch/<batch_id>/events')
+def batch_events(batch_id):
+    """Stream per-record progress as Server-Sent Events"""
+    batch = batches.get(batch_id)
+    if batch is None:
+        return jsonify({'success': False, 'error': f'Unknown batch: {batch_id}'}), 404
+    
+    def generate():
+        seen = 0
+        while True:
+            events = batch.wait_for_events(seen)
+            seen += len(events)
+            for event in events:
+                yield sse_event('record' if 'record' in event else 'done', event)
+            if batch.status != 'running' and seen >= len(batch.events):
+                return
+            if not events:
+                # Keep idle connections open through proxies
+                yield ': keep-alive\n\n'
+    
+    return Response(stream_with_context(generate()), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/batch/<batch_id>/download')
+def batch_download(batch_id):
+    batch = batches.get(batch_id)
+    if batch is None:
+        return jsonify({'success': False, 'error': f'Unknown batch: {batch_id}'}), 404
+    if batch.status == 'running':
+        return jsonify({'success': False, 'error': 'Batch is still running', **batch.to_dict()}), 409
+    if batch.status == 'failed':
+        return jsonify({'success': False, 'error': batch.error}), 500
+    
+    return send_file(io.BytesIO(batch.zip_bytes), mimetype='application/zip',
+                     as_attachment=True, download_name=f'batch_{batch.id[:8]}.zip')
+
+@app.route('/render/<content_id>')
+def render_content(content_id):
+    """Re-render previously generated content with another template, without the LLM"""
+    try:
+        record = content_store.load(content_id)
+        if record is None:
+            return jsonify({'success': False, 'error': f'Unknown content ID: {content_id}'}), 404
+        
+        output_format = request.args.get('format', 'docx')
+        format_error = output_format_error(output_format)
+        if format_error:
+            return jsonify({'success': False, 'error': format_error}), 400
+        
+        if record['type'] == 'resume':
+            template_choice = request.args.get('template', record['data'].get('template', 'modern'))
+            if template_choice not in RESUME_TEMPLATES:
+                return jsonify({'success': False, 'error': f'Unknown template: {template_choice}'}), 400
+            page_limit = int(record.get('page_limit') or 1)
+            # Content fitted to one template may not fit another
+            sections, _ = fit_to_page(record['sections'], template_choice, page_limit)
+            filename, content = render_resume(record['data'], sections, template_choice, page_limit, output_format)
+        else:
+            filename, content = render_cover_letter(record['data'], record['content'], output_format)
+        
+        return send_file(io.BytesIO(content), as_attachment=True, download_name=filename)
+        
+    except Exception as e:
+        print(f"❌ Error rendering content: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Failed to render document: {str(e)}'
+        }), 500
+
 @app.route('/download/<filename>')
 def download_file(filename):
     try:
         safe_filename = os.path.basename(filename)
-        filepath = Path('generated_documents') / safe_filename
         
-        if not filepath.exists():
-            return f"File not found: {safe_filename}", 404
+        # Recently rendered documents are served straight from memory
+        content = artifact_store.get(safe_filename)
+        if content is not None:
+            return send_file(io.BytesIO(content), as_attachment=True, download_name=safe_filename)
+        
+        filepath = storage.lookup(safe_filename)
+        
+        if filepath is None:
+            # Generation only hands out the URL; the document is built on its first download
+            content = materialize_document(safe_filename, request.args.get('content_id'), request.args.get('template'))
+            if content is None:
+                return f"File not found: {safe_filename}", 404
+            return send_file(io.BytesIO(content), as_attachment=True, download_name=safe_filename)
         
         return send_file(str(filepath.absolute()), as_attachment=True)
         
     except Exception as e:
         return f"Error serving file: {str(e)}", 500
 
-@app.route('/health')
-def health_check():
-    """Check if Ollama is running and model is available"""
+@app.route('/score', methods=['POST'])
+def score_keywords():
+    """Match form or generated text against the job description's keywords; no LLM involved"""
     try:
-        response = requests.get("http://localhost:11434/api/tags", timeout=5)
-        if response.status_code == 200:
-            models = response.json().get('models', [])
-            return jsonify({
-                'ollama_status': 'running',
-                'available_models': [model['name'] for model in models]
-            })
-        else:
-            return jsonify({'ollama_status': 'error', 'message': 'Ollama not responding'})
+        data = request.get_json(silent=True)
+        if not isinstance(data, dict):
+            return jsonify({'success': False, 'error': 'Invalid JSON body'}), 400
+        
+        def text(value):
+            return value[:MAX_SCORE_CHARS] if isinstance(value, str) else ''
+        
+        content = text(data.get('content')) or '\n'.join(text(data.get(field)) for field in SCORED_FIELDS)
+        result = get_ats_scorer().score(content, text(data.get('job_description')), text(data.get('industry')))
+        return jsonify({'success': True, **result})
+        
     except Exception as e:
-        return jsonify({'ollama_status': 'offline', 'error': str(e)})
+        print(f"❌ Error scoring keywords: {str(e)}")
+        return jsonify({
+            'success': False,
+            'error': f'Failed to score keywords: {str(e)}'
+        }), 500
+
+@app.route('/admin/storage')
+def storage_status():
+    """Counts and bytes held in generated_documents and generated_content"""
+    return jsonify({**storage.stats(), 'content': content_store.storage.stats()})
+
+@app.route('/admin/storage/sweep', methods=['POST'])
+def storage_sweep():
+    """Apply the retention limits now instead of waiting for the sweeper"""
+    removed = storage.sweep()
+    content_removed = content_store.storage.sweep()
+    return jsonify({
+        'removed': removed,
+        **storage.stats(),
+        'content': {'removed': content_removed, **content_store.storage.stats()}
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Prometheus scrape endpoint"""
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/health')
+def health_check():
+    """Report the cached Ollama status; ?refresh=1 re-checks if the cache is a few seconds old"""
+    if request.args.get('refresh'):
+        status = ollama_monitor.request_refresh()
+    else:
+        status = ollama_monitor.snapshot()
+    
+    status['config'] = config.summary()
+    status['backends'] = llm.stats()
+    status['warmup'] = model_warmer.stats()
+    status['cache'] = llm.cache.stats() if llm.cache else None
+    status['artifacts'] = artifact_store.stats()
+    return jsonify(status)
+
+@app.route('/health/live')
+def liveness_check():
+    """The process is up and serving requests"""
+    return jsonify({'status': 'alive'})
+
+@app.route('/health/ready')
+def readiness_check():
+    """Ollama answered recently and the configured model is pulled"""
+    ready, reason = ollama_monitor.readiness()
+    status = ollama_monitor.snapshot()
+    return jsonify({
+        'ready': ready,
+        'reason': reason,
+        'model': status['model'],
+        'ollama_status': status['ollama_status'],
+        'age_seconds': status['age_seconds']
+    }), 200 if ready else 503
+
+def start_background_services():
+    """Start the Ollama status poller and model warm-up in this process"""
+    ollama_monitor.start()
+    model_warmer.start()
+
+def create_app(start_background=True):
+    """Do the startup work that importing this module skips and return the app.
+    
+    Creates the output directories and compiles the template skeletons.
+    Pass start_background=False when the process is about to fork (the
+    threads would not survive it) and call start_background_services() in
+    each child instead.
+    """
+    ensure_directories()
+    template_skeletons.compile_all()
+    if start_background:
+        start_background_services()
+    return app
 
 if __name__ == '__main__':
     print("🚀 Starting AI Resume & Cover Letter Generator...")
     print("📋 Make sure Ollama is running: ollama serve")
-    print("🌐 Application will be available at: http://localhost:5000")
+    print(f"🌐 Application will be available at: http://{config.host}:{config.port}")
     print("❤️  Your data stays completely private on your machine!")
-    app.run(debug=True, host='localhost', port=5000)
+    create_app().run(debug=config.debug, host=config.host, port=config.port)
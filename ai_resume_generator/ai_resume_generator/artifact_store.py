@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class ArtifactStore:
+    """Bounded in-memory store for rendered documents.
+
+    Documents are kept as bytes under their filename until they expire or
+    until the store exceeds its byte budget, in which case the least
+    recently used ones are dropped first.
+    """
+
+    def __init__(self, max_bytes=256 * 1024 * 1024, ttl_seconds=3600):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, name, content):
+        with self._lock:
+            self._discard(name)
+            self._items[name] = (content, time.time() + self.ttl_seconds)
+            self._bytes += len(content)
+            self._evict()
+
+    def get(self, name):
+        """Return the stored bytes, or None if missing or expired"""
+        with self._lock:
+            item = self._items.get(name)
+            if item is None:
+                return None
+            content, expires = item
+            if expires < time.time():
+                self._discard(name)
+                return None
+            self._items.move_to_end(name)
+            return content
+
+    def stats(self):
+        with self._lock:
+            return {
+                'items': len(self._items),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'ttl_seconds': self.ttl_seconds,
+            }
+
+    def _discard(self, name):
+        item = self._items.pop(name, None)
+        if item is not None:
+            self._bytes -= len(item[0])
+
+    def _evict(self):
+        now = time.time()
+        for name in [n for n, (_, expires) in self._items.items() if expires < now]:
+            self._discard(name)
+        while self._bytes > self.max_bytes and self._items:
+            name, (content, _) = self._items.popitem(last=False)
+            self._bytes -= len(content)
@@ -0,0 +1,288 @@
+"""ASGI entry point with non-blocking generation endpoints.
+
+    python serve.py --server uvicorn
+    uvicorn asgi:application --port 5000
+
+/generate-resume, /generate-cover-letter and their /stream variants run as
+coroutines on the event loop: while a request waits on Ollama it holds an
+open socket and a coroutine, not a thread, so hundreds of slow generations
+can be in flight at once. Building and rendering the document (python-docx,
+reportlab) runs on a pool of RENDER_THREADS threads so it never blocks the
+loop. Every other route is served by the Flask app through asgiref's
+WsgiToAsgi adapter.
+
+Requires httpx, asgiref and an ASGI server such as uvicorn. Per-request
+traces (X-Trace-Id) are only collected on the Flask routes.
+"""
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+import requests
+from asgiref.wsgi import WsgiToAsgi
+
+import app as resume_app
+from app import config, llm, request_seconds, sse_event, stage
+
+render_pool = ThreadPoolExecutor(max_workers=config.render_threads, thread_name_prefix='render')
+flask_application = WsgiToAsgi(resume_app.app)
+
+CONNECTION_FAILED = "Connection failed: Is Ollama running? Start it with 'ollama serve'"
+
+
+async def in_render_pool(func, *args):
+    """Run CPU-bound document work off the event loop"""
+    return await asyncio.get_running_loop().run_in_executor(render_pool, func, *args)
+
+
+class BadRequest(Exception):
+    pass
+
+
+async def read_json(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            break
+    try:
+        data = json.loads(body or b'{}')
+    except ValueError:
+        raise BadRequest('Invalid JSON body')
+    if not isinstance(data, dict):
+        raise BadRequest('Expected a JSON object')
+    return data
+
+
+def validate(data, query, path):
+    """The checks the Flask routes make; returns an error message or None"""
+    data['format'] = data.get('format') or query.get('format', ['docx'])[0]
+    error = resume_app.output_format_error(data['format']) or resume_app.resolve_model(data)
+    if error is None and path.startswith('/generate-resume'):
+        error = resume_app.resolve_page_limit(data) or resume_app.resolve_template(data)
+    return error
+
+
+async def send_json(send, payload, status=200):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+    return status
+
+
+# Generation
+
+async def generate_sections(data, page_limit):
+    """Yield each section in resume order; all of them are generated concurrently"""
+    semaphore = asyncio.Semaphore(max(1, resume_app.SECTION_CONCURRENCY))
+
+    async def generate(heading, prompt, max_tokens):
+        async with semaphore:
+            text = await llm.acomplete(prompt, max_tokens=max_tokens, model=data.get('model'),
+                                       system=resume_app.SECTION_SYSTEM_PROMPT,
+                                       regenerate=data.get('regenerate', False))
+        return {'heading': heading, 'body': resume_app.clean_section_text(heading, text)}
+
+    tasks = [asyncio.ensure_future(generate(*prompt)) for prompt in resume_app.build_section_prompts(data, page_limit)]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def generate_json(data, page_limit):
+    prompt = resume_app.build_resume_json_prompt(data, page_limit)
+    text = await llm.acomplete(prompt, max_tokens=resume_app.json_max_tokens(data, page_limit),
+                               response_format=resume_app.JSON_FORMAT, model=data.get('model'),
+                               system=resume_app.RESUME_JSON_SYSTEM_PROMPT, regenerate=data.get('regenerate', False))
+    return resume_app.parse_resume_output(text)
+
+
+async def resume_chunks(data, page_limit, collected):
+    """Yield resume text chunks in the requested mode; sections (when known) go into collected"""
+    if resume_app.uses_section_generation(data):
+        async for section in generate_sections(data, page_limit):
+            separator = '\n\n' if collected else ''
+            collected.append(section)
+            yield f"{separator}{section['heading']}\n{section['body']}"
+    elif resume_app.uses_json_generation(data):
+        content, sections = await generate_json(data, page_limit)
+        collected.extend(sections)
+        yield content
+    else:
+        prompt = resume_app.build_resume_prompt(data, page_limit)
+        async for chunk in llm.astream_text(prompt, max_tokens=resume_app.resume_max_tokens(data, page_limit),
+                                            model=data.get('model'), system=resume_app.RESUME_SYSTEM_PROMPT,
+                                            regenerate=data.get('regenerate', False)):
+            yield chunk
+
+
+async def generate_resume_content(data, page_limit):
+    """Async app.generate_resume_content; returns (content, sections or None)"""
+    if resume_app.uses_section_generation(data):
+        sections = [section async for section in generate_sections(data, page_limit)]
+        return resume_app.format_resume_sections(sections), sections
+    if resume_app.uses_json_generation(data):
+        return await generate_json(data, page_limit)
+    prompt = resume_app.build_resume_prompt(data, page_limit)
+    content = await llm.agenerate_text(prompt, max_tokens=resume_app.resume_max_tokens(data, page_limit),
+                                       model=data.get('model'), system=resume_app.RESUME_SYSTEM_PROMPT,
+                                       regenerate=data.get('regenerate', False))
+    return content, None
+
+
+# Routes
+
+async def generate_resume(data, send):
+    try:
+        template_choice = data.get('template', 'modern')
+        page_limit = data['page_limit']
+        with stage('llm'):
+            content, sections = await generate_resume_content(data, page_limit)
+        payload = await in_render_pool(resume_app.finish_resume, data, content, template_choice, page_limit, sections)
+        return await send_json(send, payload)
+    except Exception as e:
+        print(f"❌ Error generating resume: {str(e)}")
+        return await send_json(send, {'success': False, 'error': f'Failed to generate resume: {str(e)}'}, 500)
+
+
+async def generate_cover_letter(data, send):
+    try:
+        prompt = resume_app.build_cover_letter_prompt(data)
+        with stage('llm'):
+            content = await llm.agenerate_text(prompt, max_tokens=config.cover_letter_max_tokens, model=data.get('model'),
+                                               system=resume_app.COVER_LETTER_SYSTEM_PROMPT,
+                                               regenerate=data.get('regenerate', False))
+        payload = await in_render_pool(resume_app.finish_cover_letter, data, content)
+        return await send_json(send, payload)
+    except Exception as e:
+        print(f"❌ Error generating cover letter: {str(e)}")
+        return await send_json(send, {'success': False, 'error': f'Failed to generate cover letter: {str(e)}'}, 500)
+
+
+async def stream_generation(send, receive, text_chunks, finish, label):
+    """Stream tokens as SSE, then build the document; stops generating if the client disconnects"""
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                    (b'x-accel-buffering', b'no')],
+    })
+
+    async def produce():
+        chunks = []
+        try:
+            with stage('llm'):
+                async for token in text_chunks:
+                    chunks.append(token)
+                    await send({'type': 'http.response.body', 'body': sse_event('token', {'text': token}).encode(),
+                                'more_body': True})
+            event = sse_event('done', await in_render_pool(finish, ''.join(chunks)))
+        except requests.exceptions.ConnectionError:
+            event = sse_event('error', {'error': CONNECTION_FAILED})
+        except Exception as e:
+            print(f"❌ Error streaming {label}: {str(e)}")
+            event = sse_event('error', {'error': f'Failed to generate {label}: {str(e)}'})
+        await send({'type': 'http.response.body', 'body': event.encode()})
+
+    async def watch_disconnect(task):
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                # Cancelling closes the Ollama stream, which makes it stop generating
+                task.cancel()
+                return
+
+    task = asyncio.ensure_future(produce())
+    watcher = asyncio.ensure_future(watch_disconnect(task))
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    finally:
+        watcher.cancel()
+    return 200
+
+
+async def generate_resume_stream(data, send, receive):
+    template_choice = data.get('template', 'modern')
+    page_limit = data['page_limit']
+    sections = []
+
+    def finish(content):
+        return resume_app.finish_resume(data, content, template_choice, page_limit, sections or None)
+
+    return await stream_generation(send, receive, resume_chunks(data, page_limit, sections), finish, 'resume')
+
+
+async def generate_cover_letter_stream(data, send, receive):
+    prompt = resume_app.build_cover_letter_prompt(data)
+    chunks = llm.astream_text(prompt, max_tokens=config.cover_letter_max_tokens, model=data.get('model'),
+                              system=resume_app.COVER_LETTER_SYSTEM_PROMPT, regenerate=data.get('regenerate', False))
+    return await stream_generation(
+        send, receive, chunks, lambda content: resume_app.finish_cover_letter(data, content), 'cover letter'
+    )
+
+
+ROUTES = {
+    '/generate-resume': lambda data, send, receive: generate_resume(data, send),
+    '/generate-cover-letter': lambda data, send, receive: generate_cover_letter(data, send),
+    '/generate-resume/stream': generate_resume_stream,
+    '/generate-cover-letter/stream': generate_cover_letter_stream,
+}
+
+
+async def handle_generation(scope, receive, send, handler):
+    started = time.perf_counter()
+    status = 500
+    try:
+        try:
+            data = await read_json(receive)
+        except BadRequest as e:
+            status = await send_json(send, {'success': False, 'error': str(e)}, 400)
+            return
+        query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+        error = validate(data, query, scope['path'])
+        if error:
+            status = await send_json(send, {'success': False, 'error': error}, 400)
+            return
+        status = await handler(data, send, receive)
+    finally:
+        request_seconds.observe(time.perf_counter() - started, endpoint=scope['path'], method='POST', status=status)
+
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            try:
+                resume_app.create_app()
+            except Exception as e:
+                await send({'type': 'lifespan.startup.failed', 'message': str(e)})
+                return
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            # The server has stopped taking requests; let queued jobs finish
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, resume_app.job_queue.drain, config.graceful_timeout)
+            render_pool.shutdown(wait=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def application(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    handler = ROUTES.get(scope.get('path')) if scope['type'] == 'http' and scope['method'] == 'POST' else None
+    if handler is not None:
+        return await handle_generation(scope, receive, send, handler)
+    return await flask_application(scope, receive, send)
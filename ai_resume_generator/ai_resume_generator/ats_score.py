@@ -0,0 +1,174 @@
+"""Keyword-match scoring against a job description, without the LLM.
+
+Applicant tracking systems rank resumes largely by how many of the job's
+keywords they contain. KeywordScorer finds the skills from a bundled
+taxonomy (skills_taxonomy.json) in a job description and in the applicant's
+text, and reports the share of the job's skills the text covers plus the
+ones it misses. Text is tokenized and stemmed so "managed" matches
+"management" and "APIs" matches "API"; skill aliases ("k8s", "Kubernetes")
+map to one skill through an inverted index keyed by each phrase's first
+stem. Scoring a form takes a millisecond or two, so it can run as the user
+types.
+"""
+import json
+import re
+from collections import Counter
+from functools import lru_cache
+from pathlib import Path
+
+TAXONOMY_PATH = Path(__file__).parent / 'skills_taxonomy.json'
+
+# Letters and digits, keeping the symbols in names like c++, c#, .net and node.js
+_TOKEN = re.compile(r"(?<![a-z0-9])\.?[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+_VOWELS = set('aeiou')
+# Derivational suffixes, longest first, and what they become
+_SUFFIXES = (
+    ('ational', 'ate'), ('ization', 'ize'), ('fulness', 'ful'), ('iveness', 'ive'),
+    ('ation', 'ate'), ('ement', ''), ('ment', ''), ('ness', ''), ('ously', 'ous'),
+    ('ities', ''), ('ity', ''), ('ally', 'al'), ('ly', ''),
+)
+# A skill mentioned more often in the job description counts more, up to this
+MAX_WEIGHT = 3
+
+
+def _has_vowel(word):
+    return any(c in _VOWELS for c in word)
+
+
+@lru_cache(maxsize=8192)
+def stem(word):
+    """Reduce a lowercase word to a crude stem (a cut-down Porter stemmer).
+
+    The stems only need to agree between the taxonomy and the text, not be
+    real words. Short words and tokens with digits or symbols are left as
+    they are, so "aws", "c++" and "s3" survive.
+    """
+    if len(word) <= 3 or not word.isalpha():
+        return word
+
+    # Plurals
+    if word.endswith('sses'):
+        word = word[:-2]
+    elif word.endswith('ies'):
+        word = word[:-3] + 'y'
+    elif word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        word = word[:-1]
+
+    # Verb endings, if a vowel is left in front of them
+    for suffix in ('ing', 'ed'):
+        if word.endswith(suffix) and _has_vowel(word[:-len(suffix)]) and len(word) - len(suffix) >= 3:
+            word = word[:-len(suffix)]
+            if len(word) > 3 and word[-1] == word[-2] and word[-1] not in 'lsz':
+                word = word[:-1]
+            break
+
+    for suffix, replacement in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= 4:
+            word = word[:-len(suffix)] + replacement
+            break
+
+    if word.endswith('e') and len(word) > 4:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text):
+    """Lowercase stems of the words in text, in order"""
+    return [stem(token) for token in _TOKEN.findall(text.lower())]
+
+
+class KeywordScorer:
+    """Match text against a skills taxonomy and score it against a job description.
+
+    The taxonomy maps each skill name to the phrases that mean it, and each
+    industry to its aliases and core skills (see skills_taxonomy.json).
+    Without a job description, text is scored against the core skills of the
+    industry it names.
+    """
+
+    def __init__(self, taxonomy):
+        self.skills = list(taxonomy['skills'])
+        skill_ids = {name: skill_id for skill_id, name in enumerate(self.skills)}
+
+        # First stem -> [(phrase stems, skill id)], longest phrase first
+        self.index = {}
+        for name, aliases in taxonomy['skills'].items():
+            for alias in aliases:
+                phrase = tuple(tokenize(alias))
+                if phrase:
+                    self.index.setdefault(phrase[0], []).append((phrase, skill_ids[name]))
+        for phrases in self.index.values():
+            phrases.sort(key=lambda entry: len(entry[0]), reverse=True)
+
+        # Industry alias stems -> core skill ids
+        self.industries = []
+        for name, industry in taxonomy.get('industries', {}).items():
+            unknown = [skill for skill in industry['skills'] if skill not in skill_ids]
+            if unknown:
+                raise ValueError(f"Industry {name} lists unknown skills: {', '.join(unknown)}")
+            names = [tuple(tokenize(alias)) for alias in [name] + industry.get('aliases', [])]
+            self.industries.append(([phrase for phrase in names if phrase],
+                                    [skill_ids[skill] for skill in industry['skills']]))
+
+        # Job descriptions stay the same while the user edits their own text
+        self.job_keywords = lru_cache(maxsize=256)(self._job_keywords)
+
+    @classmethod
+    def load(cls, path=TAXONOMY_PATH):
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def find(self, text):
+        """Count the taxonomy skills mentioned in text: {skill id: mentions}"""
+        tokens = tokenize(text)
+        found = Counter()
+        i = 0
+        while i < len(tokens):
+            for phrase, skill_id in self.index.get(tokens[i], ()):
+                if tuple(tokens[i:i + len(phrase)]) == phrase:
+                    found[skill_id] += 1
+                    i += len(phrase)
+                    break
+            else:
+                i += 1
+        return found
+
+    def _job_keywords(self, job_description):
+        """{skill id: weight} for the skills a job description asks for"""
+        return {skill_id: min(count, MAX_WEIGHT) for skill_id, count in self.find(job_description).items()}
+
+    def industry_keywords(self, industry):
+        """{skill id: weight} of the core skills for the industry named in free text, or {}"""
+        tokens = tokenize(industry or '')
+        for aliases, skill_ids in self.industries:
+            if any(tuple(tokens[i:i + len(alias)]) == alias for alias in aliases for i in range(len(tokens))):
+                return dict.fromkeys(skill_ids, 1)
+        return {}
+
+    def score(self, text, job_description='', industry=''):
+        """Score text against the job description, or the industry's core skills without one.
+
+        Returns {'score', 'matched', 'missing', 'keywords', 'source'}. score
+        is the weighted share of keywords found in text (0-100), or None when
+        there is nothing to score against; missing lists the most-wanted
+        keywords first.
+        """
+        keywords, source = {}, None
+        if job_description and job_description.strip():
+            keywords, source = self.job_keywords(job_description), 'job_description'
+        if not keywords and industry:
+            keywords, source = self.industry_keywords(industry), 'industry'
+        if not keywords:
+            return {'score': None, 'matched': [], 'missing': [], 'keywords': 0, 'source': None}
+
+        found = self.find(text or '')
+        ranked = sorted(keywords, key=lambda skill_id: (-keywords[skill_id], self.skills[skill_id]))
+        matched = [skill_id for skill_id in ranked if skill_id in found]
+        total = sum(keywords.values())
+        return {
+            'score': round(100 * sum(keywords[skill_id] for skill_id in matched) / total),
+            'matched': [self.skills[skill_id] for skill_id in matched],
+            'missing': [self.skills[skill_id] for skill_id in ranked if skill_id not in found],
+            'keywords': len(keywords),
+            'source': source,
+        }
@@ -0,0 +1,207 @@
+"""Bulk resume / cover letter generation.
+
+Usable from the /batch endpoint or from the command line:
+
+    python batch.py applicants.jsonl --templates modern,classic -o cohort.zip
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import threading
+import time
+import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+def check_records(records):
+    """Raise ValueError unless records is a list of applicant objects"""
+    if not isinstance(records, list):
+        raise ValueError('records must be a list of objects')
+    for index, record in enumerate(records):
+        if not isinstance(record, dict):
+            raise ValueError(f"record {index} is not an object")
+    return records
+
+
+def parse_records(text, filename=''):
+    """Parse applicant records from JSONL or CSV text"""
+    stripped = text.lstrip()
+    name = filename.lower()
+    is_json = name.endswith(('.jsonl', '.json')) or (not name.endswith('.csv') and stripped.startswith(('{', '[')))
+
+    if not is_json:
+        reader = csv.DictReader(io.StringIO(text))
+        return [{k.strip(): (v or '').strip() for k, v in row.items() if k} for row in reader]
+
+    if stripped.startswith('['):
+        return check_records(json.loads(stripped))
+
+    records = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            records.append(json.loads(line))
+        except ValueError as e:
+            raise ValueError(f"Invalid JSON on line {line_number}: {e}")
+    return check_records(records)
+
+
+class BatchRun:
+    """Progress and output of one batch, shared between the runner and readers"""
+
+    def __init__(self, total, templates):
+        self.id = uuid.uuid4().hex
+        self.total = total
+        self.templates = templates
+        self.completed = 0
+        self.failed = 0
+        self.status = 'running'
+        self.error = None
+        self.zip_bytes = None
+        self.created = time.time()
+        self.finished = None
+        self.events = []
+        self._condition = threading.Condition()
+
+    def record_event(self, event):
+        with self._condition:
+            self.events.append(event)
+            self._condition.notify_all()
+
+    def wait_for_events(self, start, timeout=15):
+        """Return events after index start, blocking until one arrives or the batch ends"""
+        with self._condition:
+            if len(self.events) <= start and self.status == 'running':
+                self._condition.wait(timeout)
+            return self.events[start:]
+
+    def to_dict(self):
+        return {
+            'batch_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'completed': self.completed,
+            'failed': self.failed,
+            'templates': self.templates,
+            'error': self.error,
+            'created': self.created,
+            'finished': self.finished,
+        }
+
+
+def run_batch(batch, records, generate_record, concurrency=4, slots=None):
+    """Generate every record on a bounded pool and pack the documents into a ZIP.
+
+    generate_record(index, record, templates) returns a {filename: bytes}
+    mapping. At most `concurrency` records are in flight at once, which also
+    bounds the number of concurrent requests sent to Ollama. slots, a
+    semaphore shared by every batch, caps the records in flight across
+    batches running side by side.
+    """
+    buffer = io.BytesIO()
+    errors = []
+
+    def generate(index, record):
+        if slots is None:
+            return generate_record(index, record, batch.templates)
+        with slots:
+            return generate_record(index, record, batch.templates)
+
+    try:
+        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive, \
+                ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = {
+                executor.submit(generate, index, record): index
+                for index, record in enumerate(records)
+            }
+
+            for future in as_completed(futures):
+                index = futures[future]
+                try:
+                    files = future.result()
+                except Exception as e:
+                    batch.failed += 1
+                    errors.append(f"record {index}: {e}")
+                    event = {'record': index, 'status': 'failed', 'error': str(e)}
+                else:
+                    # Only this thread writes to the archive
+                    for filename, data in files.items():
+                        archive.writestr(filename, data)
+                    batch.completed += 1
+                    event = {'record': index, 'status': 'done', 'files': list(files)}
+
+                event.update(completed=batch.completed, failed=batch.failed, total=batch.total)
+                batch.record_event(event)
+
+            if errors:
+                archive.writestr('errors.txt', '\n'.join(errors) + '\n')
+
+        batch.zip_bytes = buffer.getvalue()
+        batch.status = 'done'
+    except Exception as e:
+        batch.status = 'failed'
+        batch.error = str(e)
+    finally:
+        batch.finished = time.time()
+        batch.record_event({'status': batch.status, 'completed': batch.completed,
+                            'failed': batch.failed, 'total': batch.total})
+
+    return batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate resumes or cover letters for a file of applicant records.')
+    parser.add_argument('input', help='JSONL or CSV file with one applicant per record')
+    parser.add_argument('--templates', default='modern',
+                        help='comma-separated resume templates to render for each record (default: modern)')
+    parser.add_argument('--concurrency', type=int, default=None,
+                        help='records generated in parallel (default: BATCH_CONCURRENCY or 4)')
+    parser.add_argument('-o', '--output', default='batch.zip', help='ZIP file to write (default: batch.zip)')
+    args = parser.parse_args(argv)
+
+    import app
+
+    with open(args.input, 'r', encoding='utf-8') as f:
+        records = parse_records(f.read(), args.input)
+
+    templates = [t.strip() for t in args.templates.split(',') if t.strip()]
+    unknown = [t for t in templates if t not in app.RESUME_TEMPLATES]
+    if unknown:
+        parser.error(f"unknown template(s): {', '.join(unknown)}")
+
+    batch = BatchRun(len(records), templates)
+    concurrency = args.concurrency or app.BATCH_CONCURRENCY
+
+    def report():
+        seen = 0
+        while True:
+            events = batch.wait_for_events(seen)
+            seen += len(events)
+            for event in events:
+                if 'record' in event:
+                    detail = event.get('error') or ', '.join(event.get('files', []))
+                    print(f"[{event['completed'] + event['failed']}/{event['total']}] record {event['record']} {event['status']}: {detail}")
+            if batch.status != 'running' and seen >= len(batch.events):
+                return
+
+    reporter = threading.Thread(target=report, daemon=True)
+    reporter.start()
+    run_batch(batch, records, app.generate_batch_record, concurrency)
+    reporter.join()
+
+    if batch.status != 'done':
+        print(f"❌ Batch failed: {batch.error}")
+        return 1
+
+    with open(args.output, 'wb') as f:
+        f.write(batch.zip_bytes)
+    print(f"✅ {batch.completed}/{batch.total} records written to {args.output}")
+    return 0 if batch.failed == 0 else 2
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,280 @@
+"""End-to-end benchmark of the generation pipeline against a fake Ollama.
+
+Starts fake_ollama.FakeOllama and the Flask app on local ports, drives
+/generate-resume for every template and page limit plus
+/generate-cover-letter at several concurrency levels, and writes latency
+percentiles, throughput and a per-stage time split to a JSON file:
+
+    python bench_pipeline.py --requests 20 --concurrency 1,4,8 -o bench_results.json
+    python bench_pipeline.py --baseline bench_results.json   # compare with an earlier run
+    python bench_pipeline.py --backends 2 --parallel 1       # two single-slot Ollamas behind the router
+    python bench_pipeline.py --prompt-rate 500               # prompts cost time unless their prefix is cached
+
+prompt_eval is the prompt evaluation time Ollama reports (prompt_eval_duration),
+averaged per request like the other stages.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import statistics
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from fake_ollama import FakeOllama
+
+SAMPLE_APPLICANT = {
+    'name': 'Jane Doe',
+    'email': 'jane@example.com',
+    'phone': '+1 555 0100',
+    'location': 'Austin, TX',
+    'linkedin': 'https://linkedin.com/in/janedoe',
+    'github': 'https://github.com/janedoe',
+    'job_title': 'Senior Software Engineer',
+    'experience_years': '8',
+    'industry': 'Technology',
+    'experience': 'Acme Corp 2019-present, senior engineer on the platform team.',
+    'skills': 'Python, Flask, PostgreSQL, AWS, Kubernetes',
+    'education': 'B.S. Computer Science',
+    'company': 'Globex',
+    'position': 'Staff Engineer',
+    'job_description': 'Own the reliability of our Python services.',
+}
+
+
+class StageProfiler:
+    """Wrap pipeline functions in the app module and record time spent in each stage"""
+
+    STAGES = {
+        'prompt_build': ('build_resume_prompt', 'build_cover_letter_prompt'),
+        'preview': ('resume_preview', 'cover_letter_preview'),
+        'docx_build': ('build_resume_document', 'build_cover_letter_document'),
+        'save': ('document_bytes', 'store_document'),
+    }
+
+    def __init__(self, app_module):
+        self.samples = defaultdict(list)
+        self.prompt_tokens = 0
+        self._lock = threading.Lock()
+
+        for stage, names in self.STAGES.items():
+            for name in names:
+                setattr(app_module, name, self._wrap(stage, getattr(app_module, name)))
+        app_module.llm.generate_text = self._wrap('llm_wait', app_module.llm.generate_text)
+        for backend in app_module.llm.backends:
+            backend.client.on_stats = self._record_prompt_eval(backend.client.on_stats)
+
+    def _record_prompt_eval(self, on_stats):
+        """Collect Ollama's own prompt evaluation time and token count from each response"""
+        def record(result):
+            with self._lock:
+                self.samples['prompt_eval'].append((result.get('prompt_eval_duration') or 0) / 1e6)
+                self.prompt_tokens += result.get('prompt_eval_count') or 0
+            if on_stats:
+                on_stats(result)
+        return record
+
+    def _wrap(self, stage, fn):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = (time.perf_counter() - start) * 1000
+                with self._lock:
+                    self.samples[stage].append(elapsed)
+        return timed
+
+    def take(self):
+        """Return and reset the recorded samples and the evaluated prompt token count"""
+        with self._lock:
+            samples, self.samples = self.samples, defaultdict(list)
+            prompt_tokens, self.prompt_tokens = self.prompt_tokens, 0
+        return samples, prompt_tokens
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[index]
+
+
+def summarize(latencies):
+    summary = {
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'mean': statistics.mean(latencies) if latencies else None,
+    }
+    return {key: round(value, 3) if value is not None else None for key, value in summary.items()}
+
+
+def start_app(app_module):
+    from werkzeug.serving import make_server
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', 0, app_module.app, threaded=True)
+    threading.Thread(target=server.serve_forever, name='bench-app', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def run_scenario(base_url, path, payloads, concurrency):
+    latencies = []
+    errors = 0
+    session = requests.Session()
+
+    def call(payload):
+        start = time.perf_counter()
+        response = session.post(f"{base_url}{path}", json=payload, timeout=600)
+        elapsed = (time.perf_counter() - start) * 1000
+        return elapsed, response.status_code == 200 and response.json().get('success')
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for elapsed, ok in executor.map(call, payloads):
+            latencies.append(elapsed)
+            errors += 0 if ok else 1
+    wall = time.perf_counter() - start
+
+    return latencies, errors, wall
+
+
+def scenarios(concurrency_levels):
+    for concurrency in concurrency_levels:
+        for template in ('modern', 'classic', 'creative', 'minimal'):
+            for page_limit in (1, 2):
+                yield {'endpoint': '/generate-resume', 'template': template,
+                       'page_limit': page_limit, 'concurrency': concurrency}
+        yield {'endpoint': '/generate-cover-letter', 'concurrency': concurrency}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def scenario_key(scenario):
+    return (scenario['endpoint'], scenario.get('template'), scenario.get('page_limit'), scenario['concurrency'])
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {scenario_key(s): s for s in json.load(f)['scenarios']}
+
+    print(f"\nComparison with {baseline_path} (p50 ms and prompt_eval ms per request, negative is faster)")
+    for scenario in results['scenarios']:
+        before = baseline.get(scenario_key(scenario))
+        if not before or not before['latency_ms']['p50']:
+            continue
+        old, new = before['latency_ms']['p50'], scenario['latency_ms']['p50']
+        line = f"  {scenario['name']:<40} {old:>9.1f} -> {new:>9.1f}  ({(new - old) / old * 100:+.1f}%)"
+        old_prompt = before['stages_ms_per_request'].get('prompt_eval')
+        new_prompt = scenario['stages_ms_per_request'].get('prompt_eval')
+        if old_prompt and new_prompt is not None:
+            line += f"   prompt_eval {old_prompt:>7.1f} -> {new_prompt:>7.1f}  ({(new_prompt - old_prompt) / old_prompt * 100:+.1f}%)"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=10, help='requests per scenario')
+    parser.add_argument('--concurrency', default='1,4', help='comma-separated concurrency levels')
+    parser.add_argument('--latency', type=float, default=0.05, help='fake Ollama time to first token (s)')
+    parser.add_argument('--token-rate', type=float, default=2000.0, help='fake Ollama tokens per second')
+    parser.add_argument('--backends', type=int, default=1, help='number of fake Ollama instances')
+    parser.add_argument('--parallel', type=int, default=0, help='generations each fake Ollama runs at once (0 = unlimited)')
+    parser.add_argument('--prompt-rate', type=float, default=0.0,
+                        help='fake Ollama prompt tokens evaluated per second (0 = prompts cost nothing)')
+    parser.add_argument('--cache', action='store_true', help='leave the LLM response cache enabled')
+    parser.add_argument('-o', '--output', default='bench_results.json')
+    parser.add_argument('--baseline', help='earlier results file to compare p50 latencies against')
+    args = parser.parse_args(argv)
+
+    fakes = [FakeOllama(latency=args.latency, token_rate=args.token_rate, parallel=args.parallel,
+                        prompt_rate=args.prompt_rate).start()
+             for _ in range(args.backends)]
+    os.environ['OLLAMA_URLS'] = ','.join(fake.url for fake in fakes)
+    os.environ.setdefault('PERSIST_DOCUMENTS', 'false')
+    # Build documents inside the timed request so docx_build and save stay in the split
+    os.environ.setdefault('LAZY_DOCUMENTS', 'false')
+
+    import app as app_module
+
+    if not args.cache:
+        app_module.llm.cache = None
+    # Compile template skeletons up front so the one-off cost stays out of the samples
+    app_module.template_skeletons.compile_all()
+    profiler = StageProfiler(app_module)
+    server, base_url = start_app(app_module)
+
+    results = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'requests_per_scenario': args.requests,
+            'fake_ollama': {'latency_s': args.latency, 'token_rate': args.token_rate,
+                            'backends': args.backends, 'parallel': args.parallel,
+                            'prompt_rate': args.prompt_rate},
+            'cache_enabled': args.cache,
+        },
+        'scenarios': [],
+    }
+
+    concurrency_levels = [int(c) for c in args.concurrency.split(',') if c.strip()]
+    try:
+        for scenario in scenarios(concurrency_levels):
+            name = scenario['endpoint']
+            if 'template' in scenario:
+                name += f" {scenario['template']} {scenario['page_limit']}p"
+            name += f" c={scenario['concurrency']}"
+
+            # Vary the applicant so identical prompts never collapse into one
+            payloads = [dict(SAMPLE_APPLICANT, name=f"Jane Doe {i}",
+                             template=scenario.get('template', 'modern'),
+                             page_limit=scenario.get('page_limit', 1))
+                        for i in range(args.requests)]
+
+            profiler.take()
+            latencies, errors, wall = run_scenario(base_url, scenario['endpoint'], payloads, scenario['concurrency'])
+            samples, prompt_tokens = profiler.take()
+            stages = {stage: round(sum(values) / len(payloads), 3) for stage, values in samples.items()}
+
+            entry = dict(scenario, name=name, requests=len(payloads), errors=errors,
+                         latency_ms=summarize(latencies),
+                         throughput_rps=round(len(payloads) / wall, 3),
+                         stages_ms_per_request=stages,
+                         prompt_tokens_per_request=round(prompt_tokens / len(payloads), 1))
+            results['scenarios'].append(entry)
+
+            latency = entry['latency_ms']
+            print(f"{name:<40} p50 {latency['p50']:8.1f} ms  p95 {latency['p95']:8.1f} ms  "
+                  f"p99 {latency['p99']:8.1f} ms  {entry['throughput_rps']:6.2f} req/s  "
+                  + '  '.join(f"{stage} {ms:.1f}" for stage, ms in sorted(stages.items())))
+    finally:
+        server.shutdown()
+        for fake in fakes:
+            fake.stop()
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+
+if __name__ == '__main__':
+    main()
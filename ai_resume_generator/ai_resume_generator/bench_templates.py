@@ -0,0 +1,140 @@
+"""Benchmark the DOCX build phase: per-request template construction vs cloned skeletons.
+
+    python bench_templates.py [--iterations 200] [--levels 1,6,9]
+
+Also compares file size and save time of python-docx's default output with
+the compacted output (docx_optimize) at each ZIP compression level.
+No Ollama is needed; the section content is fixed sample text.
+"""
+import argparse
+import statistics
+import time
+
+from docx import Document
+
+import app
+
+SAMPLE_DATA = {
+    'name': 'Jane Doe',
+    'job_title': 'Senior Software Engineer',
+    'email': 'jane@example.com',
+    'phone': '+1 555 0100',
+    'location': 'Austin, TX',
+    'linkedin': 'https://linkedin.com/in/janedoe',
+    'github': 'https://github.com/janedoe',
+    'portfolio': 'https://janedoe.dev',
+}
+
+SAMPLE_CONTENT = """PROFESSIONAL SUMMARY
+Backend engineer with 8 years of experience building high-traffic Python services.
+
+CORE SKILLS
+- Python, Flask, PostgreSQL
+- Distributed systems, observability
+
+PROFESSIONAL EXPERIENCE
+Acme Corp - Senior Engineer (2019 - present)
+- Cut p95 latency by 40% by redesigning the caching layer
+
+EDUCATION
+B.S. Computer Science, State University"""
+
+
+def build_from_scratch(template_choice, data):
+    """The per-request cost before skeletons: fresh Document(), full layout, margins"""
+    doc = Document()
+    app.RESUME_TEMPLATES[template_choice](doc)
+    for section in doc.sections:
+        section.top_margin = app.Inches(0.5)
+        section.bottom_margin = app.Inches(0.5)
+        section.left_margin = app.Inches(0.7)
+        section.right_margin = app.Inches(0.7)
+    return app.fill_template(doc, data, template_choice)
+
+
+def build_from_skeleton(template_choice, data):
+    return app.template_skeletons.new_document(template_choice, data)
+
+
+def time_calls(fn, iterations):
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def compare_output(sections, iterations, levels):
+    """Median save time and size of each document: python-docx defaults vs docx_optimize"""
+    variants = [('default', False, 6)] + [(f'compact z{level}', True, level) for level in levels]
+    builders = {template_choice: (lambda t=template_choice: app.build_resume_document(SAMPLE_DATA, sections, t, 1))
+                for template_choice in app.RESUME_TEMPLATES}
+    builders['cover'] = lambda: app.build_cover_letter_document(SAMPLE_DATA, SAMPLE_CONTENT)
+
+    original = app.DOCX_OPTIMIZE, app.DOCX_COMPRESSION, app.template_skeletons
+    results = {}
+    try:
+        for label, optimize, level in variants:
+            app.DOCX_OPTIMIZE, app.DOCX_COMPRESSION = optimize, level
+            # Skeletons are compacted when compiled, so each variant needs its own
+            app.template_skeletons = app.TemplateSkeletons(app.RESUME_TEMPLATES)
+            app.template_skeletons.compile_all()
+            for name, build in builders.items():
+                save_ms, build_ms = [], []
+                for _ in range(iterations):
+                    start = time.perf_counter()
+                    doc = build()
+                    built = time.perf_counter()
+                    content = app.document_bytes(doc)
+                    build_ms.append((built - start) * 1000)
+                    save_ms.append((time.perf_counter() - built) * 1000)
+                results[name, label] = (len(content), statistics.median(build_ms), statistics.median(save_ms))
+    finally:
+        app.DOCX_OPTIMIZE, app.DOCX_COMPRESSION, app.template_skeletons = original
+
+    print(f"\n{'document':<10} {'output':<12} {'KB':>7} {'build ms':>9} {'save ms':>8} {'size':>8} {'save':>8}   (median of {iterations}, vs default)")
+    for name in builders:
+        size_before, _, save_before = results[name, 'default']
+        for label, _, _ in variants:
+            size, build, save = results[name, label]
+            print(f"{name if label == 'default' else '':<10} {label:<12} {size / 1024:>7.1f} {build:>9.2f} {save:>8.2f} "
+                  f"{(size - size_before) / size_before * 100:>+7.1f}% {(save - save_before) / save_before * 100:>+7.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--levels', default='1,6,9', help='comma-separated ZIP compression levels to compare')
+    args = parser.parse_args(argv)
+
+    sections = app.parse_resume_sections(SAMPLE_CONTENT)
+    app.template_skeletons.compile_all()
+
+    print(f"{'template':<10} {'scratch ms':>11} {'skeleton ms':>12} {'speedup':>8}   (median of {args.iterations}, header only / full document)")
+    for template_choice in app.RESUME_TEMPLATES:
+        results = []
+        for builder in (build_from_scratch, build_from_skeleton):
+            header = time_calls(lambda: builder(template_choice, SAMPLE_DATA), args.iterations)
+
+            def full_document():
+                doc = builder(template_choice, SAMPLE_DATA)
+                for section in sections:
+                    if section['heading']:
+                        app.add_section_heading(doc, section['heading'], template_choice)
+                    if section['body']:
+                        doc.add_paragraph().add_run(section['body'])
+                app.document_bytes(doc)
+
+            full = time_calls(full_document, args.iterations)
+            results.append((statistics.median(header), statistics.median(full)))
+
+        (scratch_header, scratch_full), (skeleton_header, skeleton_full) = results
+        print(f"{template_choice:<10} {scratch_header:>11.2f} {skeleton_header:>12.2f} {scratch_header / skeleton_header:>7.1f}x   header")
+        print(f"{'':<10} {scratch_full:>11.2f} {skeleton_full:>12.2f} {scratch_full / skeleton_full:>7.1f}x   full + save")
+
+    compare_output(sections, args.iterations, [int(level) for level in args.levels.split(',') if level.strip()])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Application settings read once from the environment and a .env file.
+
+Every setting is a field of Config with the environment variable(s) it is
+read from; the first variable that is set wins. Values in the real
+environment override the .env file, which is looked for in the current
+directory and then next to this module (ENV_FILE names another file).
+"""
+import os
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+
+
+def read_env_file(path):
+    """Parse KEY=VALUE lines into a dict; missing files give an empty dict"""
+    path = Path(path)
+    if not path.is_file():
+        return {}
+    values = {}
+    for line in path.read_text(encoding='utf-8').splitlines():
+        line = line.strip()
+        if not line or line.startswith('#') or '=' not in line:
+            continue
+        key, value = line.split('=', 1)
+        key = key.strip()
+        if key.startswith('export '):
+            key = key[len('export '):].strip()
+        value = value.strip()
+        if value[:1] in ('"', "'") and value[-1:] == value[:1]:
+            value = value[1:-1]
+        else:
+            # Allow trailing comments on unquoted values
+            value = value.split(' #', 1)[0].strip()
+        values[key] = value
+    return values
+
+
+def find_env_file(name='.env'):
+    for directory in (Path.cwd(), Path(__file__).parent):
+        if (directory / name).is_file():
+            return directory / name
+    return None
+
+
+def _parse_bool(value):
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+
+def _parse_list(value):
+    return tuple(item.strip() for item in value.split(',') if item.strip())
+
+
+PARSERS = {
+    bool: _parse_bool,
+    int: int,
+    float: float,
+    str: str,
+    tuple: _parse_list,
+}
+
+
+@dataclass(frozen=True)
+class Config:
+    """Typed settings; build one with Config.from_env()"""
+
+    # Ollama
+    ollama_urls: tuple = field(default=('http://localhost:11434',), metadata={'env': ('OLLAMA_URLS', 'OLLAMA_URL')})
+    model_name: str = field(default='llama2:7b', metadata={'env': ('MODEL_NAME',)})
+    # Models a request may pick with its "model" field; empty = any model pulled into Ollama
+    allowed_models: tuple = field(default=(), metadata={'env': ('ALLOWED_MODELS',)})
+    ollama_pool_size: int = field(default=10, metadata={'env': ('OLLAMA_POOL_SIZE',)})
+    ollama_keep_alive: str = field(default='30m', metadata={'env': ('OLLAMA_KEEP_ALIVE',)})
+    ollama_failure_threshold: int = field(default=3, metadata={'env': ('OLLAMA_FAILURE_THRESHOLD',)})
+    ollama_cooldown: int = field(default=30, metadata={'env': ('OLLAMA_COOLDOWN',)})
+    ollama_probe_interval: int = field(default=10, metadata={'env': ('OLLAMA_PROBE_INTERVAL',)})
+    ollama_poll_interval: int = field(default=15, metadata={'env': ('OLLAMA_POLL_INTERVAL',)})
+    ollama_warmup: bool = field(default=True, metadata={'env': ('OLLAMA_WARMUP',)})
+    ollama_heartbeat_interval: int = field(default=0, metadata={'env': ('OLLAMA_HEARTBEAT_INTERVAL',)})
+    ollama_heartbeat_hours: str = field(default='8-18', metadata={'env': ('OLLAMA_HEARTBEAT_HOURS',)})
+    ollama_heartbeat_weekdays_only: bool = field(default=True, metadata={'env': ('OLLAMA_HEARTBEAT_WEEKDAYS_ONLY',)})
+    ollama_json_format: str = field(default='schema', metadata={'env': ('OLLAMA_JSON_FORMAT',)})
+
+    # Token budgets
+    max_tokens: int = field(default=1500, metadata={'env': ('MAX_TOKENS',)})
+    max_tokens_two_page: int = field(default=2500, metadata={'env': ('MAX_TOKENS_TWO_PAGE',)})
+    cover_letter_max_tokens: int = field(default=1200, metadata={'env': ('COVER_LETTER_MAX_TOKENS',)})
+    # Size resume budgets to the page area each template leaves and trim output that would overflow
+    page_fit: bool = field(default=True, metadata={'env': ('PAGE_FIT',)})
+
+    # Generation
+    resume_generation: str = field(default='single', metadata={'env': ('RESUME_GENERATION',)})
+    section_concurrency: int = field(default=4, metadata={'env': ('SECTION_CONCURRENCY', 'OLLAMA_NUM_PARALLEL')})
+    batch_concurrency: int = field(default=4, metadata={'env': ('BATCH_CONCURRENCY', 'OLLAMA_NUM_PARALLEL')})
+    job_workers: int = field(default=2, metadata={'env': ('JOB_WORKERS',)})
+    job_queue_limit: int = field(default=20, metadata={'env': ('JOB_QUEUE_LIMIT',)})
+
+    # Storage
+    output_dir: str = field(default='generated_documents', metadata={'env': ('OUTPUT_DIR',)})
+    content_dir: str = field(default='generated_content', metadata={'env': ('CONTENT_DIR',)})
+    llm_cache_dir: str = field(default='llm_cache', metadata={'env': ('LLM_CACHE_DIR',)})
+    persist_documents: bool = field(default=True, metadata={'env': ('PERSIST_DOCUMENTS',)})
+    # Build documents on their first download instead of with every generation
+    lazy_documents: bool = field(default=True, metadata={'env': ('LAZY_DOCUMENTS',)})
+    # Strip unused styles and parts from DOCX files, and their ZIP compression level (0-9)
+    docx_optimize: bool = field(default=True, metadata={'env': ('DOCX_OPTIMIZE',)})
+    docx_compression: int = field(default=6, metadata={'env': ('DOCX_COMPRESSION',)})
+    artifact_max_bytes: int = field(default=256 * 1024 * 1024, metadata={'env': ('ARTIFACT_MAX_BYTES',)})
+    artifact_ttl: int = field(default=3600, metadata={'env': ('ARTIFACT_TTL',)})
+    storage_max_age_days: float = field(default=7.0, metadata={'env': ('STORAGE_MAX_AGE_DAYS',)})
+    storage_max_bytes: int = field(default=1024 * 1024 * 1024, metadata={'env': ('STORAGE_MAX_BYTES',)})
+    storage_sweep_interval: int = field(default=600, metadata={'env': ('STORAGE_SWEEP_INTERVAL',)})
+    # Retention for the generated_content records documents are rebuilt from
+    content_max_age_days: float = field(default=7.0, metadata={'env': ('CONTENT_MAX_AGE_DAYS',)})
+    content_max_bytes: int = field(default=256 * 1024 * 1024, metadata={'env': ('CONTENT_MAX_BYTES',)})
+
+    # Web server (serve.py and the development server)
+    debug: bool = field(default=False, metadata={'env': ('DEBUG',)})
+    host: str = field(default='127.0.0.1', metadata={'env': ('HOST',)})
+    port: int = field(default=5000, metadata={'env': ('PORT',)})
+    web_server: str = field(default='auto', metadata={'env': ('WEB_SERVER',)})
+    web_workers: int = field(default=1, metadata={'env': ('WEB_WORKERS',)})
+    web_threads: int = field(default=16, metadata={'env': ('WEB_THREADS',)})
+    # Only kills a worker whose main loop stops responding; request threads can take longer
+    web_timeout: int = field(default=300, metadata={'env': ('WEB_TIMEOUT',)})
+    # How long in-flight generations get to finish on shutdown
+    graceful_timeout: int = field(default=120, metadata={'env': ('GRACEFUL_TIMEOUT',)})
+    web_keepalive: int = field(default=5, metadata={'env': ('WEB_KEEPALIVE',)})
+    # Threads that build documents for the asyncio serving mode (asgi.py)
+    render_threads: int = field(default=4, metadata={'env': ('RENDER_THREADS',)})
+
+    @classmethod
+    def from_env(cls, environ=None, env_file=None):
+        """Build a Config from environ (default os.environ) over the .env file"""
+        environ = os.environ if environ is None else environ
+        if env_file is None:
+            env_file = find_env_file(environ.get('ENV_FILE', '.env'))
+        values = {**(read_env_file(env_file) if env_file else {}), **environ}
+
+        settings = {}
+        for setting in fields(cls):
+            for name in setting.metadata['env']:
+                raw = values.get(name)
+                if raw is None or raw == '':
+                    continue
+                try:
+                    settings[setting.name] = PARSERS[setting.type](raw)
+                except ValueError:
+                    raise ValueError(f"{name}={raw!r} is not a valid {setting.type.__name__}")
+                break
+        return cls(**settings)
+
+    def resume_max_tokens(self, page_limit):
+        return self.max_tokens if page_limit == 1 else self.max_tokens_two_page
+
+    def summary(self):
+        """Settings that are safe and useful to show on /health"""
+        return {
+            'ollama_urls': list(self.ollama_urls),
+            'model': self.model_name,
+            'allowed_models': list(self.allowed_models),
+            'max_tokens': self.max_tokens,
+            'max_tokens_two_page': self.max_tokens_two_page,
+            'cover_letter_max_tokens': self.cover_letter_max_tokens,
+            'page_fit': self.page_fit,
+            'resume_generation': self.resume_generation,
+            'output_dir': self.output_dir,
+            'lazy_documents': self.lazy_documents,
+            'debug': self.debug,
+        }
@@ -0,0 +1,64 @@
+import hashlib
+import json
+import re
+import time
+
+from storage import StorageManager
+
+
+class ContentStore:
+    """Persist generated content so documents can be re-rendered without the LLM.
+
+    Each record holds the document type, the submitted form data, the raw
+    generated text and its parsed sections. Records are addressed by a hash
+    of that content, so identical generations share one ID. Records live
+    in a StorageManager, which shards them by day and deletes the oldest
+    once they pass its age or size limit.
+    """
+
+    ID_PATTERN = re.compile(r'^[0-9a-f]{16}$')
+
+    def __init__(self, directory='generated_content', max_age_seconds=7 * 24 * 3600,
+                 max_total_bytes=256 * 1024 * 1024, sweep_interval=600):
+        self.storage = StorageManager(directory, max_age_seconds, max_total_bytes, sweep_interval)
+
+    @staticmethod
+    def make_id(document_type, data, content):
+        """Derive a stable ID from the generated content and the data it describes"""
+        # The template only affects rendering, never the content itself
+        relevant = {k: v for k, v in data.items() if k not in ('template', 'format')}
+        material = json.dumps([document_type, relevant, content], sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()[:16]
+
+    @staticmethod
+    def _filename(content_id):
+        return f"{content_id}.json"
+
+    def save(self, document_type, data, content, sections, **extra):
+        """Persist a record and return its content ID"""
+        content_id = self.make_id(document_type, data, content)
+        record = {
+            'id': content_id,
+            'type': document_type,
+            'data': data,
+            'content': content,
+            'sections': sections,
+            'created': time.time(),
+        }
+        record.update(extra)
+
+        self.storage.save(self._filename(content_id), json.dumps(record).encode('utf-8'))
+        return content_id
+
+    def load(self, content_id):
+        """Return the record for content_id, or None if it is unknown"""
+        if not self.ID_PATTERN.match(content_id):
+            return None
+        path = self.storage.lookup(self._filename(content_id))
+        if path is None:
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
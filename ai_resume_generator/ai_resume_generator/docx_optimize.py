@@ -0,0 +1,284 @@
+"""Shrink python-docx output before it is stored and served.
+
+Every Document() starts from python-docx's default template: about 350 KB of
+styles.xml, a second copy of it as stylesWithEffects.xml, a theme, web
+settings, a thumbnail and a customXml item, none of which the resume and
+cover letter layouts use. compact() drops those parts, prunes the styles
+nobody references, resolves theme fonts so the theme can go too, and moves
+run formatting that repeats many times (the white sidebar text of the
+creative template, say) into a shared character style. write() then saves
+the package with a chosen ZIP compression level.
+"""
+import copy
+import io
+import zipfile
+from collections import defaultdict
+
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.pkgwriter import PackageWriter
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+from lxml import etree
+
+STYLES_WITH_EFFECTS = 'http://schemas.microsoft.com/office/2007/relationships/stylesWithEffects'
+# Parts of the default template that nothing in a generated document points at
+UNUSED_DOCUMENT_PARTS = (STYLES_WITH_EFFECTS, RT.WEB_SETTINGS, RT.CUSTOM_XML)
+UNUSED_PACKAGE_PARTS = (RT.THUMBNAIL,)
+
+# Run properties a character style flips rather than sets when the paragraph
+# (or table) style already has them, so they can't move into one
+TOGGLE_PROPERTIES = frozenset(qn(f'w:{tag}') for tag in (
+    'b', 'bCs', 'i', 'iCs', 'caps', 'smallCaps', 'strike', 'dstrike',
+    'outline', 'shadow', 'emboss', 'imprint', 'vanish',
+))
+# Theme font attribute -> (plain attribute, theme font slot)
+THEME_FONT_ATTRIBUTES = {
+    'w:asciiTheme': ('w:ascii', 'latin'),
+    'w:hAnsiTheme': ('w:hAnsi', 'latin'),
+    'w:eastAsiaTheme': ('w:eastAsia', 'ea'),
+    'w:cstheme': ('w:cs', 'cs'),
+}
+A_NS = 'http://schemas.openxmlformats.org/drawingml/2006/main'
+
+SHARED_STYLE_PREFIX = 'SharedRun'
+# Identical run properties seen fewer times than this stay on the runs
+MIN_SHARED_RUNS = 3
+
+
+def _drop_rels(rels, reltypes):
+    for rId in [rId for rId, rel in rels.items() if rel.reltype in reltypes]:
+        del rels[rId]
+
+
+def _xml_parts(doc):
+    """Every XML part of the package apart from styles.xml"""
+    styles = doc.styles.element
+    return [part for part in doc.part.package.parts
+            if hasattr(part, 'element') and part.element is not styles]
+
+
+def _referenced_style_ids(doc):
+    # Numbering levels point back at the list styles that use them; those
+    # references alone don't keep a style (prune_numbering tidies them up)
+    numbering = [rel.target_part.element for rel in doc.part.rels.values() if rel.reltype == RT.NUMBERING]
+    ids = set()
+    for part in _xml_parts(doc):
+        if part.element in numbering:
+            continue
+        ids.update(part.element.xpath(
+            './/w:pStyle/@w:val | .//w:rStyle/@w:val | .//w:tblStyle/@w:val'
+            ' | .//w:numStyleLink/@w:val | .//w:styleLink/@w:val'
+        ))
+    return ids
+
+
+def prune_styles(doc, keep_styles=()):
+    """Remove the styles no part references, except keep_styles (by name) and defaults"""
+    styles = doc.styles.element
+    by_id = {style.get(qn('w:styleId')): style for style in styles.findall(qn('w:style'))}
+
+    wanted = _referenced_style_ids(doc)
+    wanted.update(style_id for style_id, style in by_id.items() if style.get(qn('w:default')) in ('1', 'true'))
+    for name in keep_styles:
+        try:
+            wanted.add(doc.styles[name].style_id)
+        except KeyError:
+            pass
+
+    # Styles the kept ones are based on, link to or continue with
+    pending = list(wanted)
+    while pending:
+        style = by_id.get(pending.pop())
+        if style is None:
+            continue
+        for tag in ('w:basedOn', 'w:next', 'w:link'):
+            element = style.find(qn(tag))
+            if element is not None and element.get(qn('w:val')) not in wanted:
+                wanted.add(element.get(qn('w:val')))
+                pending.append(element.get(qn('w:val')))
+
+    for style_id, style in by_id.items():
+        if style_id not in wanted:
+            styles.remove(style)
+    # Word falls back to its own defaults for styles missing from the list
+    latent = styles.find(qn('w:latentStyles'))
+    if latent is not None:
+        styles.remove(latent)
+
+
+def prune_numbering(doc):
+    """Drop numbering definitions nothing uses, and the numbering part if none are left"""
+    numbering_rels = [rId for rId, rel in doc.part.rels.items() if rel.reltype == RT.NUMBERING]
+    if not numbering_rels:
+        return
+    numbering = doc.part.numbering_part.element
+
+    used = set(doc.styles.element.xpath('.//w:numId/@w:val'))
+    for part in _xml_parts(doc):
+        if part.element is not numbering:
+            used.update(part.element.xpath('.//w:numId/@w:val'))
+    used.discard('0')
+    if not used:
+        _drop_rels(doc.part.rels, (RT.NUMBERING,))
+        return
+
+    abstract_used = set()
+    for num in numbering.findall(qn('w:num')):
+        if num.get(qn('w:numId')) in used:
+            abstract_used.add(num.find(qn('w:abstractNumId')).get(qn('w:val')))
+        else:
+            numbering.remove(num)
+    for abstract in numbering.findall(qn('w:abstractNum')):
+        if abstract.get(qn('w:abstractNumId')) not in abstract_used:
+            numbering.remove(abstract)
+    # Levels linked to styles prune_styles removed
+    style_ids = set(doc.styles.element.xpath('./w:style/@w:styleId'))
+    for style in numbering.xpath('.//w:lvl/w:pStyle'):
+        if style.get(qn('w:val')) not in style_ids:
+            style.getparent().remove(style)
+
+
+def resolve_theme_fonts(doc):
+    """Replace theme font references with the theme's fonts and drop the theme part"""
+    theme_rels = [rel for rel in doc.part.rels.values() if rel.reltype == RT.THEME]
+    if not theme_rels:
+        return
+    theme = etree.fromstring(theme_rels[0].target_part.blob)
+    fonts = {}
+    for prefix, scheme in (('major', 'majorFont'), ('minor', 'minorFont')):
+        for slot in ('latin', 'ea', 'cs'):
+            typeface = theme.find(f'.//{{{A_NS}}}{scheme}/{{{A_NS}}}{slot}')
+            fonts[(prefix, slot)] = typeface.get('typeface') if typeface is not None else ''
+
+    for element in [doc.styles.element] + [part.element for part in _xml_parts(doc)]:
+        for rfonts in element.iter(qn('w:rFonts')):
+            for theme_attribute, (attribute, slot) in THEME_FONT_ATTRIBUTES.items():
+                value = rfonts.get(qn(theme_attribute))
+                if value is None:
+                    continue
+                del rfonts.attrib[qn(theme_attribute)]
+                typeface = fonts.get(('major' if value.startswith('major') else 'minor', slot))
+                if typeface and rfonts.get(qn(attribute)) is None:
+                    rfonts.set(qn(attribute), typeface)
+    _drop_rels(doc.part.rels, (RT.THEME,))
+
+
+def _key(element):
+    return element.tag, tuple(sorted(element.attrib.items())), tuple(_key(child) for child in element)
+
+
+def _toggles(style_id, by_id, cache):
+    """Toggle properties the style with style_id, or anything it is based on, sets"""
+    if style_id not in cache:
+        cache[style_id] = frozenset()
+        style = by_id.get(style_id)
+        if style is not None:
+            rPr = style.find(qn('w:rPr'))
+            found = {child.tag for child in rPr if child.tag in TOGGLE_PROPERTIES} if rPr is not None else set()
+            based_on = style.find(qn('w:basedOn'))
+            if based_on is not None:
+                found |= _toggles(based_on.get(qn('w:val')), by_id, cache)
+            cache[style_id] = frozenset(found)
+    return cache[style_id]
+
+
+def _inherited_toggles(run, by_id, default_paragraph_style, cache):
+    toggles = frozenset()
+    for ancestor in run.iterancestors():
+        if ancestor.tag == qn('w:p'):
+            style = ancestor.find(f"{qn('w:pPr')}/{qn('w:pStyle')}")
+            toggles |= _toggles(style.get(qn('w:val')) if style is not None else default_paragraph_style, by_id, cache)
+        elif ancestor.tag == qn('w:tbl'):
+            style = ancestor.find(f"{qn('w:tblPr')}/{qn('w:tblStyle')}")
+            if style is not None:
+                toggles |= _toggles(style.get(qn('w:val')), by_id, cache)
+    return toggles
+
+
+def share_run_properties(doc, min_runs=MIN_SHARED_RUNS):
+    """Move run formatting repeated on min_runs or more runs into shared character styles"""
+    styles = doc.styles.element
+    by_id = {style.get(qn('w:styleId')): style for style in styles.findall(qn('w:style'))}
+    default_paragraph_style = next((style_id for style_id, style in by_id.items()
+                                    if style.get(qn('w:type')) == 'paragraph'
+                                    and style.get(qn('w:default')) in ('1', 'true')), None)
+    cache = {}
+
+    groups = defaultdict(list)
+    for run in doc.element.body.iter(qn('w:r')):
+        rPr = run.find(qn('w:rPr'))
+        if rPr is None or len(rPr) < 2 or rPr.find(qn('w:rStyle')) is not None:
+            continue
+        tags = {child.tag for child in rPr}
+        if tags & TOGGLE_PROPERTIES & _inherited_toggles(run, by_id, default_paragraph_style, cache):
+            continue
+        groups[_key(rPr)].append(rPr)
+
+    # Reuse shared styles from an earlier pass (a compiled template skeleton, say)
+    shared = {}
+    for style_id, style in by_id.items():
+        if style_id.startswith(SHARED_STYLE_PREFIX) and style.find(qn('w:rPr')) is not None:
+            shared[_key(style.find(qn('w:rPr')))] = style_id
+    number = len(shared)
+
+    for key, properties in groups.items():
+        if len(properties) < min_runs:
+            continue
+        style_id = shared.get(key)
+        if style_id is None:
+            number += 1
+            while f'{SHARED_STYLE_PREFIX}{number}' in by_id:
+                number += 1
+            style_id = shared[key] = f'{SHARED_STYLE_PREFIX}{number}'
+            style = OxmlElement('w:style', {qn('w:type'): 'character', qn('w:customStyle'): '1',
+                                            qn('w:styleId'): style_id})
+            style.append(OxmlElement('w:name', {qn('w:val'): f'Shared Run {number}'}))
+            style.append(OxmlElement('w:uiPriority', {qn('w:val'): '99'}))
+            style.append(OxmlElement('w:semiHidden'))
+            style.append(copy.deepcopy(properties[0]))
+            styles.append(style)
+            by_id[style_id] = style
+        for rPr in properties:
+            for child in list(rPr):
+                rPr.remove(child)
+            rPr.append(OxmlElement('w:rStyle', {qn('w:val'): style_id}))
+
+
+def compact(doc, keep_styles=()):
+    """Strip what doc doesn't use; keep_styles names styles code will add content in later"""
+    _drop_rels(doc.part.rels, UNUSED_DOCUMENT_PARTS)
+    _drop_rels(doc.part.package.rels, UNUSED_PACKAGE_PARTS)
+    share_run_properties(doc)
+    prune_styles(doc, keep_styles)
+    prune_numbering(doc)
+    resolve_theme_fonts(doc)
+    return doc
+
+
+def write(doc, compression_level=6):
+    """Serialize doc to bytes, deflating at compression_level (0 stores the parts uncompressed)"""
+    if not 0 <= compression_level <= 9:
+        raise ValueError(f"ZIP compression level must be 0-9, not {compression_level}")
+    package = doc.part.package
+    for part in package.parts:
+        part.before_marshal()
+
+    buffer = io.BytesIO()
+    compression = zipfile.ZIP_DEFLATED if compression_level else zipfile.ZIP_STORED
+    with zipfile.ZipFile(buffer, 'w', compression=compression, compresslevel=compression_level or None) as zipf:
+        # Same layout as Document.save(), which has no compression setting
+        writer = _ZipWriter(zipf)
+        PackageWriter._write_content_types_stream(writer, package.parts)
+        PackageWriter._write_pkg_rels(writer, package.rels)
+        PackageWriter._write_parts(writer, package.parts)
+    return buffer.getvalue()
+
+
+class _ZipWriter:
+    """The part of python-docx's PhysPkgWriter interface PackageWriter uses"""
+
+    def __init__(self, zipf):
+        self.zipf = zipf
+
+    def write(self, pack_uri, blob):
+        self.zipf.writestr(pack_uri.membername, blob)
@@ -0,0 +1,239 @@
+"""A stand-in for the Ollama HTTP API, for benchmarks and local development.
+
+Serves /api/generate (streaming and non-streaming), /api/tags and /api/ps with a
+configurable time-to-first-token, token rate and one-off model load time:
+
+    python fake_ollama.py --port 11434 --latency 0.5 --token-rate 30 --load-time 5
+
+With --prompt-rate the prompt costs time too, and like Ollama's prompt cache the
+part of the input (system + prompt) shared with a recent request is not
+evaluated again; prompt_eval_count and prompt_eval_duration report only the
+evaluated suffix.
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SAMPLE_RESUME = """PROFESSIONAL SUMMARY
+Results-driven engineer with 8 years of experience designing and operating high-traffic web services. Known for shipping reliable systems and mentoring teams.
+
+CORE SKILLS
+- Python, Flask, Django, FastAPI
+- PostgreSQL, Redis, Kafka
+- AWS, Docker, Kubernetes, Terraform
+- Observability, performance tuning, incident response
+
+PROFESSIONAL EXPERIENCE
+Senior Software Engineer, Acme Corp (2019 - Present)
+- Reduced p95 API latency by 40% by redesigning the caching layer
+- Led a team of 5 engineers to migrate 30 services to Kubernetes
+- Cut infrastructure spend by $250K per year through right-sizing
+
+Software Engineer, Initech (2015 - 2019)
+- Built a billing pipeline processing 2M invoices per month
+- Introduced automated testing, raising coverage from 35% to 85%
+
+EDUCATION
+B.S. Computer Science, State University (2015)
+
+CERTIFICATIONS
+AWS Certified Solutions Architect - Associate
+
+LANGUAGES
+English (native), Spanish (professional)"""
+
+
+class FakeOllama:
+    """Configurable fake Ollama server running in a background thread"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, token_rate=50.0,
+                 text=SAMPLE_RESUME, models=('llama2:7b',), load_time=0.0, parallel=0,
+                 prompt_rate=0.0, prompt_cache_size=8):
+        self.latency = latency
+        # Prompt tokens evaluated per second (0 = prompt evaluation is free)
+        self.prompt_rate = prompt_rate
+        # Inputs of the last few requests, standing in for the server's cached KV slots
+        self._prompt_cache = []
+        self.prompt_cache_size = prompt_cache_size
+        # Like OLLAMA_NUM_PARALLEL: at most this many generations at once (0 = unlimited)
+        self._slots = threading.BoundedSemaphore(parallel) if parallel > 0 else None
+        self.load_time = load_time
+        self.loaded = False
+        self.token_rate = token_rate
+        self.text = text
+        self.models = list(models)
+        self.requests = 0
+        self._lock = threading.Lock()
+
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == '/api/tags':
+                    self._send_json({'models': [{'name': name} for name in fake.models]})
+                elif self.path == '/api/ps':
+                    loaded = fake.models[:1] if fake.loaded else []
+                    self._send_json({'models': [{'name': name, 'model': name} for name in loaded]})
+                else:
+                    self._send_json({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                request = json.loads(self.rfile.read(length) or b'{}')
+                if self.path != '/api/generate':
+                    self._send_json({'error': 'not found'}, 404)
+                    return
+                with fake._lock:
+                    fake.requests += 1
+                if fake._slots is None:
+                    fake.handle_generate(self, request)
+                    return
+                with fake._slots:
+                    fake.handle_generate(self, request)
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def tokens_for(self, request):
+        """Split the canned response into tokens, honouring num_predict"""
+        tokens = [word + ' ' for word in self.text.split(' ')]
+        limit = request.get('options', {}).get('num_predict')
+        return tokens[:limit] if limit and limit > 0 else tokens
+
+    def load_model(self, request):
+        """Pay load_time the first time, like a cold Ollama; keep_alive 0 unloads afterwards"""
+        with self._lock:
+            cold = not self.loaded
+            self.loaded = request.get('keep_alive') != 0
+        if cold:
+            time.sleep(self.load_time)
+            return self.load_time
+        return 0.001
+
+    def evaluate_prompt(self, request):
+        """Return (evaluated tokens, seconds) for the part of the input not already cached"""
+        full = f"{request.get('system') or ''}\n\n{request['prompt']}"
+        with self._lock:
+            cached = max((len(os.path.commonprefix([full, previous])) for previous in self._prompt_cache), default=0)
+            if full in self._prompt_cache:
+                self._prompt_cache.remove(full)
+            self._prompt_cache.append(full)
+            del self._prompt_cache[:-self.prompt_cache_size]
+        # Roughly four characters per token
+        tokens = max(1, (len(full) - cached) // 4)
+        seconds = tokens / self.prompt_rate if self.prompt_rate > 0 else 0.0
+        return tokens, seconds
+
+    def stats_for(self, token_count, elapsed, prompt_eval, load_seconds=0.0):
+        prompt_tokens, prompt_seconds = prompt_eval
+        first_token = self.latency + prompt_seconds
+        return {
+            'done': True,
+            'total_duration': int(elapsed * 1e9),
+            'load_duration': int(load_seconds * 1e9),
+            'prompt_eval_count': prompt_tokens,
+            # The simulated latency is overhead, not prompt evaluation; it
+            # only shows in total_duration
+            'prompt_eval_duration': int(prompt_seconds * 1e9),
+            'eval_count': token_count,
+            'eval_duration': int(max(elapsed - first_token, 1e-6) * 1e9),
+        }
+
+    def handle_generate(self, handler, request):
+        start = time.perf_counter()
+        load_seconds = self.load_model(request)
+        if not request.get('prompt'):
+            # An empty prompt only loads the model
+            handler._send_json({'model': request.get('model'), 'response': '', 'done': True,
+                                'done_reason': 'load', 'load_duration': int(load_seconds * 1e9)})
+            return
+
+        tokens = self.tokens_for(request)
+        delay = 1.0 / self.token_rate if self.token_rate > 0 else 0.0
+        prompt_eval = self.evaluate_prompt(request)
+        time.sleep(self.latency + prompt_eval[1])
+
+        if not request.get('stream', True):
+            time.sleep(delay * len(tokens))
+            payload = {'model': request.get('model'), 'response': ''.join(tokens)}
+            payload.update(self.stats_for(len(tokens), time.perf_counter() - start, prompt_eval, load_seconds))
+            handler._send_json(payload)
+            return
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'application/x-ndjson')
+        handler.send_header('Transfer-Encoding', 'chunked')
+        handler.end_headers()
+
+        def write_chunk(payload):
+            line = (json.dumps(payload) + '\n').encode('utf-8')
+            handler.wfile.write(f"{len(line):X}\r\n".encode('ascii') + line + b"\r\n")
+            handler.wfile.flush()
+
+        try:
+            for token in tokens:
+                time.sleep(delay)
+                write_chunk({'model': request.get('model'), 'response': token, 'done': False})
+            final = {'model': request.get('model'), 'response': ''}
+            final.update(self.stats_for(len(tokens), time.perf_counter() - start, prompt_eval, load_seconds))
+            write_chunk(final)
+            handler.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            # The client cancelled; a real Ollama stops generating here too
+            pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, name='fake-ollama', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11434)
+    parser.add_argument('--latency', type=float, default=0.5, help='seconds before the first token')
+    parser.add_argument('--token-rate', type=float, default=30.0, help='tokens generated per second')
+    parser.add_argument('--load-time', type=float, default=0.0, help='seconds to "load" the model on first use')
+    parser.add_argument('--parallel', type=int, default=0, help='concurrent generations allowed (0 = unlimited)')
+    parser.add_argument('--prompt-rate', type=float, default=0.0,
+                        help='prompt tokens evaluated per second; cached prefixes are free (0 = prompts cost nothing)')
+    args = parser.parse_args(argv)
+
+    fake = FakeOllama(args.host, args.port, args.latency, args.token_rate,
+                      load_time=args.load_time, parallel=args.parallel, prompt_rate=args.prompt_rate)
+    print(f"🧪 Fake Ollama listening on {fake.url} (latency {args.latency}s, {args.token_rate} tokens/s)")
+    try:
+        fake.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
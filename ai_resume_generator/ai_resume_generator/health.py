@@ -0,0 +1,94 @@
+import os
+import threading
+import time
+
+import requests
+
+
+def model_available(model_name, models):
+    """True if model_name was pulled; an untagged name matches its ':latest' tag"""
+    if model_name in models:
+        return True
+    return ':' not in model_name and f"{model_name}:latest" in models
+
+
+class OllamaMonitor:
+    """Background poller for Ollama's status and model list.
+
+    A daemon thread calls ``list_models`` every ``interval`` seconds and
+    keeps the latest result, so health checks read a cached snapshot
+    instead of waiting on Ollama. The thread is started lazily (and again
+    in forked workers) the first time the snapshot is read.
+    """
+
+    def __init__(self, list_models, model_name, interval=15, min_refresh_interval=2):
+        self.list_models = list_models
+        self.model_name = model_name
+        self.interval = interval
+        self.min_refresh_interval = min_refresh_interval
+
+        self._snapshot = {'ollama_status': 'starting', 'available_models': [], 'checked_at': None}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._poller_pid = None
+
+    def _ensure_poller(self):
+        if self._poller_pid == os.getpid():
+            return
+        self._poller_pid = os.getpid()
+        threading.Thread(target=self._poll_forever, name='ollama-monitor', daemon=True).start()
+
+    def start(self):
+        self._ensure_poller()
+        return self
+
+    def _poll_forever(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
+
+    def refresh(self):
+        """Query Ollama now and store the result; returns the new snapshot"""
+        with self._refresh_lock:
+            try:
+                snapshot = {'ollama_status': 'running', 'available_models': self.list_models()}
+            except requests.exceptions.HTTPError:
+                snapshot = {'ollama_status': 'error', 'available_models': [], 'message': 'Ollama not responding'}
+            except Exception as e:
+                snapshot = {'ollama_status': 'offline', 'available_models': [], 'error': str(e)}
+            snapshot['checked_at'] = time.time()
+
+            with self._lock:
+                self._snapshot = snapshot
+            return snapshot
+
+    def request_refresh(self):
+        """Refresh now unless the cached snapshot is fresher than min_refresh_interval"""
+        age = self.snapshot()['age_seconds']
+        if age is None or age >= self.min_refresh_interval:
+            self.refresh()
+        return self.snapshot()
+
+    def snapshot(self):
+        """Return the cached status with its age in seconds"""
+        self._ensure_poller()
+        with self._lock:
+            snapshot = dict(self._snapshot)
+        checked_at = snapshot['checked_at']
+        snapshot['age_seconds'] = round(time.time() - checked_at, 3) if checked_at else None
+        snapshot['model'] = self.model_name
+        snapshot['model_available'] = model_available(self.model_name, snapshot['available_models'])
+        return snapshot
+
+    def readiness(self):
+        """Return (ready, reason); ready means Ollama answered recently and the model is pulled"""
+        snapshot = self.snapshot()
+        if snapshot['checked_at'] is None:
+            return False, 'Ollama status not checked yet'
+        if snapshot['ollama_status'] != 'running':
+            return False, f"Ollama is {snapshot['ollama_status']}"
+        if snapshot['age_seconds'] > self.interval * 3:
+            return False, f"Ollama status is stale ({snapshot['age_seconds']:.0f}s old)"
+        if not snapshot['model_available']:
+            return False, f"Model {self.model_name} is not pulled (run: ollama pull {self.model_name})"
+        return True, 'ready'
@@ -0,0 +1,184 @@
+import itertools
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit"""
+
+    def __init__(self, depth):
+        super().__init__(f"Job queue is full ({depth} jobs waiting)")
+        self.depth = depth
+
+
+class JobCancelled(Exception):
+    """Raised inside a handler when its job has been cancelled"""
+
+
+class Job:
+    def __init__(self, kind, payload, priority=0):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.payload = payload
+        self.priority = priority
+        self.status = 'queued'
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel_event = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Let long-running handlers stop early once cancel() was called"""
+        if self.cancelled:
+            raise JobCancelled(self.id)
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'type': self.kind,
+            'priority': self.priority,
+            'status': self.status,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+        }
+
+
+class JobQueue:
+    """Bounded priority queue drained by a fixed pool of worker threads.
+
+    Lower priority values run first; jobs with equal priority run in
+    submission order. Workers start lazily on the first submit (and again in
+    a forked child process), so importing the module has no side effects.
+    """
+
+    def __init__(self, handler, workers=2, max_depth=20, max_finished=1000):
+        self.handler = handler
+        self.workers = workers
+        self.max_depth = max_depth
+        self.max_finished = max_finished
+
+        self._queue = queue.PriorityQueue()
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._threads = []
+        self._pid = None
+        self._running = 0
+        # Jobs waiting to start; the PriorityQueue also holds cancelled ones
+        # until a worker pops them
+        self._queued = 0
+
+    def _ensure_workers(self):
+        if self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._threads = []
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def depth(self):
+        """Number of jobs waiting to start"""
+        return self._queued
+
+    def submit(self, kind, payload, priority=0):
+        """Queue a job and return it, or raise QueueFullError"""
+        with self._lock:
+            self._ensure_workers()
+            if self._queued >= self.max_depth:
+                raise QueueFullError(self._queued)
+
+            job = Job(kind, payload, priority)
+            self._jobs[job.id] = job
+            self._queue.put((priority, next(self._sequence), job))
+            self._queued += 1
+            self._trim_finished()
+            return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        """Cancel a queued or running job; returns the job or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            if job.status in ('queued', 'running'):
+                job._cancel_event.set()
+                if job.status == 'queued':
+                    job.status = 'cancelled'
+                    job.finished = time.time()
+                    self._queued -= 1
+            return job
+
+    def drain(self, timeout=30):
+        """Wait for queued and running jobs to finish; returns True if the queue emptied in time"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            # Counts jobs from put() until their worker calls task_done()
+            if self._queue.unfinished_tasks == 0:
+                return True
+            time.sleep(0.1)
+        return False
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'queue_depth': self._queued,
+                'max_depth': self.max_depth,
+                'running': self._running,
+            }
+
+    def _trim_finished(self):
+        finished = [job_id for job_id, job in self._jobs.items()
+                    if job.status in ('done', 'failed', 'cancelled')]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def _work(self):
+        while True:
+            _, _, job = self._queue.get()
+            try:
+                with self._lock:
+                    if job.cancelled:
+                        continue
+                    self._queued -= 1
+                    job.status = 'running'
+                    job.started = time.time()
+                    self._running += 1
+
+                try:
+                    result = self.handler(job)
+                    status, error = 'done', None
+                except JobCancelled:
+                    result, status, error = None, 'cancelled', None
+                except Exception as e:
+                    print(f"❌ Job {job.id} failed: {str(e)}")
+                    result, status, error = None, 'failed', str(e)
+
+                with self._lock:
+                    self._running -= 1
+                    if job.cancelled:
+                        status, result = 'cancelled', None
+                    job.status = status
+                    job.result = result
+                    job.error = error
+                    job.finished = time.time()
+            finally:
+                self._queue.task_done()
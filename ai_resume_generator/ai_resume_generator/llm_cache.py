@@ -0,0 +1,198 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from storage import write_atomic
+
+
+def generation_extra(response_format=None, system=None):
+    """Request options besides the prompt that change the output, for make_key"""
+    extra = {}
+    if response_format is not None:
+        extra['format'] = response_format
+    if system:
+        extra['system'] = system
+    return extra or None
+
+
+class LLMCache:
+    """Content-addressed cache for LLM responses.
+
+    Entries are keyed on a hash of the normalized prompt and the generation
+    options. Recent entries live in an in-memory LRU; every entry is also
+    written to disk so it survives restarts. The disk store is trimmed by
+    age and total size.
+    """
+
+    def __init__(self, directory='llm_cache', max_entries=256,
+                 max_disk_bytes=200 * 1024 * 1024, max_age_seconds=7 * 24 * 3600):
+        self.directory = Path(directory)
+        self.max_entries = max_entries
+        self.max_disk_bytes = max_disk_bytes
+        self.max_age_seconds = max_age_seconds
+
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_bytes = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def normalize_prompt(prompt):
+        """Collapse whitespace so indentation changes don't change the key"""
+        return ' '.join(prompt.split())
+
+    @classmethod
+    def make_key(cls, prompt, model, num_predict, temperature, extra=None):
+        """Hash the normalized prompt together with the model and options"""
+        material = json.dumps({
+            'prompt': cls.normalize_prompt(prompt),
+            'model': model,
+            'num_predict': num_predict,
+            'temperature': temperature,
+            'extra': extra,
+        }, sort_keys=True)
+        return hashlib.sha256(material.encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key):
+        """Return the cached text for key, or None"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and not self._expired(entry['created']):
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return entry['text']
+
+        entry = self._read_disk(key)
+
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self._remember(key, entry)
+            self.hits += 1
+            return entry['text']
+
+    def set(self, key, text):
+        """Store text under key in memory and on disk"""
+        entry = {'text': text, 'created': time.time()}
+
+        with self._lock:
+            self._remember(key, entry)
+
+        self._write_disk(key, entry)
+
+    def stats(self):
+        """Counters for the /health endpoint"""
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'memory_entries': len(self._memory),
+                'disk_bytes': self._disk_bytes,
+            }
+
+    def _expired(self, created):
+        return time.time() - created > self.max_age_seconds
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self._expired(entry.get('created', 0)):
+            self._remove_file(path)
+            return None
+        return entry
+
+    def _write_disk(self, key, entry):
+        path = self._path(key)
+        content = json.dumps(entry).encode('utf-8')
+        # Writing under the lock keeps the size total exact when two requests
+        # store the same key; the file is small next to the generation before it
+        with self._lock:
+            try:
+                previous_size = path.stat().st_size
+            except OSError:
+                previous_size = 0
+            try:
+                path.parent.mkdir(parents=True, exist_ok=True)
+                write_atomic(path, content)
+            except OSError as e:
+                print(f"Warning: Could not write cache entry: {e}")
+                return
+
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk_bytes()
+            else:
+                # Rewriting a key replaces its old file rather than adding one
+                self._disk_bytes += len(content) - previous_size
+            over_budget = self._disk_bytes > self.max_disk_bytes
+
+        if over_budget:
+            self.evict()
+
+    def _scan_disk_bytes(self):
+        if not self.directory.exists():
+            return 0
+        return sum(p.stat().st_size for p in self.directory.glob('*/*.json'))
+
+    def _remove_file(self, path):
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        with self._lock:
+            if self._disk_bytes is not None:
+                self._disk_bytes = max(0, self._disk_bytes - size)
+            self.evictions += 1
+
+    def evict(self):
+        """Drop expired entries, then the oldest ones until under the size budget"""
+        if not self.directory.exists():
+            return
+
+        now = time.time()
+        files = []
+        for path in self.directory.glob('*/*.json'):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if now - stat.st_mtime > self.max_age_seconds:
+                self._remove_file(path)
+            else:
+                files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        files.sort()
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            self._remove_file(path)
+            total -= size
+
+        with self._lock:
+            self._disk_bytes = total
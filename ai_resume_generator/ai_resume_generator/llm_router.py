@@ -0,0 +1,471 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from llm_cache import generation_extra
+
+
+class NoBackendAvailable(Exception):
+    """Raised when every backend is down or its circuit is open"""
+
+
+def is_retryable(error):
+    """Connection failures, timeouts and 5xx answers are worth trying on another backend"""
+    if isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout)):
+        return True
+    if isinstance(error, requests.exceptions.HTTPError):
+        response = error.response
+        return response is None or response.status_code >= 500
+    return False
+
+
+class Backend:
+    """One Ollama instance with its load, latency and circuit-breaker state"""
+
+    def __init__(self, client, failure_threshold=3, cooldown=30):
+        self.client = client
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+
+        self.outstanding = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency = None
+        self.open_until = 0.0
+        self.trial_in_flight = False
+        self.loaded_models = set()
+        self.last_probe = None
+
+    @property
+    def url(self):
+        return self.client.base_url
+
+    @property
+    def state(self):
+        if self.consecutive_failures < self.failure_threshold:
+            return 'closed'
+        return 'open' if time.time() < self.open_until else 'half-open'
+
+    def available(self):
+        """Closed circuits take traffic; a half-open one lets a single trial request through"""
+        state = self.state
+        return state == 'closed' or (state == 'half-open' and not self.trial_in_flight)
+
+    def has_model(self, model_name):
+        return model_name in self.loaded_models
+
+    def acquire(self):
+        self.outstanding += 1
+        self.requests += 1
+        if self.state == 'half-open':
+            self.trial_in_flight = True
+
+    def release(self, elapsed=None, error=None):
+        self.outstanding -= 1
+        self.trial_in_flight = False
+        if error is None:
+            self.consecutive_failures = 0
+            if elapsed is not None:
+                # Exponentially weighted moving average of request latency
+                self.latency = elapsed if self.latency is None else 0.8 * self.latency + 0.2 * elapsed
+        else:
+            self.record_failure()
+
+    def abandon(self):
+        """Free the slot without counting the request as a success or a failure"""
+        self.outstanding -= 1
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.consecutive_failures >= self.failure_threshold:
+            self.open_until = time.time() + self.cooldown
+
+    def to_dict(self):
+        return {
+            'url': self.url,
+            'state': self.state,
+            'outstanding': self.outstanding,
+            'requests': self.requests,
+            'failures': self.failures,
+            'latency_seconds': round(self.latency, 3) if self.latency is not None else None,
+            'loaded_models': sorted(self.loaded_models),
+            'last_probe': self.last_probe,
+        }
+
+
+class LLMRouter:
+    """Spreads generation requests over several Ollama backends.
+
+    Each request goes to the available backend with the fewest requests in
+    flight, preferring backends that already have the model loaded and,
+    on ties, the one with the lowest recent latency. Connection errors,
+    timeouts and 5xx answers fail over to the next backend; a backend that
+    fails ``failure_threshold`` times in a row is skipped for ``cooldown``
+    seconds and then gets a single trial request. A background probe reads
+    /api/ps on every backend to learn which models are resident.
+
+    The router exposes the same interface as ``LocalLLM`` so it can be used
+    wherever a single client was.
+    """
+
+    def __init__(self, clients, cache=None, failure_threshold=3, cooldown=30, probe_interval=10, affinity_weight=2):
+        if not clients:
+            raise ValueError('LLMRouter needs at least one backend')
+        self.backends = [Backend(client, failure_threshold, cooldown) for client in clients]
+        # Responses are cached here, once, rather than in each backend client
+        self.cache = cache
+        self._set_on_clients('cache', None)
+        self.probe_interval = probe_interval
+        # How many extra in-flight requests a backend with the model loaded is worth
+        self.affinity_weight = affinity_weight
+
+        self._lock = threading.Lock()
+        self._prober_pid = None
+
+    # Settings shared by every backend client
+
+    @property
+    def primary(self):
+        return self.backends[0].client
+
+    def _set_on_clients(self, name, value):
+        for backend in self.backends:
+            setattr(backend.client, name, value)
+
+    @property
+    def model_name(self):
+        return self.primary.model_name
+
+    @model_name.setter
+    def model_name(self, value):
+        self._set_on_clients('model_name', value)
+
+    @property
+    def keep_alive(self):
+        return self.primary.keep_alive
+
+    @property
+    def temperature(self):
+        return self.primary.temperature
+
+    @property
+    def last_used(self):
+        return max(backend.client.last_used for backend in self.backends)
+
+    # Backend selection
+
+    def _ensure_prober(self):
+        if self.probe_interval <= 0 or self._prober_pid == os.getpid():
+            return
+        self._prober_pid = os.getpid()
+        threading.Thread(target=self._probe_forever, name='llm-router-probe', daemon=True).start()
+
+    def _probe_forever(self):
+        while True:
+            self.probe()
+            time.sleep(self.probe_interval)
+
+    def probe(self):
+        """Refresh which models each backend has loaded; failures count against the circuit"""
+        for backend in self.backends:
+            if backend.state == 'open':
+                continue
+            try:
+                models = set(backend.client.loaded_models())
+            except Exception as e:
+                if not is_retryable(e):
+                    # e.g. an Ollama too old for /api/ps: reachable, just no affinity data
+                    continue
+                with self._lock:
+                    backend.record_failure()
+                print(f"Warning: Ollama backend {backend.url} probe failed: {e}")
+                continue
+            with self._lock:
+                backend.loaded_models = models
+                backend.last_probe = time.time()
+                if backend.outstanding == 0:
+                    backend.consecutive_failures = 0
+
+    def _acquire(self, exclude, model=None):
+        """Pick and reserve the best available backend for model (default model_name)"""
+        self._ensure_prober()
+        model_name = model or self.model_name
+        with self._lock:
+            candidates = [b for b in self.backends if b not in exclude and b.available()]
+            if not candidates:
+                raise NoBackendAvailable(
+                    f"No Ollama backend available ({len(self.backends)} configured, {len(exclude)} failed)"
+                )
+
+            def score(backend):
+                penalty = 0 if backend.has_model(model_name) else self.affinity_weight
+                latency = backend.latency if backend.latency is not None else 0.0
+                return (backend.outstanding + penalty, latency)
+
+            backend = min(candidates, key=score)
+            backend.acquire()
+            return backend
+
+    def _release(self, backend, start, error=None, model=None):
+        with self._lock:
+            backend.release(time.perf_counter() - start, error)
+            if error is None:
+                # A successful generate leaves the model resident (keep_alive)
+                backend.loaded_models.add(model or self.model_name)
+
+    def _abandon(self, backend):
+        with self._lock:
+            backend.abandon()
+
+    # LocalLLM interface
+
+    def _cache_key(self, prompt, max_tokens, response_format=None, model=None, system=None):
+        if self.cache is None:
+            return None
+        return self.cache.make_key(prompt, model or self.model_name, max_tokens, self.temperature,
+                                   generation_extra(response_format, system))
+
+    def complete(self, prompt, max_tokens=1000, response_format=None, model=None, system=None, regenerate=False):
+        """Generate on the best backend, failing over on connection and server errors"""
+        cache_key = self._cache_key(prompt, max_tokens, response_format, model, system)
+        if cache_key and not regenerate:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        text = self._complete_uncached(prompt, max_tokens, response_format, model, system)
+        if cache_key:
+            self.cache.set(cache_key, text)
+        return text
+
+    def _complete_uncached(self, prompt, max_tokens, response_format, model, system):
+        tried = []
+        while True:
+            try:
+                backend = self._acquire(tried, model)
+            except NoBackendAvailable:
+                if tried:
+                    raise last_error
+                raise
+            tried.append(backend)
+            start = time.perf_counter()
+            try:
+                text = backend.client.complete(prompt, max_tokens, response_format, model, system)
+            except Exception as e:
+                if not is_retryable(e):
+                    # A bad request says nothing about the backend's health
+                    # or which models it holds
+                    self._abandon(backend)
+                    raise
+                self._release(backend, start, e, model)
+                print(f"Warning: Ollama backend {backend.url} failed, trying another: {e}")
+                last_error = e
+                continue
+            self._release(backend, start, model=model)
+            return text
+
+    def generate_text(self, prompt, max_tokens=1000, model=None, system=None, regenerate=False):
+        """Generate text using the pool of local Ollama backends"""
+        try:
+            return self.complete(prompt, max_tokens, model=model, system=system, regenerate=regenerate)
+        except (requests.exceptions.ConnectionError, NoBackendAvailable):
+            return "Connection failed: Is Ollama running? Start it with 'ollama serve'"
+        except requests.exceptions.HTTPError as e:
+            return str(e)
+        except Exception as e:
+            return f"Unexpected error: {str(e)}"
+
+    def stream_text(self, prompt, max_tokens=1000, model=None, system=None, regenerate=False):
+        """Stream from the best backend; fails over only until the first chunk arrives.
+
+        A cached response is yielded as a single chunk.
+        """
+        cache_key = self._cache_key(prompt, max_tokens, model=model, system=system)
+        if cache_key and not regenerate:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        for chunk in self._stream_uncached(prompt, max_tokens, model, system):
+            chunks.append(chunk)
+            yield chunk
+        if cache_key:
+            self.cache.set(cache_key, ''.join(chunks))
+
+    def _stream_uncached(self, prompt, max_tokens, model, system):
+        tried = []
+        while True:
+            try:
+                backend = self._acquire(tried, model)
+            except NoBackendAvailable:
+                if tried:
+                    raise last_error
+                raise
+            tried.append(backend)
+            start = time.perf_counter()
+            started = False
+            try:
+                for chunk in backend.client.stream_text(prompt, max_tokens, model, system):
+                    started = True
+                    yield chunk
+            except GeneratorExit:
+                # The consumer stopped early (e.g. a cancelled job); not the backend's fault
+                self._release(backend, start, model=model)
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    self._abandon(backend)
+                    raise
+                self._release(backend, start, e, model)
+                if started:
+                    raise
+                print(f"Warning: Ollama backend {backend.url} failed, trying another: {e}")
+                last_error = e
+                continue
+            self._release(backend, start, model=model)
+            return
+
+    # Async versions for the asyncio serving mode (asgi.py); same selection and failover
+
+    async def acomplete(self, prompt, max_tokens=1000, response_format=None, model=None, system=None, regenerate=False):
+        cache_key = self._cache_key(prompt, max_tokens, response_format, model, system)
+        if cache_key and not regenerate:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        tried = []
+        while True:
+            try:
+                backend = self._acquire(tried, model)
+            except NoBackendAvailable:
+                if tried:
+                    raise last_error
+                raise
+            tried.append(backend)
+            start = time.perf_counter()
+            try:
+                text = await backend.client.acomplete(prompt, max_tokens, response_format, model, system)
+            except asyncio.CancelledError:
+                # The client went away; not the backend's fault
+                self._release(backend, start, model=model)
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    # A bad request says nothing about the backend's health
+                    # or which models it holds
+                    self._abandon(backend)
+                    raise
+                self._release(backend, start, e, model)
+                print(f"Warning: Ollama backend {backend.url} failed, trying another: {e}")
+                last_error = e
+                continue
+            self._release(backend, start, model=model)
+            break
+
+        if cache_key:
+            self.cache.set(cache_key, text)
+        return text
+
+    async def agenerate_text(self, prompt, max_tokens=1000, model=None, system=None, regenerate=False):
+        """Async generate_text(): errors come back as text"""
+        try:
+            return await self.acomplete(prompt, max_tokens, model=model, system=system, regenerate=regenerate)
+        except (requests.exceptions.ConnectionError, NoBackendAvailable):
+            return "Connection failed: Is Ollama running? Start it with 'ollama serve'"
+        except requests.exceptions.HTTPError as e:
+            return str(e)
+        except Exception as e:
+            return f"Unexpected error: {str(e)}"
+
+    async def astream_text(self, prompt, max_tokens=1000, model=None, system=None, regenerate=False):
+        cache_key = self._cache_key(prompt, max_tokens, model=model, system=system)
+        if cache_key and not regenerate:
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                yield cached
+                return
+
+        chunks = []
+        tried = []
+        while True:
+            try:
+                backend = self._acquire(tried, model)
+            except NoBackendAvailable:
+                if tried:
+                    raise last_error
+                raise
+            tried.append(backend)
+            start = time.perf_counter()
+            started = False
+            try:
+                async for chunk in backend.client.astream_text(prompt, max_tokens, model, system):
+                    started = True
+                    chunks.append(chunk)
+                    yield chunk
+            except (GeneratorExit, asyncio.CancelledError):
+                self._release(backend, start, model=model)
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    self._abandon(backend)
+                    raise
+                self._release(backend, start, e, model)
+                if started:
+                    raise
+                print(f"Warning: Ollama backend {backend.url} failed, trying another: {e}")
+                last_error = e
+                continue
+            self._release(backend, start, model=model)
+            break
+
+        if cache_key:
+            self.cache.set(cache_key, ''.join(chunks))
+
+    def list_models(self):
+        """Models pulled on any reachable backend; raises if none answer"""
+        models = []
+        last_error = None
+        for backend in self.backends:
+            try:
+                for name in backend.client.list_models():
+                    if name not in models:
+                        models.append(name)
+            except Exception as e:
+                last_error = e
+        if last_error is not None and not models:
+            raise last_error
+        return models
+
+    def warm_up(self):
+        """Load the model on every backend at once; returns the slowest load time"""
+        with ThreadPoolExecutor(max_workers=len(self.backends)) as executor:
+            futures = [(backend, executor.submit(backend.client.warm_up)) for backend in self.backends]
+
+        load_times = []
+        errors = []
+        for backend, future in futures:
+            try:
+                load_times.append(future.result())
+                with self._lock:
+                    backend.loaded_models.add(self.model_name)
+            except Exception as e:
+                errors.append(f"{backend.url}: {e}")
+        if not load_times:
+            raise RuntimeError('; '.join(errors))
+        for error in errors:
+            print(f"Warning: Model warm-up failed on {error}")
+        return max(load_times)
+
+    def stats(self):
+        with self._lock:
+            return [backend.to_dict() for backend in self.backends]
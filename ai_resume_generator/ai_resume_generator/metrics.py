@@ -0,0 +1,207 @@
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_local = threading.local()
+
+
+def _format_labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge:
+    """A value read from a callback each time the metrics are rendered"""
+
+    def __init__(self, name, documentation, read):
+        self.name = name
+        self.documentation = documentation
+        self.read = read
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            lines.append(f"{self.name} {_format_value(self.read())}")
+        except Exception:
+            pass
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, '')) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets, counts):
+                    cumulative += bucket_count
+                    labels = _format_labels(self.labelnames, key, le=_format_value(float(bound)))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le='+Inf')} {count}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, read):
+        return self._register(Gauge(name, documentation, read))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+class Trace:
+    """Stage timings and LLM stats collected for one request or job"""
+
+    def __init__(self, trace_id=None):
+        self.id = trace_id or uuid.uuid4().hex[:16]
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.llm = {}
+        self._lock = threading.Lock()
+
+    def add(self, stage, seconds):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def add_llm(self, stats, summed=('tokens', 'prompt_tokens', 'prompt_ms', 'load_ms')):
+        """Merge one generation's stats; counts add up when a request makes several calls"""
+        with self._lock:
+            for key, value in stats.items():
+                self.llm[key] = self.llm.get(key, 0) + value if key in summed else value
+            self.llm['calls'] = self.llm.get('calls', 0) + 1
+
+    def to_dict(self):
+        return {
+            'trace_id': self.id,
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'stages_ms': {stage: round(seconds * 1000, 2) for stage, seconds in self.stages.items()},
+            'llm': dict(self.llm),
+        }
+
+
+def current_trace():
+    """Return the trace collecting on this thread, or None"""
+    return getattr(_local, 'trace', None)
+
+
+def begin_trace(trace_id=None):
+    _local.trace = Trace(trace_id)
+    return _local.trace
+
+
+def end_trace():
+    trace = current_trace()
+    _local.trace = None
+    return trace
+
+
+@contextmanager
+def request_trace(trace_id=None):
+    """Collect a trace on this thread for the duration of the block"""
+    previous = current_trace()
+    trace = begin_trace(trace_id)
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+@contextmanager
+def attach_trace(trace):
+    """Collect into an existing trace from another thread, e.g. an executor worker"""
+    previous = current_trace()
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+@contextmanager
+def timed(histogram, stage, **labels):
+    """Time a block (or, as a decorator, a call) into histogram and the current trace"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        histogram.observe(elapsed, stage=stage, **labels)
+        trace = current_trace()
+        if trace is not None:
+            trace.add(stage, elapsed)
@@ -0,0 +1,209 @@
+"""Page-fit estimates for the resume templates.
+
+Turns the page area left under each template's header into token budgets for
+the model (num_predict), and trims generated sections afterwards so they fit
+in page_limit pages. Text is measured with an average glyph width instead of
+real font metrics: close enough to keep a one-page resume on one page
+without rendering it first.
+"""
+import math
+import re
+from dataclasses import dataclass
+
+POINTS_PER_INCH = 72
+# US letter with the 0.5in top/bottom and 0.7in left/right margins both renderers use
+CONTENT_WIDTH = (8.5 - 2 * 0.7) * POINTS_PER_INCH
+CONTENT_HEIGHT = (11 - 2 * 0.5) * POINTS_PER_INCH
+
+# Roughly four characters, or three quarters of a word, of English per token
+CHARS_PER_TOKEN = 4.0
+WORDS_PER_TOKEN = 0.75
+# Short last lines and bullets leave part of each line empty
+FILL_FACTOR = 0.85
+# Tokens a section heading costs when the model writes it itself
+HEADING_TOKENS = 6
+MIN_SECTION_TOKENS = 40
+# Trimming stops taking bullets from a list once it is this short
+MIN_BULLETS = 2
+
+BULLET_MARKERS = ('-', '•', '*')
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+
+
+@dataclass(frozen=True)
+class TemplateLayout:
+    """Vertical space a template uses, in points (see ResumeTemplates and pdf_templates)"""
+
+    header_height: float
+    heading_height: float
+    font_size: float = 10.5
+    leading: float = 13.125
+    paragraph_gap: float = 6
+    bullet_gap: float = 2
+    bullet_indent: float = 12
+    # Average glyph width as a fraction of the font size
+    char_width: float = 0.5
+
+    def chars_per_line(self, indent=0):
+        return max(1, int((CONTENT_WIDTH - indent) / (self.font_size * self.char_width)))
+
+    def line_count(self, text, indent=0):
+        width = self.chars_per_line(indent)
+        return sum(max(1, math.ceil(len(line) / width)) for line in text.split('\n'))
+
+    def paragraph_height(self, text):
+        return self.line_count(text) * self.leading + self.paragraph_gap
+
+    def bullet_height(self, text):
+        return self.line_count(text, self.bullet_indent) * self.leading + self.bullet_gap
+
+    def available_height(self, page_limit):
+        return page_limit * CONTENT_HEIGHT - self.header_height
+
+    def tokens_for_height(self, height):
+        lines = max(0.0, height) / self.leading
+        return int(lines * self.chars_per_line() * FILL_FACTOR / CHARS_PER_TOKEN)
+
+
+LAYOUTS = {
+    # Name and title row, contact and links row, rule
+    'modern': TemplateLayout(header_height=62, heading_height=32),
+    # Centred name, contact line, links line, double rule
+    'classic': TemplateLayout(header_height=64, heading_height=29, char_width=0.45),
+    # Shaded sidebar table with name, contact and links, one per line
+    'creative': TemplateLayout(header_height=150, heading_height=28),
+    # Large name, title, contact line, links line, rule
+    'minimal': TemplateLayout(header_height=104, heading_height=33),
+}
+
+
+def get_layout(template_choice):
+    return LAYOUTS.get(template_choice, LAYOUTS['modern'])
+
+
+def tightest_layout(page_limit):
+    """The template with the least room for text; budgets sized for it fit every template"""
+    return min(LAYOUTS, key=lambda name: LAYOUTS[name].tokens_for_height(LAYOUTS[name].available_height(page_limit)))
+
+
+def word_target(max_tokens):
+    """Words to ask the model for: a little under the budget so it ends before num_predict cuts it off"""
+    return max(10, int(max_tokens * WORDS_PER_TOKEN * 0.9) // 10 * 10)
+
+
+def section_budgets(template_choice, page_limit, sections):
+    """Split the page area into num_predict budgets.
+
+    template_choice=None sizes them for the tightest_layout().
+
+    sections is a list of (heading, weight, cap); each section gets a share
+    of the area by weight, never more than cap tokens. What a capped section
+    can't use goes to the others. Returns {heading: tokens}.
+    """
+    layout = get_layout(template_choice or tightest_layout(page_limit))
+    height = layout.available_height(page_limit) - layout.heading_height * len(sections)
+    remaining = layout.tokens_for_height(height)
+
+    budgets = {}
+    open_sections = list(sections)
+    while open_sections:
+        total_weight = sum(weight for _, weight, _ in open_sections)
+        capped = [(heading, cap) for heading, weight, cap in open_sections
+                  if remaining * weight / total_weight >= cap]
+        if not capped:
+            for heading, weight, _ in open_sections:
+                budgets[heading] = max(MIN_SECTION_TOKENS, int(remaining * weight / total_weight))
+            break
+        for heading, cap in capped:
+            budgets[heading] = cap
+            remaining -= cap
+        open_sections = [section for section in open_sections if section[0] not in budgets]
+    return budgets
+
+
+def _is_bullet(line):
+    return line.lstrip().startswith(BULLET_MARKERS)
+
+
+def sections_height(sections, layout):
+    height = 0.0
+    for section in sections:
+        if section.get('heading'):
+            height += layout.heading_height
+        if section.get('body'):
+            height += layout.paragraph_height(section['body'])
+        height += sum(layout.bullet_height(bullet) for bullet in section.get('bullets') or [])
+    return height
+
+
+def _bullet_count(section):
+    lines = section['body'].split('\n') if section.get('body') else []
+    return len(section.get('bullets') or []) + sum(1 for line in lines if _is_bullet(line))
+
+
+def _drop_last_bullet(section):
+    if section.get('bullets'):
+        section['bullets'] = section['bullets'][:-1]
+        return
+    lines = section['body'].split('\n')
+    index = max(i for i, line in enumerate(lines) if _is_bullet(line))
+    section['body'] = '\n'.join(lines[:index] + lines[index + 1:])
+
+
+def _condense(section):
+    """Drop the last sentence of the body's longest multi-sentence line; False if there is none"""
+    lines = section['body'].split('\n') if section.get('body') else []
+    candidates = [(len(line), i) for i, line in enumerate(lines) if len(_SENTENCE_END.split(line.strip())) > 1]
+    if not candidates:
+        return False
+    _, index = max(candidates)
+    sentences = _SENTENCE_END.split(lines[index].strip())
+    lines[index] = ' '.join(sentences[:-1])
+    section['body'] = '\n'.join(lines)
+    return True
+
+
+def _trim_once(sections):
+    """Remove the least valuable piece of text; False when nothing is left to remove"""
+    # Extra bullets go first, from the longest list
+    counts = [(_bullet_count(section), i) for i, section in enumerate(sections)]
+    count, index = max(counts, default=(0, None))
+    if count > MIN_BULLETS:
+        _drop_last_bullet(sections[index])
+        return True
+
+    # Then long paragraphs lose sentences, longest first
+    by_length = sorted(sections, key=lambda section: len(section.get('body') or ''), reverse=True)
+    if any(_condense(section) for section in by_length):
+        return True
+
+    # Then whatever comes last, line by line
+    for section in reversed(sections):
+        if section.get('bullets'):
+            section['bullets'] = section['bullets'][:-1]
+            return True
+        if section.get('body'):
+            section['body'] = section['body'].rsplit('\n', 1)[0] if '\n' in section['body'] else ''
+            return True
+    return False
+
+
+def fit_sections(sections, template_choice, page_limit):
+    """Trim sections to the estimated page area; returns (sections, trimmed).
+
+    Bullets beyond MIN_BULLETS go first (from the longest list), then the
+    last sentences of long paragraphs, then lines from the end. Sections left
+    empty are dropped. The input list is not modified.
+    """
+    layout = get_layout(template_choice)
+    available = layout.available_height(page_limit)
+    if sections_height(sections, layout) <= available:
+        return sections, False
+
+    fitted = [dict(section, bullets=list(section.get('bullets') or [])) for section in sections]
+    while sections_height(fitted, layout) > available and _trim_once(fitted):
+        pass
+    # A bare heading that was bare to begin with stays (its text may follow in other sections)
+    kept = [fitted_section for section, fitted_section in zip(sections, fitted)
+            if fitted_section['body'] or fitted_section['bullets'] or not (section.get('body') or section.get('bullets'))]
+    return kept, True
@@ -0,0 +1,265 @@
+"""Native PDF rendering with reportlab platypus.
+
+Mirrors the DOCX layouts in ResumeTemplates (modern, classic, creative,
+minimal) and the cover letter, without going through Word or LibreOffice.
+"""
+import io
+from datetime import datetime
+from functools import lru_cache
+from xml.sax.saxutils import escape, quoteattr
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_CENTER, TA_RIGHT
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import inch
+    from reportlab.platypus import HRFlowable, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+    PDF_AVAILABLE = True
+except ImportError:
+    PDF_AVAILABLE = False
+
+ACCENT = '#2E86AB'
+LINK_COLOR = '#0563C1'
+SOCIAL_FIELDS = (('linkedin', 'LinkedIn'), ('github', 'GitHub'), ('portfolio', 'Portfolio'))
+
+FONTS = {
+    'modern': ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique'),
+    'classic': ('Times-Roman', 'Times-Bold', 'Times-Italic'),
+    'creative': ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique'),
+    'minimal': ('Helvetica', 'Helvetica-Bold', 'Helvetica-Oblique'),
+}
+
+
+@lru_cache(maxsize=None)
+def get_styles(template):
+    """Build the paragraph styles for a template once and reuse them across requests"""
+    regular, bold, italic = FONTS.get(template, FONTS['modern'])
+
+    def style(name, **kwargs):
+        kwargs.setdefault('fontName', regular)
+        kwargs.setdefault('fontSize', 10.5)
+        kwargs.setdefault('leading', kwargs['fontSize'] * 1.25)
+        return ParagraphStyle(f"{template}-{name}", **kwargs)
+
+    styles = {
+        'body': style('body', spaceAfter=6),
+        'bullet': style('bullet', leftIndent=12, bulletIndent=2, spaceAfter=2),
+        'contact': style('contact', fontSize=10),
+        'contact_right': style('contact_right', fontSize=10, alignment=TA_RIGHT),
+    }
+
+    if template == 'modern':
+        styles.update(
+            name=style('name', fontName=bold, fontSize=20, textColor=colors.HexColor(ACCENT)),
+            title=style('title', fontName=italic, fontSize=14, alignment=TA_RIGHT),
+            heading=style('heading', fontName=bold, fontSize=14, textColor=colors.HexColor(ACCENT),
+                          spaceBefore=10, spaceAfter=4),
+        )
+    elif template == 'classic':
+        styles.update(
+            name=style('name', fontName=bold, fontSize=18, alignment=TA_CENTER),
+            contact=style('contact', fontSize=11, alignment=TA_CENTER),
+            heading=style('heading', fontName=bold, fontSize=12, spaceBefore=10, spaceAfter=4),
+        )
+    elif template == 'creative':
+        white = colors.white
+        styles.update(
+            name=style('name', fontName=bold, fontSize=16, textColor=white, spaceAfter=8),
+            sidebar_heading=style('sidebar_heading', fontName=bold, textColor=white, spaceBefore=6),
+            sidebar=style('sidebar', fontSize=9, textColor=white),
+            title=style('title', fontName=bold, fontSize=14, textColor=colors.HexColor(ACCENT)),
+            heading=style('heading', fontName=bold, fontSize=11, textColor=colors.HexColor(ACCENT),
+                          spaceBefore=10, spaceAfter=4),
+        )
+    else:
+        styles.update(
+            name=style('name', fontName=bold, fontSize=24),
+            title=style('title', fontSize=12, textColor=colors.HexColor('#606060'), spaceAfter=12),
+            heading=style('heading', fontName=bold, fontSize=12, spaceBefore=12, spaceAfter=6),
+        )
+
+    return styles
+
+
+@lru_cache(maxsize=None)
+def get_cover_letter_styles():
+    return {
+        'name': ParagraphStyle('letter-name', fontName='Helvetica-Bold', fontSize=14, leading=18),
+        'body': ParagraphStyle('letter-body', fontName='Helvetica', fontSize=11, leading=14, spaceAfter=10),
+        'subject': ParagraphStyle('letter-subject', fontName='Helvetica-Bold', fontSize=11, leading=14, spaceAfter=10),
+    }
+
+
+def _text(value):
+    """Escape user text for reportlab's paragraph markup, keeping line breaks"""
+    return escape(value or '').replace('\n', '<br/>')
+
+
+def _link(label, url, color=LINK_COLOR):
+    return f'<link href={quoteattr(url)} color="{color}"><u>{escape(label)}</u></link>'
+
+
+def _social_links(data, separator, labels=None, color=LINK_COLOR):
+    labels = labels or {}
+    links = [_link(labels.get(field, label), data[field], color)
+             for field, label in SOCIAL_FIELDS if data.get(field)]
+    return separator.join(links)
+
+
+def _contact_line(data, separator, fields=('email', 'phone', 'location')):
+    return separator.join(escape(data[field]) for field in fields if data.get(field))
+
+
+def _document(buffer, title):
+    return SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        title=title,
+        topMargin=0.5 * inch,
+        bottomMargin=0.5 * inch,
+        leftMargin=0.7 * inch,
+        rightMargin=0.7 * inch,
+    )
+
+
+def _borderless_table(rows, col_widths, extra_styles=()):
+    table = Table(rows, colWidths=col_widths)
+    table.setStyle(TableStyle([
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+        *extra_styles,
+    ]))
+    return table
+
+
+class PDFTemplates:
+    @staticmethod
+    def create_modern_template(story, data, styles, width):
+        """Modern Professional Template"""
+        rows = [
+            [Paragraph(_text(data.get('name')), styles['name']),
+             Paragraph(_text(data.get('job_title')), styles['title'])],
+            [Paragraph(_contact_line(data, ' | '), styles['contact']),
+             Paragraph(_social_links(data, ' | '), styles['contact_right'])],
+        ]
+        story.append(_borderless_table(rows, [width / 2, width / 2]))
+        story.append(HRFlowable(width='100%', thickness=0.75, color=colors.black, spaceBefore=4, spaceAfter=6))
+
+    @staticmethod
+    def create_classic_template(story, data, styles, width):
+        """Classic Professional Template"""
+        story.append(Paragraph(_text(data.get('name')), styles['name']))
+        contact = _contact_line(data, ' • ')
+        if contact:
+            story.append(Paragraph(contact, styles['contact']))
+        links = _social_links(data, ' • ', {'linkedin': 'LinkedIn Profile', 'github': 'GitHub Profile'})
+        if links:
+            story.append(Paragraph(links, styles['contact']))
+        story.append(HRFlowable(width='100%', thickness=2, color=colors.black, spaceBefore=4, spaceAfter=6))
+
+    @staticmethod
+    def create_creative_template(story, data, styles, width):
+        """Creative Modern Template"""
+        sidebar = [
+            Paragraph(_text(data.get('name')), styles['name']),
+            Paragraph('CONTACT', styles['sidebar_heading']),
+        ]
+        for field in ('email', 'phone'):
+            if data.get(field):
+                sidebar.append(Paragraph(_text(data[field]), styles['sidebar']))
+
+        if any(data.get(field) for field, _ in SOCIAL_FIELDS):
+            sidebar.append(Paragraph('LINKS', styles['sidebar_heading']))
+            for field, label in SOCIAL_FIELDS:
+                if data.get(field):
+                    sidebar.append(Paragraph(_link(label, data[field], '#FFFFFF'), styles['sidebar']))
+
+        main = [Paragraph(_text(data.get('job_title')), styles['title'])]
+
+        left_width = 2.0 * inch
+        story.append(_borderless_table(
+            [[sidebar, main]],
+            [left_width, width - left_width],
+            [('BACKGROUND', (0, 0), (0, 0), colors.HexColor(ACCENT)),
+             ('LEFTPADDING', (0, 0), (0, 0), 8),
+             ('RIGHTPADDING', (0, 0), (0, 0), 8),
+             ('TOPPADDING', (0, 0), (0, 0), 8),
+             ('BOTTOMPADDING', (0, 0), (0, 0), 8),
+             ('LEFTPADDING', (1, 0), (1, 0), 12)]
+        ))
+        story.append(Spacer(1, 8))
+
+    @staticmethod
+    def create_minimal_template(story, data, styles, width):
+        """Minimal Clean Template"""
+        story.append(Paragraph(_text(data.get('name')), styles['name']))
+        story.append(Paragraph(_text(data.get('job_title')), styles['title']))
+        story.append(Paragraph(_contact_line(data, ' • '), styles['contact']))
+        links = _social_links(data, ' • ')
+        if links:
+            story.append(Paragraph(links, styles['contact']))
+        story.append(HRFlowable(width='70%', thickness=0.75, color=colors.HexColor('#C0C0C0'),
+                                hAlign='LEFT', spaceBefore=6, spaceAfter=12))
+
+
+PDF_TEMPLATES = {
+    'modern': PDFTemplates.create_modern_template,
+    'classic': PDFTemplates.create_classic_template,
+    'creative': PDFTemplates.create_creative_template,
+    'minimal': PDFTemplates.create_minimal_template,
+}
+
+
+def build_resume_pdf(data, sections, template_choice, page_limit):
+    """Render a resume from parsed sections straight to PDF bytes"""
+    styles = get_styles(template_choice)
+    buffer = io.BytesIO()
+    doc = _document(buffer, f"{data.get('name', '')} - Resume")
+
+    story = []
+    PDF_TEMPLATES[template_choice](story, data, styles, doc.width)
+
+    for section in sections:
+        if section['heading']:
+            heading = section['heading'].upper() if template_choice == 'creative' else section['heading']
+            story.append(Paragraph(_text(heading), styles['heading']))
+        if section['body']:
+            story.append(Paragraph(_text(section['body']), styles['body']))
+        for bullet in section.get('bullets') or []:
+            story.append(Paragraph(_text(bullet), styles['bullet'], bulletText='•'))
+
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def build_cover_letter_pdf(data, cover_letter_content):
+    """Render a cover letter straight to PDF bytes"""
+    styles = get_cover_letter_styles()
+    buffer = io.BytesIO()
+    doc = _document(buffer, f"{data.get('name', '')} - Cover Letter")
+
+    story = [Paragraph(_text(data.get('name')), styles['name'])]
+    contact = _contact_line(data, ' • ', fields=('email', 'phone'))
+    if contact:
+        story.append(Paragraph(contact, styles['body']))
+    links = _social_links(data, ' | ')
+    if links:
+        story.append(Paragraph(links, styles['body']))
+
+    story.append(Spacer(1, 12))
+    story.append(Paragraph(datetime.now().strftime('%B %d, %Y'), styles['body']))
+    story.append(Paragraph(f"Hiring Manager<br/>{_text(data.get('company'))}", styles['body']))
+    story.append(Paragraph(f"Re: {_text(data.get('position'))} Position", styles['subject']))
+    story.append(Paragraph('Dear Hiring Manager,', styles['body']))
+
+    for paragraph in (cover_letter_content or '').split('\n\n'):
+        if paragraph.strip():
+            story.append(Paragraph(_text(paragraph.strip()), styles['body']))
+
+    story.append(Spacer(1, 12))
+    story.append(Paragraph(f"Best regards,<br/>{_text(data.get('name'))}", styles['body']))
+
+    doc.build(story)
+    return buffer.getvalue()
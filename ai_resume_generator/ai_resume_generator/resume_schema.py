@@ -0,0 +1,176 @@
+"""Typed resume output from the model.
+
+The model is asked for JSON matching RESUME_SCHEMA (sent to Ollama as the
+``format`` field), and parse_resume_json turns the reply into the same list of
+``{'heading', 'body', 'bullets'}`` sections the renderers already consume.
+Truncated or slightly malformed JSON is fixed locally by repair_json instead
+of asking the model again.
+"""
+import json
+import re
+
+_string_list = {"type": "array", "items": {"type": "string"}}
+
+RESUME_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "skills": _string_list,
+        "experience": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "title": {"type": "string"},
+                    "company": {"type": "string"},
+                    "dates": {"type": "string"},
+                    "bullets": _string_list,
+                },
+                "required": ["title", "company", "bullets"],
+            },
+        },
+        "education": _string_list,
+        "certifications": _string_list,
+        "languages": _string_list,
+    },
+    "required": ["summary", "skills", "experience", "education"],
+}
+
+JSON_INSTRUCTIONS = """Respond only with a JSON object with these keys:
+"summary" (2-3 sentences), "skills" (list of strings),
+"experience" (list of objects with "title", "company", "dates" and "bullets", a list of achievements),
+"education" (list of strings), "certifications" (list of strings) and "languages" (list of strings)."""
+
+_TRAILING_COMMA = re.compile(r',\s*([}\]])')
+_CODE_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [line.strip(' -•*') for line in value.split('\n') if line.strip(' -•*')]
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if item is not None and str(item).strip()]
+    return [str(value)]
+
+
+def _as_text(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return ' '.join(str(item) for item in value)
+    return str(value).strip()
+
+
+def resume_sections(resume):
+    """Convert a parsed resume object into render-ready sections, one pass, no guessing"""
+    if not isinstance(resume, dict):
+        raise ValueError('Resume JSON must be an object')
+
+    sections = []
+    if resume.get('summary'):
+        sections.append({'heading': 'PROFESSIONAL SUMMARY', 'body': _as_text(resume['summary']), 'bullets': []})
+    if resume.get('skills'):
+        sections.append({'heading': 'CORE SKILLS', 'body': '', 'bullets': _as_list(resume['skills'])})
+
+    # One section per job; only the first carries the heading
+    heading = 'PROFESSIONAL EXPERIENCE'
+    for job in resume.get('experience') or []:
+        if isinstance(job, dict):
+            title = ', '.join(part for part in (_as_text(job.get('title')), _as_text(job.get('company'))) if part)
+            dates = _as_text(job.get('dates'))
+            body = f"{title} ({dates})" if dates else title
+            bullets = _as_list(job.get('bullets'))
+        else:
+            body, bullets = _as_text(job), []
+        sections.append({'heading': heading, 'body': body, 'bullets': bullets})
+        heading = None
+
+    for key, heading in (('education', 'EDUCATION'), ('certifications', 'CERTIFICATIONS'), ('languages', 'LANGUAGES')):
+        items = _as_list(resume.get(key))
+        if items:
+            sections.append({'heading': heading, 'body': '\n'.join(items), 'bullets': []})
+
+    if not sections:
+        raise ValueError('Resume JSON has no content')
+    return sections
+
+
+def _close_json(text):
+    """Close any string, array and object left open by a truncated reply"""
+    stack = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]' and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip(', :\n\t')
+    return text + ''.join(reversed(stack))
+
+
+def repair_json(text, max_attempts=20):
+    """Best-effort local fix for model JSON: code fences, trailing text or commas, truncation.
+
+    Returns (value, dropped), where dropped counts the trailing members that
+    had to be cut before the rest would parse.
+    """
+    text = _CODE_FENCE.sub('', text.strip())
+    start = text.find('{')
+    if start < 0:
+        raise ValueError('No JSON object in model output')
+    text = text[start:]
+
+    # strict=False accepts the raw newlines models like to leave in strings
+    decoder = json.JSONDecoder(strict=False)
+    for dropped in range(max_attempts):
+        candidate = _TRAILING_COMMA.sub(r'\1', _close_json(text))
+        try:
+            # raw_decode ignores anything the model wrote after the object
+            return decoder.raw_decode(candidate)[0], dropped
+        except ValueError:
+            pass
+        # Drop the last, probably incomplete, member and try again
+        cut = text.rfind(',')
+        if cut <= 0:
+            break
+        text = text[:cut]
+    raise ValueError('Model output is not valid JSON')
+
+
+def parse_resume_json(text):
+    """Parse model output into sections; returns (sections, status).
+
+    status is 'ok' for JSON that parsed as it was, 'repaired' when it needed
+    local fixes that kept all of it, and 'truncated' when members had to be
+    dropped to make it parse.
+    """
+    try:
+        return resume_sections(json.loads(text, strict=False)), 'ok'
+    except ValueError:
+        resume, dropped = repair_json(text)
+        return resume_sections(resume), 'truncated' if dropped else 'repaired'
+
+
+def sections_to_text(sections):
+    """Plain-text version of the sections, for the preview and the content store"""
+    blocks = []
+    for section in sections:
+        lines = [section['heading']] if section.get('heading') else []
+        if section.get('body'):
+            lines.append(section['body'])
+        lines.extend(f"- {bullet}" for bullet in section.get('bullets', []))
+        blocks.append('\n'.join(lines))
+    return '\n\n'.join(blocks)
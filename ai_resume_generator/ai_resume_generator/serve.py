@@ -0,0 +1,186 @@
+"""Production launcher for the resume generator.
+
+Runs the Flask app under gunicorn with threaded (gthread) workers, or under
+waitress where gunicorn is unavailable (Windows). Settings are read from the
+environment and a .env file (see config.py):
+
+    python serve.py                          # gunicorn if installed, else waitress
+    python serve.py --workers 2 --threads 32
+    python serve.py --server uvicorn         # asyncio mode, see asgi.py
+    python serve.py --server dev             # Flask development server
+
+Generation requests spend most of their time waiting on Ollama, so each
+worker runs many threads rather than there being many workers. The app is
+imported and the template skeletons compiled once in the gunicorn master
+before forking. On SIGTERM workers stop accepting connections, finish
+in-flight requests and queued jobs for up to GRACEFUL_TIMEOUT seconds, then
+exit.
+
+Jobs and batches are tracked in each worker's memory, so with more than one
+worker the /jobs and /batch endpoints need sticky routing. Generated content
+and documents are on disk, which every worker reads, so /render and /download
+work from any worker; the exception is PERSIST_DOCUMENTS=false with
+LAZY_DOCUMENTS=false, where documents only exist in the memory of the worker
+that built them.
+"""
+import argparse
+import importlib.util
+import os
+import signal
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from config import Config
+
+
+def server_settings(config, args):
+    """Apply command-line options over the configured settings"""
+    overrides = {
+        'web_server': args.server,
+        'host': args.host,
+        'port': args.port,
+        'web_workers': args.workers,
+        'web_threads': args.threads,
+    }
+    return replace(config, **{key: value for key, value in overrides.items() if value is not None})
+
+
+def drain_jobs(resume_app, timeout):
+    """Let queued and running jobs finish before the process exits"""
+    start = time.time()
+    if resume_app.job_queue.drain(timeout):
+        print(f"✅ Job queue drained in {time.time() - start:.1f}s (pid {os.getpid()})")
+    else:
+        print(f"Warning: Job queue not empty after {timeout}s, exiting anyway (pid {os.getpid()})")
+
+
+def gunicorn_available():
+    try:
+        import gunicorn.app.base  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def run_gunicorn(settings):
+    from gunicorn.app.base import BaseApplication
+
+    state = {}
+
+    def post_fork(server, worker):
+        # Threads don't survive fork, so the poller and warmer start in each worker
+        state['app'].start_background_services()
+
+    def worker_exit(server, worker):
+        # Runs in the worker after it stopped serving; the master kills it at graceful_timeout
+        drain_jobs(state['app'], max(1, settings.graceful_timeout - 5))
+
+    class GunicornServer(BaseApplication):
+        def load_config(self):
+            options = {
+                'bind': f"{settings.host}:{settings.port}",
+                'workers': settings.web_workers,
+                'worker_class': 'gthread',
+                'threads': settings.web_threads,
+                'preload_app': True,
+                'timeout': settings.web_timeout,
+                'graceful_timeout': settings.graceful_timeout,
+                'keepalive': settings.web_keepalive,
+                'post_fork': post_fork,
+                'worker_exit': worker_exit,
+            }
+            for key, value in options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            import app as resume_app
+            state['app'] = resume_app
+            # Directories and template skeletons once, in the master, before forking
+            return resume_app.create_app(start_background=False)
+
+    GunicornServer().run()
+
+
+def run_waitress(settings):
+    from waitress import serve
+
+    def stop(signum, frame):
+        # waitress stops its loop on KeyboardInterrupt and finishes running tasks
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, stop)
+    import app as resume_app
+    try:
+        # Single process, so there is nothing to preload
+        serve(resume_app.create_app(), host=settings.host, port=settings.port, threads=settings.web_threads)
+    finally:
+        drain_jobs(resume_app, settings.graceful_timeout)
+
+
+def run_uvicorn(settings):
+    import uvicorn
+
+    # asgi.py serves the generation endpoints as coroutines and the rest through Flask
+    uvicorn.run(
+        'asgi:application',
+        app_dir=str(Path(__file__).parent),
+        host=settings.host,
+        port=settings.port,
+        workers=settings.web_workers,
+        lifespan='on',
+        timeout_keep_alive=settings.web_keepalive,
+        timeout_graceful_shutdown=settings.graceful_timeout,
+    )
+
+
+def run_dev(settings):
+    import app as resume_app
+    resume_app.create_app().run(debug=settings.debug, host=settings.host, port=settings.port, threaded=True)
+
+
+SERVERS = {
+    'gunicorn': run_gunicorn,
+    'waitress': run_waitress,
+    'uvicorn': run_uvicorn,
+    'dev': run_dev,
+}
+
+REQUIREMENTS = {
+    'gunicorn': ['gunicorn'],
+    'waitress': ['waitress'],
+    'uvicorn': ['uvicorn', 'httpx', 'asgiref'],
+    'dev': [],
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', choices=['auto'] + list(SERVERS), help='WEB_SERVER (default auto)')
+    parser.add_argument('--host', help='HOST (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, help='PORT (default 5000)')
+    parser.add_argument('--workers', type=int, help='WEB_WORKERS, gunicorn processes (default 1)')
+    parser.add_argument('--threads', type=int, help='WEB_THREADS, request threads per worker (default 16)')
+    parser.add_argument('--env-file', default='.env', help='file with KEY=VALUE settings')
+    args = parser.parse_args(argv)
+
+    # The app reads its own Config when imported; point it at the same file
+    os.environ['ENV_FILE'] = args.env_file
+    settings = server_settings(Config.from_env(), args)
+
+    server = settings.web_server
+    if server == 'auto':
+        server = 'gunicorn' if gunicorn_available() else 'waitress'
+
+    print("🚀 Starting AI Resume & Cover Letter Generator...")
+    workers = settings.web_workers if server in ('gunicorn', 'uvicorn') else 1
+    threads = '' if server == 'uvicorn' else f" x {settings.web_threads} threads"
+    print(f"🌐 {server} on http://{settings.host}:{settings.port} ({workers} worker(s){threads})")
+    missing = [package for package in REQUIREMENTS[server] if importlib.util.find_spec(package) is None]
+    if missing:
+        raise SystemExit(f"❌ {server} needs {', '.join(missing)}; pip install {' '.join(missing)} or use --server dev")
+    SERVERS[server](settings)
+
+
+if __name__ == '__main__':
+    main()
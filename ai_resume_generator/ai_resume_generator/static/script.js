@@ -244,6 +244,159 @@ function validateEnhancedForm(formData) {
     return errors;
 }
 
+// Stream generation over Server-Sent Events, calling onToken as text arrives
+async function streamGeneration(url, data, onToken) {
+    const response = await fetch(url, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data)
+    });
+    
+    if (!response.ok || !response.body) {
+        throw new Error(`Server responded with ${response.status}`);
+    }
+    
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        
+        buffer += decoder.decode(value, { stream: true });
+        
+        // SSE messages are separated by a blank line
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+            const message = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            
+            let event = 'message';
+            let payload = '';
+            message.split('\n').forEach(line => {
+                if (line.startsWith('event: ')) {
+                    event = line.slice(7);
+                } else if (line.startsWith('data: ')) {
+                    payload += line.slice(6);
+                }
+            });
+            
+            const parsed = payload ? JSON.parse(payload) : {};
+            if (event === 'token') {
+                onToken(parsed.text);
+            } else if (event === 'done') {
+                return parsed;
+            } else if (event === 'error') {
+                throw new Error(parsed.error);
+            }
+        }
+    }
+    
+    throw new Error('Stream ended before generation finished');
+}
+
+// Show the server-rendered preview when there is one, else the plain text
+function showGeneratedContent(element, result) {
+    if (result.preview_html) {
+        element.innerHTML = result.preview_html;
+    } else {
+        element.textContent = result.content;
+    }
+}
+
+// Keyword match against the job description, scored on the server without the LLM
+const SCORE_DEBOUNCE_MS = 300;
+
+async function fetchKeywordScore(data, signal) {
+    const response = await fetch('/score', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify(data),
+        signal
+    });
+    return response.json();
+}
+
+function renderKeywordScore(element, result) {
+    if (!element) return;
+    if (!result.success || result.score === null) {
+        element.style.display = 'none';
+        return;
+    }
+    
+    const source = result.source === 'industry' ? 'core skills for your industry' : 'job description keywords';
+    const header = document.createElement('div');
+    header.className = 'keyword-score-header';
+    header.textContent = `Keyword match: ${result.score}% of ${result.keywords} ${source}`;
+    
+    const chips = (label, names, className) => {
+        const row = document.createElement('div');
+        row.className = 'keyword-row';
+        if (names.length === 0) return row;
+        row.appendChild(document.createTextNode(label));
+        names.forEach(name => {
+            const chip = document.createElement('span');
+            chip.className = `keyword-chip ${className}`;
+            chip.textContent = name;
+            row.appendChild(chip);
+        });
+        return row;
+    };
+    
+    element.replaceChildren(
+        header,
+        chips('Missing: ', result.missing, 'missing'),
+        chips('Matched: ', result.matched, 'matched')
+    );
+    element.style.display = 'block';
+}
+
+// Re-score the form as the user types; only the last request's answer is shown
+function setupKeywordScoring() {
+    const form = document.getElementById('resumeForm') || document.getElementById('coverLetterForm');
+    const panel = document.getElementById('keywordScore');
+    if (!form || !panel) return;
+    
+    let timer = null;
+    let controller = null;
+    
+    const update = () => {
+        clearTimeout(timer);
+        timer = setTimeout(async () => {
+            if (controller) controller.abort();
+            controller = new AbortController();
+            const data = Object.fromEntries(new FormData(form).entries());
+            try {
+                renderKeywordScore(panel, await fetchKeywordScore(data, controller.signal));
+            } catch (error) {
+                if (error.name !== 'AbortError') panel.style.display = 'none';
+            }
+        }, SCORE_DEBOUNCE_MS);
+    };
+    
+    form.addEventListener('input', update);
+    update();
+}
+
+// Score the generated document itself once generation finishes
+async function scoreGeneratedContent(data, content) {
+    try {
+        const result = await fetchKeywordScore({
+            content,
+            job_description: data.job_description || '',
+            industry: data.industry || ''
+        });
+        renderKeywordScore(document.getElementById('resultKeywordScore'), result);
+    } catch (error) {
+        console.warn('Keyword scoring failed:', error);
+    }
+}
+
 // Resume form submission handler
 function setupResumeFormSubmission() {
     const form = document.getElementById('resumeForm');
@@ -273,20 +426,19 @@ function setupResumeFormSubmission() {
         loading.style.display = 'inline-flex';
         
         try {
-            // Send request to backend
-            const response = await fetch('/generate-resume', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(data)
-            });
+            // Show the result panel right away and fill it as tokens stream in
+            const resumeContent = document.getElementById('resumeContent');
+            resumeContent.textContent = '';
+            document.getElementById('result').style.display = 'block';
             
-            const result = await response.json();
+            const result = await streamGeneration('/generate-resume/stream', data, text => {
+                resumeContent.textContent += text;
+            });
             
             if (result.success) {
                 // Show result
-                document.getElementById('resumeContent').textContent = result.content;
+                showGeneratedContent(resumeContent, result);
+                scoreGeneratedContent(data, result.content);
                 document.getElementById('templateUsed').textContent = result.template;
                 document.getElementById('pageCount').textContent = result.pages;
                 document.getElementById('result').style.display = 'block';
@@ -357,20 +509,19 @@ function setupCoverLetterFormSubmission() {
         loading.style.display = 'inline-flex';
         
         try {
-            // Send request to backend
-            const response = await fetch('/generate-cover-letter', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify(data)
-            });
+            // Show the result panel right away and fill it as tokens stream in
+            const coverLetterContent = document.getElementById('coverLetterContent');
+            coverLetterContent.textContent = '';
+            document.getElementById('result').style.display = 'block';
             
-            const result = await response.json();
+            const result = await streamGeneration('/generate-cover-letter/stream', data, text => {
+                coverLetterContent.textContent += text;
+            });
             
             if (result.success) {
                 // Show result
-                document.getElementById('coverLetterContent').textContent = result.content;
+                showGeneratedContent(coverLetterContent, result);
+                scoreGeneratedContent(data, result.content);
                 document.getElementById('result').style.display = 'block';
                 
                 // Hide form
@@ -410,6 +561,7 @@ document.addEventListener('DOMContentLoaded', function() {
     initializeTemplateSelection();
     setupResumeFormSubmission();
     setupCoverLetterFormSubmission();
+    setupKeywordScoring();
 });
 
 // Export functions for potential use elsewhere
@@ -422,6 +574,8 @@ window.ResumeGeneratorJS = {
     setupURLFormatting,
     initializeTemplateSelection,
     validateEnhancedForm,
+    streamGeneration,
     setupResumeFormSubmission,
-    setupCoverLetterFormSubmission
+    setupCoverLetterFormSubmission,
+    setupKeywordScoring
 };
@@ -0,0 +1,207 @@
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+TMP_SUFFIX = '.tmp'
+
+
+def write_atomic(path, content):
+    """Write bytes to path through a temporary file, so readers never see half a file.
+
+    Each writer gets its own temporary file, so concurrent saves of the same
+    content-addressed name don't trip over each other. If the rename fails
+    because another writer holds the destination (Windows), a destination
+    that already has the same bytes counts as written.
+    """
+    path = Path(path)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=TMP_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(content)
+        os.replace(tmp_name, path)
+    except OSError:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        try:
+            if path.read_bytes() == content:
+                return
+        except OSError:
+            pass
+        raise
+
+
+class StorageManager:
+    """Sharded on-disk store for generated documents with retention limits.
+
+    Files are written into one subdirectory per day (``YYYYMMDD/``) so no
+    single directory grows without bound, and an in-memory index maps each
+    filename to its path so lookups rarely list the directory. Other
+    processes (gunicorn workers) share the directory but not the index, so a
+    name the index doesn't know is looked for in the shards on disk before
+    it counts as missing. A background sweeper deletes files older than
+    ``max_age_seconds`` and then the oldest files until the total size is
+    under ``max_total_bytes``.
+    """
+
+    def __init__(self, root='generated_documents', max_age_seconds=7 * 24 * 3600,
+                 max_total_bytes=1024 * 1024 * 1024, sweep_interval=600):
+        self.root = Path(root)
+        self.max_age_seconds = max_age_seconds
+        self.max_total_bytes = max_total_bytes
+        self.sweep_interval = sweep_interval
+
+        self._index = None
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._sweeper_pid = None
+        self.last_sweep = None
+        self.removed_last_sweep = 0
+
+    def _load_index(self):
+        """Build the filename index from disk once; legacy flat files are included"""
+        # Every entry point comes through here, so retention runs even on a
+        # server that only serves downloads
+        self._ensure_sweeper()
+        if self._index is not None:
+            return
+        self._index = {}
+        self._total_bytes = 0
+        if not self.root.exists():
+            return
+        for path in list(self.root.glob('*')) + list(self.root.glob('*/*')):
+            # Temporary files belong to saves still in progress (or that crashed)
+            if path.is_file() and not path.name.endswith(TMP_SUFFIX):
+                stat = path.stat()
+                self._index[path.name] = (path, stat.st_size, stat.st_mtime)
+                self._total_bytes += stat.st_size
+
+    def _ensure_sweeper(self):
+        if self.sweep_interval <= 0 or self._sweeper_pid == os.getpid():
+            return
+        self._sweeper_pid = os.getpid()
+        threading.Thread(target=self._sweep_forever, name='storage-sweeper', daemon=True).start()
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Warning: Storage sweep failed: {e}")
+
+    def save(self, filename, content):
+        """Write content into today's shard and return its path"""
+        shard = self.root / datetime.now().strftime('%Y%m%d')
+        shard.mkdir(parents=True, exist_ok=True)
+        path = shard / filename
+        write_atomic(path, content)
+
+        with self._lock:
+            self._load_index()
+            previous = self._index.get(filename)
+            if previous is not None:
+                self._total_bytes -= previous[1]
+            self._index[filename] = (path, len(content), time.time())
+            self._total_bytes += len(content)
+            over_budget = self._total_bytes > self.max_total_bytes
+
+        # The same filename saved on another day leaves a copy in the old shard
+        if previous is not None and previous[0] != path:
+            try:
+                previous[0].unlink()
+            except OSError:
+                pass
+        if over_budget:
+            self.sweep()
+        return path
+
+    def lookup(self, filename):
+        """Return the path stored for filename, or None"""
+        with self._lock:
+            self._load_index()
+            entry = self._index.get(filename)
+        if entry is not None and entry[0].is_file():
+            return entry[0]
+        # Saved or swept by another process since the index was built
+        return self._find_on_disk(filename, entry)
+
+    def _find_on_disk(self, filename, stale=None):
+        """Look for filename in the shards, newest first, and index what turns up"""
+        path = None
+        if self.root.exists():
+            shards = sorted((shard for shard in self.root.iterdir() if shard.is_dir()), reverse=True)
+            for candidate in [shard / filename for shard in shards] + [self.root / filename]:
+                if candidate.is_file():
+                    path = candidate
+                    break
+
+        with self._lock:
+            current = self._index.get(filename)
+            if current is not stale and current is not None:
+                # Saved by this process meanwhile
+                return current[0]
+            if stale is not None and current is stale:
+                del self._index[filename]
+                self._total_bytes -= stale[1]
+            if path is None:
+                return None
+            try:
+                stat = path.stat()
+            except OSError:
+                return None
+            self._index[filename] = (path, stat.st_size, stat.st_mtime)
+            self._total_bytes += stat.st_size
+        return path
+
+    def sweep(self):
+        """Apply the age and size limits; returns the number of files removed"""
+        now = time.time()
+        with self._lock:
+            self._load_index()
+            entries = sorted(self._index.items(), key=lambda item: item[1][2])
+            doomed = []
+            total = self._total_bytes
+            for name, (path, size, mtime) in entries:
+                if now - mtime > self.max_age_seconds or total > self.max_total_bytes:
+                    doomed.append(path)
+                    total -= size
+                    del self._index[name]
+            self._total_bytes = total
+
+        for path in doomed:
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+        # Drop shard directories that are now empty
+        if self.root.exists():
+            for shard in self.root.iterdir():
+                if shard.is_dir() and not any(shard.iterdir()):
+                    try:
+                        shard.rmdir()
+                    except OSError:
+                        pass
+
+        self.last_sweep = now
+        self.removed_last_sweep = len(doomed)
+        return len(doomed)
+
+    def stats(self):
+        with self._lock:
+            self._load_index()
+            return {
+                'files': len(self._index),
+                'bytes': self._total_bytes,
+                'max_total_bytes': self.max_total_bytes,
+                'max_age_seconds': self.max_age_seconds,
+                'shards': len({path.parent for path, _, _ in self._index.values()}),
+                'last_sweep': self.last_sweep,
+                'removed_last_sweep': self.removed_last_sweep,
+            }
@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from datetime import datetime
+
+
+def parse_keep_alive(value):
+    """Ollama takes keep_alive as a duration string ('30m') or a number of seconds (-1 = forever)"""
+    if value is None or value == '':
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def parse_hours(value):
+    """Parse 'HH-HH' (e.g. '8-18') into an (start, end) hour pair, or None for always"""
+    if not value:
+        return None
+    start, end = value.split('-', 1)
+    return int(start), int(end)
+
+
+class ModelWarmer:
+    """Loads the model when the app boots and optionally keeps it resident.
+
+    ``start()`` runs one warm-up request on a background thread so the
+    first user request doesn't pay the model load. If ``heartbeat_interval``
+    is set, the same thread then re-sends the warm-up whenever the model has
+    been idle that long, but only during ``hours`` on weekdays (or every day
+    when ``weekdays_only`` is False), so Ollama can unload it overnight.
+    """
+
+    def __init__(self, llm, warm_up=True, heartbeat_interval=0, hours=None, weekdays_only=True):
+        self.llm = llm
+        self.warm_up = warm_up
+        self.heartbeat_interval = heartbeat_interval
+        self.hours = hours
+        self.weekdays_only = weekdays_only
+
+        self._started_pid = None
+        self.last_warm_up = None
+        self.last_load_seconds = None
+        self.last_error = None
+        self.heartbeats = 0
+
+    def start(self):
+        if self._started_pid == os.getpid() or not (self.warm_up or self.heartbeat_interval > 0):
+            return self
+        self._started_pid = os.getpid()
+        threading.Thread(target=self._run, name='model-warmer', daemon=True).start()
+        return self
+
+    def _run(self):
+        if self.warm_up:
+            self.warm()
+        while self.heartbeat_interval > 0:
+            time.sleep(min(self.heartbeat_interval, 60))
+            if self.in_business_hours() and time.time() - self.llm.last_used >= self.heartbeat_interval:
+                if self.warm():
+                    self.heartbeats += 1
+
+    def in_business_hours(self, now=None):
+        now = now or datetime.now()
+        if self.weekdays_only and now.weekday() >= 5:
+            return False
+        if self.hours is None:
+            return True
+        start, end = self.hours
+        return start <= now.hour < end
+
+    def warm(self):
+        """Load the model now; returns True on success"""
+        try:
+            self.last_load_seconds = self.llm.warm_up()
+            self.last_warm_up = time.time()
+            self.last_error = None
+            print(f"🔥 Model {self.llm.model_name} loaded ({self.last_load_seconds:.1f}s)")
+            return True
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"Warning: Model warm-up failed: {e}")
+            return False
+
+    def stats(self):
+        return {
+            'warm_up': self.warm_up,
+            'keep_alive': self.llm.keep_alive,
+            'heartbeat_interval': self.heartbeat_interval,
+            'last_warm_up': self.last_warm_up,
+            'last_load_seconds': self.last_load_seconds,
+            'last_error': self.last_error,
+            'heartbeats': self.heartbeats,
+        }